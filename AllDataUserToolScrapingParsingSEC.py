@@ -9,15 +9,25 @@ import pprint
 import pathlib
 import collections
 # API for parsing and creating XML data
-import xml.etree.ElementTree as ET
 import lxml.etree as ETL
 import requests
 import argparse
-import time
+import SECAsyncDownloader
+import SECBatchPipeline
+import SECDocumentStore
+import SECFilingLocator
+import SECMetrics
+import SECTableWriter
+import SECTickerResolver
+import XBRLCalculation
+import XBRLColumnarWriter
+import XBRLParseCache
+import XBRLPresentation
+import XBRLStreamParsing
 from bs4 import BeautifulSoup
 
 import math
-import decimal as Decimal
+from decimal import Decimal
 import re
 
 # map ticker to CIK
@@ -48,16 +58,56 @@ def parse_args():
     )
     parser.add_argument("--ticker", help="Company ticker", default=None)
     parser.add_argument("--date", help="Date", default=None)
+    # batch mode: many tickers and a date range, no prompts
+    parser.add_argument("--tickers", nargs="+", help="Batch mode: company tickers", default=None)
+    parser.add_argument("--tickers-file", help="Batch mode: file with one ticker per line", default=None)
+    parser.add_argument("--start", help="Batch mode: first report date (YYYY-MM-DD)", default=None)
+    parser.add_argument("--end", help="Batch mode: last report date (YYYY-MM-DD)", default=None)
+    parser.add_argument("--forms", nargs="+", help="Batch mode: form types", default=["10-K"])
+    parser.add_argument("--out-dir", help="Batch mode: output folder", default="batch_output")
+    parser.add_argument("--workers", type=int, help="Batch mode: download threads", default=None)
+    parser.add_argument("--processes", type=int, help="Batch mode: parser processes", default=None)
+    # typed, partitioned copy of the csv output (needs pyarrow)
+    parser.add_argument("--columnar", choices=XBRLColumnarWriter.FORMATS, help="Also write Parquet or Arrow IPC files", default=None)
+    parser.add_argument("--columnar-dir", help="Root folder for the columnar files", default=None)
+    # offline mode: read submissions.zip / companyfacts.zip from this folder instead of the SEC
+    parser.add_argument("--bulk-dir", help="Folder with the SEC bulk submissions.zip and companyfacts.zip", default=None)
+    # parsed results keyed by the documents' content hash (see XBRLParseCache)
+    parser.add_argument("--parse-cache-dir", help="Parse cache folder", default=str(XBRLParseCache.CACHE_DIR))
+    parser.add_argument("--no-parse-cache", action="store_true", help="Always parse the documents")
+    # downloaded documents are kept compressed per CIK / accession (see SECDocumentStore)
+    parser.add_argument("--store-dir", help="Document store folder", default=str(SECDocumentStore.STORE_DIR))
+    parser.add_argument("--store-codec", choices=tuple(SECDocumentStore.CODECS), help="Document store compression",
+                        default=SECDocumentStore.DEFAULT_CODEC)
+    # calculation linkbase roll-ups checked against the facts (see XBRLCalculation)
+    parser.add_argument("--check-calculations", action="store_true",
+                        help="Check the calculation linkbase totals, write sec_xbrl_calculation_check.csv")
+    # balance sheet, income statement and cash flow from the presentation linkbase (see XBRLPresentation)
+    parser.add_argument("--statements", nargs="?", const="xlsx", choices=SECTableWriter.FORMATS, default=None,
+                        help="Write the primary statements to sec_xbrl_statements (xlsx, or a csv / parquet folder)")
+    parser.add_argument("--statement-role", action="append", metavar="KIND=ROLE", default=None,
+                        help="Role uri of a statement when its name does not give it away "
+                             f"(kinds: {', '.join(XBRLPresentation.STATEMENT_ROLES)})")
+    # per stage timings and counters (see SECMetrics)
+    parser.add_argument("--metrics-jsonl", help="Append run metrics to this JSON lines file", default=None)
+    parser.add_argument("--metrics-prom", help="Write run metrics to this Prometheus textfile", default=None)
     # Accept unknown args
     args, _ = parser.parse_known_args()
+    try:
+        args.statement_role = parse_statement_roles(args.statement_role)
+    except ValueError as e:
+        parser.error(str(e))
 
     # user interactvely if missing arguments
-    if not args.ticker:
+    if not args.ticker and not (args.tickers or args.tickers_file):
         args.ticker = input("Company ticker")
         args.date = input("Date")
     return args
 
-def parse_numeric_text_to_float(text, decimals=None):
+# one value at a time; for whole fact columns use XBRLNumeric.normalize_numeric
+# decimals is the reported precision and does not rescale the value,
+# scale (inline XBRL) multiplies by 10 ** scale and sign="-" negates
+def parse_numeric_text_to_float(text, decimals=None, scale=None, sign=None):
 
     if text is None:
         return None
@@ -75,7 +125,7 @@ def parse_numeric_text_to_float(text, decimals=None):
         s = s[1:-1].strip()
 
     # Extract a numeric substring (handles e/E scientific notation)
-    m = re.search(r"[-+]?\d+(\.\d+)?([eE][-+]?\d+)?", s)
+    m = re.search(r"[-+]?(?=\.?\d)\d*(\.\d+)?([eE][-+]?\d+)?", s)
     if not m:
         return None
 
@@ -84,18 +134,17 @@ def parse_numeric_text_to_float(text, decimals=None):
     except Exception:
         return None
 
-    # XBRL uses decimals=-3 indicates thousands
-    if decimals is not None:
+    if scale is not None:
         try:
-            d = int(decimals)
-            # scaled = val * (10 ** (-d))
-            val = val * (Decimal(10) ** (-d))
+            val = val.scaleb(int(scale))
         except Exception:
             # ignore malformed
             pass
 
     if negative:
         val = -val
+    if sign == "-":
+        val = -val
 
     try:
         f = float(val)
@@ -108,7 +157,8 @@ def parse_numeric_text_to_float(text, decimals=None):
 
 def extract_root_nsmap_and_prefixes(file_path):
     try:
-        root = ETL.parse(str(file_path)).getroot()
+        with SECDocumentStore.open_document(file_path) as fh:
+            root = ETL.parse(fh).getroot()
         nsmap = root.nsmap or {}
         uri_to_prefix = {}
         for prefix, uri in nsmap.items():
@@ -125,296 +175,56 @@ def extract_root_nsmap_and_prefixes(file_path):
 
 # go from company ticker to CIK
 def get_cik_from_ticker(ticker: str) -> str:
-    url = TICKER_JSON
-    data = requests.get(url, headers=HEADERS_URL).json()
-    for entry in data.values():
-        # get json mapping from SEC and search of company ticker
-        if entry['ticker'].lower() == ticker.lower():
-            # fetch CIK
-            cik = str(entry['cik_str']).zfill(10)
-            print(f"Found CIK {cik} for ticker {ticker}")
-            return cik
-    raise ValueError(f"Ticker {ticker} not found in SEC database")
+    # cached, indexed SEC mapping shared with the other scripts (see SECTickerResolver)
+    cik = SECTickerResolver.get_cik_from_ticker(ticker)
+    print(f"Found CIK {cik} for ticker {ticker}")
+    return cik
 
 # creates a mapping for xml documents and their urls
-def get_url(cik, ticker, year: str) -> str:
+# year / forms narrow the candidates from the submissions arrays before any index.json is fetched
+def get_url(cik, ticker, year: str, forms=None) -> dict:
     # cik = get_cik_from_ticker(ticker)
-    json_link = f"{SUB_URL}CIK{cik}.json"
-    print(json_link)
-    headers = HEADERS_URL
-    resp = requests.get(json_link, headers=headers)
-    resp.raise_for_status()
-    if "application/json" not in resp.headers.get("Content-Type", ""):
-        print("Unexpected content:", resp.text[:200])
-        raise RuntimeError(f"Did not receive JSON from SEC for {url}")
-    data = resp.json()
-    forms = data['filings']['recent']
-
-    filings = data.get("filings", {}).get("recent", {})
-    forms = filings.get("form", [])
-    dates = filings.get("filingDate", [])
-    accessions = filings.get("accessionNumber", [])
-    documents = filings.get("primaryDocument", [])
-
-    filings_data = list(zip(forms, dates, accessions, documents))
-    # by date descending
-    filings_data.sort(key=lambda x: x[1], reverse=True)
-
-    for form, date, acc, doc in filings_data:
-        acc_no_dashes = acc.replace("-", "")
-        # base URL
-        base_url = f"{BASE}{int(cik)}/{acc_no_dashes}/"
-
-        # filing's index.json (listing all files)
-        index_url = f"{base_url}index.json"
-        print(index_url)
-        try:
-            r = requests.get(index_url, headers=headers)
-            r.raise_for_status()
-            idx_data = r.json()
-
-            # relevant XML files found here
-            found_files = {}
-            for file_entry in idx_data.get("directory", {}).get("item", []):
-                name = file_entry.get("name", "")
-                # check if file is one of the XML types you want
-                if any(suffix in name for suffix in ["_def.xml", "_htm.xml", "_lab.xml", "_cal.xml", "_pre.xml"]):
-                    # keys without extensions for clarity or keep names as is
-                    found_files[name] = base_url + name
-
-            # found at least the instance document (_htm.xml), consider success
-            if any("_htm.xml" in fname for fname in found_files):
-                print(f"Found filing with required XMLs at: {index_url}")
-                print(found_files)
-                # scans directory items for the XML files you want (_def.xml, _htm.xml, _lab.xml, _cal.xml
-                # returns dict with found required elements of fmap (some may be missing)
-                return found_files  # return dictionary of files with full URLs
-
-        except requests.RequestException as e:
-            print(f"Error fetching {index_url}: {e}")
-            continue  # Try next filing
+    print(f"{SUB_URL}CIK{cik}.json")
+    # filings without an _htm.xml instance are read from their inline XBRL primary document
+    matches = SECFilingLocator.locate(
+        cik, forms=forms, year=year or None, first=True, inline=True
+    )
+
+    if matches:
+        filing, found_files = matches[0]
+        index_url = f"{SECFilingLocator.filing_base_url(cik, filing.accession)}index.json"
+        print(f"Found filing with required XMLs at: {index_url}")
+        print(found_files)
+        # returns dict with found required elements of fmap (some may be missing)
+        return found_files  # return dictionary of files with full URLs
 
     # If none found
     raise ValueError(f"No filing found with required XML files for CIK {cik} and year {year}")
 
-#can loop through each file
-# P3
-# del if breaks
+# streaming linkbase reader, processed link subtrees are discarded (see XBRLStreamParsing)
 def parse_linkbases(files_list, parse_labels):
-    storage_list = []
-    storage_values = {}
-    storage_gaap = {}
+    return XBRLStreamParsing.parse_linkbases_stream(files_list, parse_labels)
 
-    for file in files_list:
-        # expect FilingTuple(file_path, namespace_element, namespace_label)
-        if not getattr(file, "file_path", None):
-            print(f"Warning: File for {getattr(file, 'namespace_label', '?')} not found, skipping.")
-            continue
 
-        try:
-            tree = ET.parse(str(file.file_path))
-        except Exception as e:
-            print(f"Error parsing {file.file_path}: {e}")
-            continue
-
-        root = tree.getroot()
-        elements = root.findall(file.namespace_element)
-        for element in elements:
-            for child_element in element.iter():
-                tag = child_element.tag if isinstance(child_element.tag, str) else ""
-                # safe localname
-                local = tag.split("}")[-1] if "}" in tag else tag
-                if local in parse_labels:
-                    element_type_label = f"{file.namespace_label}_{local}"
-
-                    dict_storage = {"item_type": element_type_label}
-                    # transfer attributes; strip namespace from attrib keys that contain '}'
-                    for key, val in child_element.attrib.items():
-                        if "}" in key:
-                            new_key = key.split("}", 1)[1]
-                        else:
-                            new_key = key
-                        dict_storage[new_key] = val
-
-                    # handle label-specific mapping (your original logic)
-                    if element_type_label == "label_label" and "label" in dict_storage:
-                        key_store = dict_storage["label"]
-                        master_key = key_store.replace("lab_", "")
-                        label_split = master_key.split("_")
-                        if len(label_split) >= 2:
-                            gaap_id = f"{label_split[0]};{label_split[1]}"
-                        else:
-                            gaap_id = master_key
-
-                        storage_values.setdefault(master_key, {})
-                        storage_values[master_key].update({
-                            "label_id": key_store,
-                            "location_id": key_store.replace("lab_", "loc_"),
-                            "us_gaap_id": gaap_id,
-                            "us_gaap_values": None,
-                        })
-                        storage_values[master_key][element_type_label] = dict_storage
-
-                        storage_gaap.setdefault(gaap_id, {})
-                        storage_gaap[gaap_id].update({
-                            "id": gaap_id,
-                            "master_id": master_key
-                        })
-                    else:
-                        # store other linkbase entries keyed by their item label
-                        # make unique key
-                        storage_list.append([file.namespace_label, dict_storage])
+# single pass iterparse over the instance document (see XBRLStreamParsing)
+# an inline XBRL primary document (.htm) is read directly, no _htm.xml needed
+def parse_instance_doc(file_htm, storage_values, storage_list, storage_gaap):
+    if SECDocumentStore.document_name(file_htm).lower().endswith(SECFilingLocator.INLINE_SUFFIXES):
+        XBRLStreamParsing.parse_inline_doc_stream(file_htm, storage_values, storage_list, storage_gaap)
+    else:
+        XBRLStreamParsing.parse_instance_doc_stream(file_htm, storage_values, storage_list, storage_gaap)
 
-    return storage_list, storage_values, storage_gaap
 
+# FactStore columns written to sec_xbrl_facts.csv
+FACT_CSV_COLUMNS = ("tag_prefix", "tag_local", "gaap_id_candidate", "contextRef", "unitRef", "decimals", "value_raw")
 
-def parse_instance_doc(file_htm, storage_values, storage_list, storage_gaap):
-    storage_facts = []
-    uri_to_prefix = extract_root_nsmap_and_prefixes(file_htm)
 
-    try:
-        tree = ET.parse(str(file_htm))
-    except Exception as e:
-        print(f"Error parsing instance document {file_htm}: {e}")
-        return
-
-    root = tree.getroot()
-
-    #context and unit maps
-    contexts = {}
-    units = {}
-    for el in root.iter():
-        tag = el.tag if isinstance(el.tag, str) else ""
-        local = tag.split("}")[-1] if "}" in tag else tag
-        if local == "context":
-            cid = el.attrib.get("id")
-            if cid:
-                # entity.identifier and period
-                entity_id = None
-                period_start = None
-                period_end = None
-                instant = None
-                for sub in el:
-                    sub_local = sub.tag.split("}")[-1] if "}" in sub.tag else sub.tag
-                    if sub_local == "entity":
-                        id_el = sub.find(".//{*}identifier")
-                        if id_el is not None:
-                            entity_id = id_el.text
-                    elif sub_local == "period":
-                        start_el = sub.find(".//{*}startDate")
-                        end_el = sub.find(".//{*}endDate")
-                        instant_el = sub.find(".//{*}instant")
-                        if start_el is not None:
-                            period_start = start_el.text
-                        if end_el is not None:
-                            period_end = end_el.text
-                        if instant_el is not None:
-                            instant = instant_el.text
-                contexts[cid] = {
-                    "entity_identifier": entity_id,
-                    "period_start": period_start,
-                    "period_end": period_end,
-                    "instant": instant
-                }
-        elif local == "unit":
-            uid = el.attrib.get("id")
-            if uid:
-                # store unit element text or measures found
-                measures = [m.text for m in el.findall(".//{*}measure")]
-                units[uid] = {"measures": measures}
-
-    # attach contexts/units to storage_values for CSV output
-    storage_values["_contexts"] = contexts
-    storage_values["_units"] = units
-
-    # iterate facts
-    for element in root.iter():
-        tag = element.tag if isinstance(element.tag, str) else ""
-        local = tag.split("}")[-1] if "}" in tag else tag
-
-        #nonNumeric/nonFractional specially
-        if "nonNumeric" in tag or "nonFractional" in tag:
-            attr_name = element.attrib.get("name")
-            if not attr_name:
-                continue
-            if attr_name in storage_gaap:
-                g = storage_gaap[attr_name]
-                g["context_ref"] = element.attrib.get("contextRef")
-                g["context_id"] = element.attrib.get("id")
-                g["continued_at"] = element.attrib.get("continuedAt", "null")
-                g["escape"] = element.attrib.get("escape", "null")
-                g["format"] = element.attrib.get("format", "null")
-                g["unit_ref"] = element.attrib.get("unitRef", "null")
-                g["decimals"] = element.attrib.get("decimals", "null")
-                g["scale"] = element.attrib.get("scale", "null")
-                g["value"] = element.text.strip() if element.text else "null"
-
-                gaap_key = attr_name
-                if gaap_key in storage_gaap:
-                    master = storage_gaap[gaap_key].get("master_id")
-                    if master:
-                        storage_values.setdefault(master, {})["us_gaap_value"] = storage_gaap[attr_name]
-                else:
-                    storage_values.setdefault("_unmapped_nonNumeric", {})[attr_name] = storage_gaap[attr_name]
-            else:
-                # store unmapped nonNumeric if desired
-                storage_values.setdefault("_unmapped_nonNumeric", {})[attr_name] = {
-                    "context_ref": element.attrib.get("contextRef"),
-                    "value": element.text.strip() if element.text else None
-                }
-            # continue to next element (nonNumeric handled)
-            continue
-
-        # skip things that are not facts (no contextRef)
-        ctx = element.attrib.get("contextRef")
-        if ctx is None:
-            continue
-
-        # build gaap_candidate using namespace mapping
-        if "}" in tag:
-            ns_uri = tag.split("}")[0].lstrip("{")
-            localname = tag.split("}")[1]
-        else:
-            ns_uri = None
-            localname = tag
-
-        prefix = uri_to_prefix.get(ns_uri) if ns_uri else None
-        if prefix in (None, ""):
-            gaap_candidate = localname
-        else:
-            gaap_candidate = f"{prefix};{localname}"
-
-        unit_ref = element.attrib.get("unitRef")
-        decimals = element.attrib.get("decimals")
-
-
-        value_raw = element.text.strip() if element.text else None
-        value_numeric = parse_numeric_text_to_float(value_raw, decimals=decimals)
-
-
-        fact = {
-            "tag_local": localname,
-            "tag_prefix": prefix,
-            "gaap_id_candidate": gaap_candidate,
-            "contextRef": ctx,
-            "unitRef": unit_ref,
-            "decimals": decimals,
-            "value_raw": value_raw,
-            "value_numeric": value_numeric
-        }
-        storage_facts.append(fact)
-
-        if gaap_candidate in storage_gaap:
-            master_key = storage_gaap[gaap_candidate]["master_id"]
-            storage_values.setdefault(master_key, {}).setdefault("facts", []).append(fact)
-        else:
-            storage_values.setdefault("_unmapped_facts", []).append(fact)
-
-    storage_values["_facts_list"] = storage_facts
-
-
-def write_csv(storage_list, storage_values):
-    file_name = "sec_xbrl_scrape_content.csv"
+# out_dir keeps batch runs from overwriting each other, default is the cwd like before
+def write_csv(storage_list, storage_values, out_dir=None):
+    out_dir = pathlib.Path(out_dir) if out_dir else pathlib.Path.cwd()
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    file_name = out_dir / "sec_xbrl_scrape_content.csv"
     with open(file_name, mode="w", newline="", encoding="utf-8") as sec_file:
         writer = csv.writer(sec_file)
         writer.writerow(["FILE", "LABEL", "VALUE"])
@@ -427,7 +237,7 @@ def write_csv(storage_list, storage_values):
             else:
                 writer.writerow([ns_label, str(data)])
 
-    file_name = "sec_xbrl_scrape_values.csv"
+    file_name = out_dir / "sec_xbrl_scrape_values.csv"
     with open(file_name, mode="w", newline="", encoding="utf-8") as sec_file:
         writer = csv.writer(sec_file)
         writer.writerow(["ID", "CATEGORY", "LABEL", "VALUE"])
@@ -446,24 +256,15 @@ def write_csv(storage_list, storage_values):
     # Facts CSV
     facts = storage_values.get("_facts_list", [])
     if facts:
-        with open("sec_xbrl_facts.csv", "w", newline="", encoding="utf-8") as ff:
+        with open(out_dir / "sec_xbrl_facts.csv", "w", newline="", encoding="utf-8") as ff:
             w = csv.writer(ff)
             w.writerow(["tag_prefix", "tag_local", "gaap_candidate", "contextRef", "unitRef", "decimals", "value_raw"])
-            for f in facts:
-                w.writerow([
-                    f.get("tag_prefix"),
-                    f.get("tag_local"),
-                    f.get("gaap_id_candidate"),
-                    f.get("contextRef"),
-                    f.get("unitRef"),
-                    f.get("decimals"),
-                    f.get("value_raw"),
-
-                ])
+            # read the columns straight out of the FactStore, no per fact dicts
+            w.writerows(facts.iter_rows(FACT_CSV_COLUMNS))
 
     contexts = storage_values.get("_contexts", {})
     if contexts:
-        with open("sec_xbrl_contexts.csv", "w", newline="", encoding="utf-8") as cf:
+        with open(out_dir / "sec_xbrl_contexts.csv", "w", newline="", encoding="utf-8") as cf:
             w = csv.writer(cf)
             w.writerow(["contextRef", "entity_identifier", "period_start", "period_end", "instant"])
             for k, v in contexts.items():
@@ -471,70 +272,200 @@ def write_csv(storage_list, storage_values):
 
 
 
+# create constructor for named tuple object type
+FilingTuple = collections.namedtuple("FilingTuple", ["file_path", "namespace_element", "namespace_label"])
+
+# output files written by write_csv
+CSV_LIST = ["sec_xbrl_scrape_content.csv", "sec_xbrl_scrape_values.csv", "sec_xbrl_contexts.csv", "sec_xbrl_facts.csv"]
+
+# written by check_calculations
+CALCULATION_CSV = "sec_xbrl_calculation_check.csv"
+
+# written by write_statements (a folder of that name for csv / parquet)
+STATEMENTS_FILE = "sec_xbrl_statements.xlsx"
+
+
+# pick the instance and linkbase paths out of the fmap returned by get_url
+# "htm" falls back to the inline XBRL primary document when the filing has no _htm.xml
+# directory is the download folder or the DocumentStore the documents went into
+def find_xml_files(fmap, directory):
+    if isinstance(directory, SECDocumentStore.DocumentStore):
+        paths = {fname: directory.path_for_url(url) for fname, url in fmap.items()}
+    else:
+        paths = {fname: pathlib.Path(directory) / fname for fname in fmap}
+    xml_files = {"htm": None, "cal": None, "def": None, "lab": None, "pre": None}
+    inline = None
+    for fname in fmap:
+        for kind in xml_files:
+            if fname.endswith(f"_{kind}.xml"):
+                xml_files[kind] = paths[fname]
+        if fname.lower().endswith(SECFilingLocator.INLINE_SUFFIXES):
+            inline = paths[fname]
+    if xml_files["htm"] is None:
+        xml_files["htm"] = inline
+    return xml_files
+
+
+def build_files_list(xml_files):
+    return [
+        FilingTuple(xml_files["cal"], '{http://www.xbrl.org/2003/linkbase}calculationLink', 'calculation'),
+        FilingTuple(xml_files["def"], '{http://www.xbrl.org/2003/linkbase}definitionLink', 'definition'),
+        FilingTuple(xml_files["lab"], '{http://www.xbrl.org/2003/linkbase}labelLink', 'label'),
+        FilingTuple(xml_files["pre"], '{http://www.xbrl.org/2003/linkbase}presentationLink', 'presentation')
+    ]
+
+
+# CPU bound half of the workflow: linkbases + instance -> csv files in out_dir
+# columnar ("parquet" / "arrow") also writes the typed tables under columnar_dir,
+# partitioned by the ticker / accession / form found in partition
+# parse_cache is the parse cache folder, an unchanged filing is loaded from there instead of parsed
+def parse_filing(xml_files, out_dir=None, columnar=None, columnar_dir=None, partition=None, parse_cache=None):
+    cache = XBRLParseCache.ParseCache(parse_cache) if parse_cache else None
+    products = None
+    if cache:
+        with SECMetrics.stage("load_parse_cache"):
+            cache_key = cache.key(xml_files)
+            products = cache.load(cache_key)
+
+    if products is None:
+        # label categories
+        # labelArc points to next element you want
+        files_list = build_files_list(xml_files)
+
+        with SECMetrics.stage("parse_linkbases"):
+            storage_list, storage_values, storage_gaap = parse_linkbases(files_list, parse)
+        with SECMetrics.stage("parse_instance_doc"):
+            parse_instance_doc(xml_files["htm"], storage_values, storage_list, storage_gaap)
+        if cache:
+            with SECMetrics.stage("store_parse_cache"):
+                cache.store(cache_key, storage_list, storage_values, storage_gaap)
+    else:
+        storage_list, storage_values, storage_gaap = products
+    with SECMetrics.stage("write_csv"):
+        write_csv(storage_list, storage_values, out_dir)
+    if columnar:
+        with SECMetrics.stage("write_columnar"):
+            XBRLColumnarWriter.write_columnar(
+                storage_list, storage_values, columnar_dir, fmt=columnar, **(partition or {})
+            )
+    return storage_list, storage_values
+
+
+# every summation of the calculation linkbase against the facts of each context / unit,
+# one row per check in sec_xbrl_calculation_check.csv, returns how many did not add up
+def check_calculations(xml_files, storage_values, out_dir=None) -> int:
+    if not xml_files.get("cal"):
+        return 0
+    with SECMetrics.stage("check_calculations"):
+        graph = XBRLCalculation.CalculationGraph.from_linkbase(xml_files["cal"])
+        checks = XBRLCalculation.check_calculations(graph, storage_values)
+    out_dir = pathlib.Path(out_dir) if out_dir else pathlib.Path.cwd()
+    out_dir.mkdir(parents=True, exist_ok=True)
+    checks.to_csv(out_dir / CALCULATION_CSV, index=False)
+    return int((~checks["consistent"].astype(bool)).sum())
+
+
+# primary statements rendered from the presentation / label linkbases and the facts, one sheet
+# (or file) per statement, returns statement kind -> lines
+# roles ({kind: role uri}) overrides the statement roles XBRLPresentation picks by name
+def write_statements(xml_files, storage_values, output_file, fmt="xlsx", roles=None) -> dict:
+    if not xml_files.get("pre"):
+        return {}
+    with SECMetrics.stage("render_statements"):
+        tree = XBRLPresentation.PresentationTree.from_linkbase(xml_files["pre"])
+        labels = XBRLPresentation.read_labels(xml_files["lab"]) if xml_files.get("lab") else {}
+        statements = XBRLPresentation.render_statements(tree, storage_values, labels, roles)
+    writer = SECTableWriter.open_writer(output_file, fmt)
+    try:
+        for kind, df in statements.items():
+            # xlsx cells cannot hold NaN, periods without a value stay blank
+            writer.add(kind, df.fillna("") if fmt == "xlsx" else df)
+    finally:
+        writer.close()
+    return {kind: len(df) for kind, df in statements.items()}
+
+
+# ["cash_flow=http://.../role/CashFlows"] -> {"cash_flow": "http://.../role/CashFlows"}
+def parse_statement_roles(values) -> dict:
+    roles = {}
+    for value in values or ():
+        kind, sep, role = value.partition("=")
+        if not sep or kind not in XBRLPresentation.STATEMENT_ROLES:
+            raise ValueError(f"--statement-role expects KIND=ROLE with KIND one of {tuple(XBRLPresentation.STATEMENT_ROLES)}")
+        roles[kind] = role
+    return roles
+
+
+# "000032019323000106" (as in the archive urls) -> "0000320193-23-000106"
+def format_accession(accession):
+    accession = accession.replace("-", "")
+    return f"{accession[:10]}-{accession[10:12]}-{accession[12:]}"
+
+
 # main workflow
 def main():
 
     # call parser
     args = parse_args()
+    # starts the run clock for the metrics
+    SECMetrics.get_metrics()
+    try:
+        return run(args)
+    finally:
+        SECMetrics.export(args.metrics_jsonl, args.metrics_prom)
+
+
+def run(args):
+    if args.bulk_dir:
+        tickers = SECBatchPipeline.read_tickers(args.tickers or ([args.ticker] if args.ticker else []), args.tickers_file)
+        return SECBatchPipeline.run_bulk_batch(
+            tickers, args.bulk_dir, args.out_dir, start=args.start, end=args.end, forms=args.forms,
+            processes=args.processes, columnar=args.columnar, columnar_dir=args.columnar_dir,
+        )
+
+    parse_cache = None if args.no_parse_cache else args.parse_cache_dir
+
+    if args.tickers or args.tickers_file:
+        tickers = SECBatchPipeline.read_tickers(args.tickers, args.tickers_file)
+        return SECBatchPipeline.run_xbrl_batch(
+            tickers, args.out_dir, start=args.start, end=args.end, forms=args.forms,
+            workers=args.workers, processes=args.processes,
+            columnar=args.columnar, columnar_dir=args.columnar_dir, parse_cache=parse_cache,
+            store_dir=args.store_dir, store_codec=args.store_codec, check=args.check_calculations,
+            statements=args.statements,
+        )
 
     cik = get_cik_from_ticker(args.ticker)
 
     # populate fmap
     fmap = {}
 
-    fmap = get_url(cik, args.ticker, args.date)
-
-    sec_directory = pathlib.Path.cwd().joinpath("folder_to_store_xml_docs")
-    sec_directory.mkdir(parents=True, exist_ok=True)
-
-    file_htm = None
-    file_cal = None
-    file_def = None
-    file_lab = None
-    file_pre = None
-
-    for fname, url in fmap.items():
-        fpath = sec_directory / fname
-        if fname.endswith("_htm.xml"):
-            file_htm = sec_directory / fname
-        if fname.endswith("_cal.xml"):
-            file_cal = sec_directory / fname
-        if fname.endswith("_def.xml"):
-            file_def = sec_directory / fname
-        if fname.endswith("_lab.xml"):
-            file_lab = sec_directory / fname
-        if fname.endswith("_pre.xml"):
-            file_pre = sec_directory / fname
-        if not fpath.exists():
-            try:
-                response = requests.get(url, headers=HEADERS_URL)
-                time.sleep(0.2) 
-                #response = requests.get(f"{BASE}/{tail}", headers = HEADERS_URL)
-                response.raise_for_status()
-                fpath.write_bytes(response.content)
-                print(f"Downloaded: {fname}")
-            except requests.exceptions.RequestException as e:
-                print(f"Error downloading {fname}: {e}")
-        else:
-            print(f"Already exists: {fname}")
-
-
-    # create constructor for named tuple object type
-    FilingTuple = collections.namedtuple("FilingTuple", ["file_path", "namespace_element", "namespace_label"])
-
-    files_list = [
-        FilingTuple(file_cal, '{http://www.xbrl.org/2003/linkbase}calculationLink', 'calculation'),
-        FilingTuple(file_def, '{http://www.xbrl.org/2003/linkbase}definitionLink', 'definition'),
-        FilingTuple(file_lab, '{http://www.xbrl.org/2003/linkbase}labelLink', 'label'),
-        FilingTuple(file_pre, '{http://www.xbrl.org/2003/linkbase}presentationLink', 'presentation')
-    ]
-
-    # label categories
-    # labelArc points to next element you want
-
-    storage_list, storage_values, storage_gaap = parse_linkbases(files_list, parse)
-    parse_instance_doc(file_htm, storage_values, storage_list, storage_gaap)
-    write_csv(storage_list, storage_values)
+    with SECMetrics.stage("get_url"):
+        fmap = get_url(cik, args.ticker, args.date)
+
+    store = SECDocumentStore.DocumentStore(args.store_dir, args.store_codec)
+
+    # the accession folder of the archive urls names the columnar partition
+    any_url = next(iter(fmap.values()), "")
+    partition = {"ticker": args.ticker.upper(), "accession": format_accession(any_url.rstrip("/").split("/")[-2])}
+
+    with SECMetrics.filing(partition["ticker"], partition["accession"]):
+        # fetch all of the filing's documents concurrently under the shared rate limit
+        with SECMetrics.stage("download"):
+            SECAsyncDownloader.download_all(fmap, store)
+
+        xml_files = find_xml_files(fmap, store)
+        storage_list, storage_values = parse_filing(
+            xml_files, columnar=args.columnar, columnar_dir=args.columnar_dir, partition=partition,
+            parse_cache=parse_cache,
+        )
+        if args.check_calculations:
+            inconsistent = check_calculations(xml_files, storage_values)
+            print(f"Calculation check: {inconsistent} inconsistent summations, see {CALCULATION_CSV}")
+        if args.statements:
+            written = write_statements(xml_files, storage_values, STATEMENTS_FILE, args.statements, args.statement_role)
+            path = SECTableWriter.output_path(STATEMENTS_FILE, args.statements)
+            print(f"Statements: {', '.join(f'{k} ({n} lines)' for k, n in written.items()) or 'none found'}, see {path}")
 
     unmapped = storage_values.get("_unmapped_facts", [])
     if unmapped:
@@ -542,8 +473,10 @@ def main():
     
     print("Created: sec_xbrl_scrape_content.csv, sec_xbrl_scrape_values.csv, sec_xbrl_contexts.csv, sec_xbrl_facts.csv")
     print("Written to csv successfully")
+    if args.columnar:
+        print(f"Columnar ({args.columnar}) tables written under {args.columnar_dir or 'sec_xbrl_columnar'}")
 
-    csv_list = ["sec_xbrl_scrape_content.csv", "sec_xbrl_scrape_values.csv", "sec_xbrl_contexts.csv", "sec_xbrl_facts.csv"]
+    csv_list = list(CSV_LIST)
     # print(csv_list)
     return csv_list
 
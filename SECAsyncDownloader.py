@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# concurrent downloader for filing documents
+# every document of a filing (and of several filings) is fetched at once,
+# bounded by a semaphore and paced by the shared SEC token bucket,
+# so a filing costs roughly one round trip instead of one per file
+# documents go to a plain folder, or compressed into a DocumentStore (see SECDocumentStore)
+
+import asyncio
+import collections
+import os
+import pathlib
+
+import requests
+
+import SECDocumentStore
+import SECHttpClient
+import SECMetrics
+
+# how many downloads may be in flight at once (kept under the client's pool size)
+MAX_CONCURRENCY = 8
+
+# per file outcome, status is "downloaded", "exists" or "failed"
+DownloadResult = collections.namedtuple("DownloadResult", ["fname", "url", "path", "status", "error"])
+
+
+# write next to the target and rename, so an interrupted run never leaves
+# a truncated file that the next run would treat as "Already exists"
+def _write_file(fpath, data):
+    tmp_path = fpath.with_name(fpath.name + ".part")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, fpath)
+
+
+async def _fetch_one(client, semaphore, fname, url, fpath, write=_write_file):
+    if fpath.exists():
+        print(f"Already exists: {fname}")
+        SECMetrics.incr("downloads_existing")
+        return DownloadResult(fname, url, fpath, "exists", None)
+
+    async with semaphore:
+        # take a token without blocking the event loop, then do the blocking
+        # request on a worker thread that reuses the pooled keep-alive connections
+        await asyncio.sleep(client.limiter.reserve())
+        try:
+            response = await asyncio.to_thread(client.session.get, client.resolve(url), timeout=client.timeout)
+            SECMetrics.incr("http_requests")
+            SECMetrics.incr("http_bytes", len(response.content))
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            print(f"Error downloading {fname}: {e}")
+            SECMetrics.incr("downloads_failed")
+            return DownloadResult(fname, url, fpath, "failed", e)
+
+    # compressing a large document should not hold up the other downloads
+    await asyncio.to_thread(write, fpath, response.content)
+    print(f"Downloaded: {fname}")
+    SECMetrics.incr("downloads")
+    return DownloadResult(fname, url, fpath, "downloaded", None)
+
+
+# jobs is a list of (fmap, directory) pairs, fmap maps file name -> url like get_url returns
+# directory can be a DocumentStore, the documents then go in compressed under their cik / accession
+async def download_many_async(jobs, client=None, max_concurrency=MAX_CONCURRENCY):
+    client = client or SECHttpClient.get_client()
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    tasks = []
+    for fmap, directory in jobs:
+        if isinstance(directory, SECDocumentStore.DocumentStore):
+            for fname, url in fmap.items():
+                fpath = directory.path_for_url(url)
+                tasks.append(_fetch_one(client, semaphore, fname, url, fpath, directory.write))
+            continue
+        directory = pathlib.Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for fname, url in fmap.items():
+            tasks.append(_fetch_one(client, semaphore, fname, url, directory / fname))
+
+    return await asyncio.gather(*tasks)
+
+
+async def download_all_async(fmap, directory, client=None, max_concurrency=MAX_CONCURRENCY):
+    return await download_many_async([(fmap, directory)], client=client, max_concurrency=max_concurrency)
+
+
+# sync entry points for the scripts
+def download_many(jobs, client=None, max_concurrency=MAX_CONCURRENCY):
+    return asyncio.run(download_many_async(jobs, client=client, max_concurrency=max_concurrency))
+
+
+def download_all(fmap, directory, client=None, max_concurrency=MAX_CONCURRENCY):
+    return download_many([(fmap, directory)], client=client, max_concurrency=max_concurrency)
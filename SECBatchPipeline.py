@@ -0,0 +1,403 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# batch mode for the scraping scripts: many tickers, one date range, no prompts
+# network work (ticker lookup, filing search, downloads) runs on a thread pool,
+# parsing runs on a process pool, and each ticker gets its own output folder
+# run as AllDataUserToolScrapingParsingSEC.py --tickers AAPL MSFT --start 2022-01-01 --end 2024-12-31
+# offline AllDataUserToolScrapingParsingSEC.py --tickers AAPL MSFT --bulk-dir bulk (submissions.zip, companyfacts.zip)
+# or     ScrapingSECTablesHTML.py --tickers-file sp500.txt --keyword revenue --start 2023-01-01
+
+import atexit
+import concurrent.futures
+import io
+import json
+import multiprocessing
+import os
+import pathlib
+import time
+
+import AllDataUserToolScrapingParsingSEC
+import ScrapingSECTablesHTML
+import SECAsyncDownloader
+import SECBulkArchives
+import SECDocumentStore
+import SECFilingLocator
+import SECMetrics
+import SECTableWriter
+import SECTickerResolver
+import XBRLColumnarWriter
+
+# default pool sizes, downloads are paced by the SEC token bucket anyway
+IO_WORKERS = 8
+CPU_PROCESSES = os.cpu_count() or 2
+
+# downloaded documents are kept compressed per CIK / accession and reused by later runs,
+# in out_dir/documents unless a shared store folder is given (see SECDocumentStore)
+DOCS_FOLDER = "documents"
+
+SUMMARY_FILE = "batch_summary.json"
+
+# columnar tables of every filing share one partitioned root, so they can be read as one dataset
+COLUMNAR_FOLDER = "columnar"
+
+
+# tickers from the command line and / or a file (one per line, commas and # comments allowed)
+def read_tickers(tickers=None, tickers_file=None) -> list:
+    raw = list(tickers or [])
+    if tickers_file:
+        with open(tickers_file, encoding="utf-8") as fh:
+            for line in fh:
+                line = line.split("#", 1)[0]
+                raw.extend(line.replace(",", " ").split())
+    seen = set()
+    result = []
+    for ticker in raw:
+        ticker = ticker.strip().upper()
+        if ticker and ticker not in seen:
+            seen.add(ticker)
+            result.append(ticker)
+    return result
+
+
+# spawn, not fork: the parent has live threads and pooled sockets by the time parsing starts
+def _process_pool(processes):
+    return concurrent.futures.ProcessPoolExecutor(
+        max_workers=processes or CPU_PROCESSES,
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+
+
+def _write_summary(out_dir, summary):
+    # run totals from every thread and worker process (see SECMetrics)
+    metrics = SECMetrics.get_metrics()
+    summary["metrics"] = {"run_id": metrics.run_id, "counters": dict(metrics.totals()), "stages": metrics.stage_totals()}
+    out_dir.mkdir(parents=True, exist_ok=True)
+    with open(out_dir / SUMMARY_FILE, "w", encoding="utf-8") as fh:
+        json.dump(summary, fh, indent=2)
+    print(f"Batch finished in {summary['seconds']:.1f}s: "
+          f"{len(summary['succeeded'])} succeeded, {len(summary['failed'])} failed "
+          f"(see {out_dir / SUMMARY_FILE})")
+
+
+# XBRL: I/O half, runs on a thread
+def _fetch_xbrl_ticker(ticker, store, start, end, forms):
+    with SECMetrics.filing(ticker), SECMetrics.stage("locate"):
+        cik = SECTickerResolver.get_cik_from_ticker(ticker)
+        # without a range only the latest filing is wanted, like the single ticker mode
+        first = not (start or end)
+        matches = SECFilingLocator.locate(cik, forms=forms, start=start, end=end, first=first, inline=True)
+
+    jobs = []
+    for filing, fmap in matches:
+        with SECMetrics.filing(ticker, filing.accession), SECMetrics.stage("download"):
+            results = SECAsyncDownloader.download_all(fmap, store)
+        # the _htm.xml instance, or the inline XBRL primary document standing in for it
+        instance = ([r for r in results if r.fname.endswith("_htm.xml")]
+                    or [r for r in results if r.fname == filing.primary_document])
+        if any(r.status == "failed" for r in instance):
+            raise RuntimeError(f"instance document download failed for {filing.accession}")
+        jobs.append((filing, AllDataUserToolScrapingParsingSEC.find_xml_files(fmap, store)))
+    return jobs
+
+
+# XBRL: CPU half, runs in a worker process
+# the process is reused for other filings, so its metrics are drained into the result every time,
+# a job that fails returns {"error": ..., "metrics": ...} so its counters stay with its filing
+# check=True also checks the calculation linkbase totals, the count lands in the batch summary
+# statements (an export format) also writes the filing's primary statements next to its csv files
+def _parse_xbrl_job(xml_files, out_dir, columnar=None, columnar_dir=None, partition=None, parse_cache=None,
+                    check=False, statements=None):
+    partition = partition or {}
+    counts = {}
+    try:
+        with SECMetrics.filing(partition.get("ticker"), partition.get("accession")):
+            storage_list, storage_values = AllDataUserToolScrapingParsingSEC.parse_filing(
+                xml_files, out_dir, columnar=columnar, columnar_dir=columnar_dir, partition=partition,
+                parse_cache=parse_cache,
+            )
+            if check:
+                counts["inconsistent_calculations"] = AllDataUserToolScrapingParsingSEC.check_calculations(
+                    xml_files, storage_values, out_dir
+                )
+            if statements:
+                output_file = pathlib.Path(out_dir) / AllDataUserToolScrapingParsingSEC.STATEMENTS_FILE
+                counts["statements"] = sorted(AllDataUserToolScrapingParsingSEC.write_statements(
+                    xml_files, storage_values, output_file, statements
+                ))
+        result = {
+            "facts": len(storage_values.get("_facts_list", [])),
+            "unmapped_facts": len(storage_values.get("_unmapped_facts", [])),
+            **counts,
+        }
+    except Exception as e:
+        result = {"error": str(e)}
+    result["metrics"] = SECMetrics.get_metrics().drain()
+    return result
+
+
+def run_xbrl_batch(tickers, out_dir, start=None, end=None, forms=("10-K",), workers=None, processes=None,
+                   columnar=None, columnar_dir=None, parse_cache=None, store_dir=None, store_codec=None, check=False,
+                   statements=None):
+    started = time.perf_counter()
+    out_dir = pathlib.Path(out_dir)
+    store = SECDocumentStore.DocumentStore(store_dir or out_dir / DOCS_FOLDER, store_codec)
+    columnar_dir = str(columnar_dir or out_dir / COLUMNAR_FOLDER)
+    succeeded = []
+    failed = []
+
+    with _process_pool(processes) as cpu_pool, \
+            concurrent.futures.ThreadPoolExecutor(max_workers=workers or IO_WORKERS) as io_pool:
+        fetches = {
+            io_pool.submit(_fetch_xbrl_ticker, ticker, store, start, end, forms): ticker
+            for ticker in tickers
+        }
+        parses = {}
+        # hand each ticker to the parsers as soon as its downloads land
+        for future in concurrent.futures.as_completed(fetches):
+            ticker = fetches[future]
+            try:
+                jobs = future.result()
+            except Exception as e:
+                failed.append({"ticker": ticker, "stage": "fetch", "error": str(e)})
+                continue
+            if not jobs:
+                failed.append({"ticker": ticker, "stage": "fetch", "error": "no matching filing"})
+                continue
+            for filing, xml_files in jobs:
+                dest = out_dir / ticker / filing.accession
+                partition = {"ticker": ticker, "accession": filing.accession, "form": filing.form}
+                job = cpu_pool.submit(_parse_xbrl_job, xml_files, str(dest), columnar, columnar_dir, partition,
+                                      parse_cache, check, statements)
+                parses[job] = (ticker, filing, dest)
+
+        for future in concurrent.futures.as_completed(parses):
+            ticker, filing, dest = parses[future]
+            try:
+                counts = future.result()
+            except Exception as e:
+                counts = {"error": str(e)}
+            SECMetrics.get_metrics().merge(counts.pop("metrics", None))
+            if "error" in counts:
+                failed.append({"ticker": ticker, "accession": filing.accession, "stage": "parse", "error": counts["error"]})
+                continue
+            succeeded.append({
+                "ticker": ticker, "form": filing.form, "accession": filing.accession,
+                "report_date": filing.report_date, "output": str(dest), **counts,
+            })
+
+    summary = {"succeeded": succeeded, "failed": failed, "seconds": time.perf_counter() - started}
+    _write_summary(out_dir, summary)
+    return summary
+
+
+# bulk archives a worker process has open, by folder: the zips and the ticker index are opened
+# by the first ticker the worker gets and reused by the next ones, closed when the worker exits
+_bulk_sources = {}
+
+
+def _bulk_source(bulk_dir) -> SECBulkArchives.BulkSource:
+    source = _bulk_sources.get(str(bulk_dir))
+    if source is None:
+        if not _bulk_sources:
+            atexit.register(_close_bulk_sources)
+        source = _bulk_sources[str(bulk_dir)] = SECBulkArchives.BulkSource(bulk_dir)
+    return source
+
+
+def _close_bulk_sources():
+    while _bulk_sources:
+        _bulk_sources.popitem()[1].close()
+
+
+# bulk archives: one process per ticker, everything read from the local zips
+# metrics go back with the result, or with {"error": ...} when the ticker failed
+def _bulk_ticker_job(ticker, bulk_dir, out_dir, start, end, forms, columnar=None, columnar_dir=None):
+    try:
+        outcome = {"filings": _bulk_ticker_filings(ticker, bulk_dir, out_dir, start, end, forms, columnar, columnar_dir)}
+    except Exception as e:
+        outcome = {"error": str(e)}
+    outcome["metrics"] = SECMetrics.get_metrics().drain()
+    return outcome
+
+
+def _bulk_ticker_filings(ticker, bulk_dir, out_dir, start, end, forms, columnar=None, columnar_dir=None):
+    source = _bulk_source(bulk_dir)
+    with SECMetrics.filing(ticker), SECMetrics.stage("bulk_read"):
+        cik = source.cik(ticker)
+        # without a range only the latest filing is wanted, like the online mode
+        filings = source.filings(cik, forms=forms, start=start, end=end)
+        filings = [f for f in filings if f.is_xbrl != 0]
+        if not (start or end):
+            filings = filings[:1]
+        company_facts = source.company_facts(cik) if filings else {}
+
+    results = []
+    for filing in filings:
+        with SECMetrics.filing(ticker, filing.accession):
+            with SECMetrics.stage("bulk_facts"):
+                storage_values, _ = SECBulkArchives.facts_to_storage(company_facts, accession=filing.accession)
+            dest = pathlib.Path(out_dir) / ticker / filing.accession
+            with SECMetrics.stage("write_csv"):
+                AllDataUserToolScrapingParsingSEC.write_csv([], storage_values, dest)
+            if columnar:
+                with SECMetrics.stage("write_columnar"):
+                    XBRLColumnarWriter.write_columnar(
+                        [], storage_values, columnar_dir, ticker=ticker, accession=filing.accession,
+                        form=filing.form, fmt=columnar,
+                    )
+        results.append({
+            "ticker": ticker, "form": filing.form, "accession": filing.accession,
+            "report_date": filing.report_date, "output": str(dest),
+            "facts": len(storage_values["_facts_list"]),
+        })
+    return results
+
+
+def run_bulk_batch(tickers, bulk_dir, out_dir, start=None, end=None, forms=("10-K",), processes=None,
+                   columnar=None, columnar_dir=None):
+    started = time.perf_counter()
+    out_dir = pathlib.Path(out_dir)
+    columnar_dir = str(columnar_dir or out_dir / COLUMNAR_FOLDER)
+    succeeded = []
+    failed = []
+
+    # build the ticker index once up front instead of in every worker
+    source = SECBulkArchives.BulkSource(bulk_dir)
+    source.resolver()
+    source.close()
+
+    with _process_pool(processes) as cpu_pool:
+        jobs = {
+            cpu_pool.submit(_bulk_ticker_job, ticker, str(bulk_dir), str(out_dir), start, end, forms,
+                            columnar, columnar_dir): ticker
+            for ticker in tickers
+        }
+        for future in concurrent.futures.as_completed(jobs):
+            ticker = jobs[future]
+            try:
+                outcome = future.result()
+            except Exception as e:
+                outcome = {"error": str(e)}
+            SECMetrics.get_metrics().merge(outcome.pop("metrics", None))
+            if "error" in outcome:
+                failed.append({"ticker": ticker, "stage": "bulk", "error": outcome["error"]})
+                continue
+            results = outcome["filings"]
+            if not results:
+                failed.append({"ticker": ticker, "stage": "bulk", "error": "no matching filing"})
+                continue
+            succeeded.extend(results)
+
+    summary = {"succeeded": succeeded, "failed": failed, "seconds": time.perf_counter() - started}
+    _write_summary(out_dir, summary)
+    return summary
+
+
+# tables: I/O half, runs on a thread
+def _fetch_tables_ticker(ticker, store, start, end, year):
+    with SECMetrics.filing(ticker), SECMetrics.stage("locate"):
+        cik = SECTickerResolver.get_cik_from_ticker(ticker)
+        data = SECFilingLocator.load_submissions(cik)
+        filings = SECFilingLocator.filter_filings(
+            SECFilingLocator.recent_filings(data), forms="10-K", year=year, start=start, end=end,
+            date_field="filing_date",
+        )
+    if not (start or end or year):
+        filings = filings[:1]
+
+    jobs = []
+    for filing in filings:
+        url = f"{SECFilingLocator.filing_base_url(cik, filing.accession)}{filing.primary_document}"
+        with SECMetrics.filing(ticker, filing.accession), SECMetrics.stage("download"):
+            result = SECAsyncDownloader.download_all({filing.primary_document: url}, store)[0]
+        if result.status == "failed":
+            raise RuntimeError(f"10-K download failed for {filing.accession}: {result.error}")
+        jobs.append((filing, result.path))
+    return jobs
+
+
+# tables: CPU half, runs in a worker process
+# facts=True also pulls the inline XBRL facts out of the same downloaded document
+# keywords: one workbook per keyword from a single parse (see extract_keywords_to_excel)
+# the lxml engine reads the stored document through the decompressing stream, the others need it whole
+# the stored html is handed over as bytes like the single ticker run reads it from the store,
+# the parsers take the charset from the document (windows-1252 / latin-1 filings included)
+def _parse_tables_job(html_path, keywords, output_file, facts=False, ticker=None, accession=None, engine="lxml",
+                      regex=False, export_format="xlsx", values=False, max_tables=None):
+    try:
+        with SECMetrics.filing(ticker, accession):
+            if engine == "lxml" and not facts:
+                with SECDocumentStore.open_document(html_path) as fh:
+                    saved = ScrapingSECTablesHTML.extract_keywords_to_excel(
+                        fh, keywords, output_file, engine, regex, export_format, values, max_tables
+                    )
+            else:
+                raw = SECDocumentStore.read_document(html_path)
+                saved = ScrapingSECTablesHTML.extract_keywords_to_excel(
+                    io.BytesIO(raw), keywords, output_file, engine, regex, export_format, values, max_tables
+                )
+            counts = {"tables": sum(saved.values()), "keywords": saved}
+            if facts:
+                facts_dir = str(pathlib.Path(output_file).with_suffix("")) + "_facts"
+                counts["facts"] = ScrapingSECTablesHTML.extract_inline_facts(raw, facts_dir)
+    except Exception as e:
+        # drained like a finished job, the worker's next filing starts from zero
+        counts = {"error": str(e)}
+    counts["metrics"] = SECMetrics.get_metrics().drain()
+    return counts
+
+
+def run_tables_batch(tickers, keywords, out_dir, start=None, end=None, year=None, workers=None, processes=None,
+                     facts=False, engine="lxml", regex=False, export_format="xlsx", values=False, store_dir=None,
+                     store_codec=None, max_tables=None):
+    started = time.perf_counter()
+    if isinstance(keywords, str):
+        keywords = [keywords]
+    out_dir = pathlib.Path(out_dir)
+    store = SECDocumentStore.DocumentStore(store_dir or out_dir / DOCS_FOLDER, store_codec)
+    succeeded = []
+    failed = []
+
+    with _process_pool(processes) as cpu_pool, \
+            concurrent.futures.ThreadPoolExecutor(max_workers=workers or IO_WORKERS) as io_pool:
+        fetches = {
+            io_pool.submit(_fetch_tables_ticker, ticker, store, start, end, year): ticker
+            for ticker in tickers
+        }
+        parses = {}
+        for future in concurrent.futures.as_completed(fetches):
+            ticker = fetches[future]
+            try:
+                jobs = future.result()
+            except Exception as e:
+                failed.append({"ticker": ticker, "stage": "fetch", "error": str(e)})
+                continue
+            if not jobs:
+                failed.append({"ticker": ticker, "stage": "fetch", "error": "no matching 10-K"})
+                continue
+            for filing, html_path in jobs:
+                output_file = out_dir / ticker / f"{ticker}_{filing.filing_date}_tables.xlsx"
+                job = cpu_pool.submit(_parse_tables_job, str(html_path), keywords, str(output_file), facts,
+                                      ticker, filing.accession, engine, regex, export_format, values,
+                                      max_tables)
+                parses[job] = (ticker, filing, output_file)
+
+        for future in concurrent.futures.as_completed(parses):
+            ticker, filing, output_file = parses[future]
+            try:
+                counts = future.result()
+            except Exception as e:
+                counts = {"error": str(e)}
+            SECMetrics.get_metrics().merge(counts.pop("metrics", None))
+            if "error" in counts:
+                failed.append({"ticker": ticker, "accession": filing.accession, "stage": "parse", "error": counts["error"]})
+                continue
+            succeeded.append({
+                "ticker": ticker, "accession": filing.accession, "filing_date": filing.filing_date,
+                "output": str(SECTableWriter.output_path(output_file, export_format)), **counts,
+            })
+
+    summary = {"succeeded": succeeded, "failed": failed, "seconds": time.perf_counter() - started}
+    _write_summary(out_dir, summary)
+    return summary
@@ -0,0 +1,221 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# end to end benchmark against the local SEC stand-in (SECFixtureServer), no network needed
+# every stage of the workflows is timed on its own, repeated, and compared with a saved baseline
+# so a throughput regression fails the run (exit code 1) before it is deployed
+# run as SECBenchmark.py                               (generated fixtures, compare with bench_baseline.json)
+#     or SECBenchmark.py --save-baseline               (record the current timings as the baseline)
+#     or SECBenchmark.py --fixtures sec_fixtures --ticker AAPL --year 2023   (recorded fixtures)
+
+import argparse
+import json
+import pathlib
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+
+import AllDataUserToolScrapingParsingSEC
+import ScrapingSECTablesHTML
+import SECAsyncDownloader
+import SECFixtureServer
+import SECHttpClient
+import SECResponseCache
+import SECTickerResolver
+
+BASELINE_FILE = "bench_baseline.json"
+
+# a stage fails when its median is this much slower than the baseline median
+DEFAULT_TOLERANCE = 0.25
+
+# timings under this are mostly noise, they are reported but never fail the run
+MIN_CHECKED_SECONDS = 0.005
+
+# the fixture server is local, so the SEC rate limit would only measure the token bucket
+BENCH_RATE = 10_000
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the SEC scraping stages against local fixtures")
+    parser.add_argument("--fixtures", help="Recorded fixture folder (default: generate one)", default=None)
+    parser.add_argument("--ticker", help="Ticker in the fixtures", default=SECFixtureServer.FIXTURE_TICKER)
+    parser.add_argument("--year", help="Report year of the XBRL filing in the fixtures", default=None)
+    parser.add_argument("--filing-year", help="Filing year of the 10-K for the table stages", default=None)
+    parser.add_argument("--keyword", help="Table keyword", default="revenue")
+    parser.add_argument("--repeat", type=int, help="Runs per stage", default=5)
+    parser.add_argument("--groups", type=int, help="Generated statement sections", default=50)
+    parser.add_argument("--items", type=int, help="Generated items per section", default=8)
+    parser.add_argument("--tables", type=int, help="Generated 10-K tables", default=40)
+    parser.add_argument("--rows", type=int, help="Rows per generated table", default=25)
+    parser.add_argument("--baseline", help="Baseline timings file", default=BASELINE_FILE)
+    parser.add_argument("--tolerance", type=float, help="Allowed slowdown vs baseline (0.25 = 25%%)", default=DEFAULT_TOLERANCE)
+    parser.add_argument("--save-baseline", action="store_true", help="Write this run's timings as the baseline")
+    parser.add_argument("--output", help="Write the full results as json", default=None)
+    args, _ = parser.parse_known_args()
+    return args
+
+
+class StageTimer:
+
+    def __init__(self, repeat):
+        self.repeat = repeat
+        self.results = {}
+
+    # setup runs untimed before every repeat, its result is passed to fn
+    # units / unit describe the work done per run, for the throughput column
+    def run(self, name, fn, setup=None, units=None, unit=None):
+        walls = []
+        cpus = []
+        result = None
+        for _ in range(self.repeat):
+            arg = setup() if setup else None
+            wall = time.perf_counter()
+            cpu = time.process_time()
+            result = fn(arg) if setup else fn()
+            cpus.append(time.process_time() - cpu)
+            walls.append(time.perf_counter() - wall)
+
+        median = statistics.median(walls)
+        entry = {
+            "seconds": median,
+            "min_seconds": min(walls),
+            "cpu_seconds": statistics.median(cpus),
+            "runs": self.repeat,
+        }
+        if units:
+            entry["units"] = units
+            entry["unit"] = unit
+            entry["per_second"] = units / median if median else None
+        self.results[name] = entry
+        rate = f"  {entry['per_second']:,.0f} {unit}/s" if units else ""
+        print(f"{name:<20} {median * 1000:9.1f} ms  (min {min(walls) * 1000:.1f} ms, cpu {entry['cpu_seconds'] * 1000:.1f} ms){rate}")
+        return result
+
+
+# stages slower than baseline * (1 + tolerance), as printable lines
+def compare(results, baseline, tolerance):
+    failures = []
+    for name, entry in results.items():
+        base = baseline.get(name, {}).get("seconds")
+        if base is None or max(base, entry["seconds"]) < MIN_CHECKED_SECONDS:
+            continue
+        limit = base * (1 + tolerance)
+        if entry["seconds"] > limit:
+            failures.append(f"{name}: {entry['seconds'] * 1000:.1f} ms > {limit * 1000:.1f} ms "
+                            f"(baseline {base * 1000:.1f} ms +{tolerance:.0%})")
+    return failures
+
+
+def run_benchmarks(args, fixtures, work_dir):
+    AllData = AllDataUserToolScrapingParsingSEC
+    timer = StageTimer(args.repeat)
+
+    with SECFixtureServer.FixtureServer(fixtures) as server:
+        client = SECHttpClient.configure(rate=BENCH_RATE, mirror=server.url)
+
+        # every repeat starts cold: new resolver / response cache folders
+        counter = iter(range(1_000_000))
+
+        def fresh_dir(name):
+            path = work_dir / f"{name}_{next(counter)}"
+            path.mkdir(parents=True)
+            return path
+
+        def cold_resolver():
+            SECTickerResolver.configure(cache_dir=fresh_dir("tickers"), session=client)
+
+        cik = timer.run("resolve_ticker", lambda _: SECTickerResolver.get_cik_from_ticker(args.ticker), setup=cold_resolver)
+
+        def cold_cache():
+            SECResponseCache.configure(cache_dir=fresh_dir("http"), client=client)
+
+        fmap = timer.run("get_url", lambda _: AllData.get_url(cik, args.ticker, args.year), setup=cold_cache)
+
+        fmap_bytes = sum(SECFixtureServer.url_to_path(fixtures, url).stat().st_size for url in fmap.values())
+        def download(directory):
+            SECAsyncDownloader.download_all(fmap, directory)
+            return directory
+
+        docs_dir = timer.run("download", download, setup=lambda: fresh_dir("docs"), units=fmap_bytes / 1e6, unit="MB")
+
+        xml_files = AllData.find_xml_files(fmap, docs_dir)
+        files_list = AllData.build_files_list(xml_files)
+        storage_list, storage_values, storage_gaap = timer.run(
+            "parse_linkbases", lambda: AllData.parse_linkbases(files_list, AllData.parse),
+        )
+
+        # parse_instance_doc fills the linkbase results in place, so each run gets new ones
+        def instance(storage):
+            storage_list, storage_values, storage_gaap = storage
+            AllData.parse_instance_doc(xml_files["htm"], storage_values, storage_list, storage_gaap)
+            return storage
+
+        storage_list, storage_values, storage_gaap = timer.run(
+            "parse_instance_doc", instance, setup=lambda: AllData.parse_linkbases(files_list, AllData.parse),
+        )
+        facts = len(storage_values.get("_facts_list", []))
+        entry = timer.results["parse_instance_doc"]
+        entry.update(units=facts, unit="facts", per_second=facts / entry["seconds"])
+
+        timer.run("write_csv", lambda d: AllData.write_csv(storage_list, storage_values, d),
+                  setup=lambda: fresh_dir("csv"), units=facts, unit="facts")
+
+        # 10-K tables: found the way ScrapingSECTablesHTML does (by filing year)
+        response = client.get(ScrapingSECTablesHTML.get_10k_url(args.ticker, args.filing_year or args.year))
+        response.raise_for_status()
+        html = response.text
+
+        target_tables = timer.run("find_tables", lambda: ScrapingSECTablesHTML.find_target_tables(html, args.keyword))
+        frames = timer.run("extract_table", lambda: [ScrapingSECTablesHTML.extract_table(t) for t in target_tables],
+                           units=len(target_tables), unit="tables")
+        kept = sum(1 for f in frames if f is not None)
+        if kept:
+            timer.run("excel_export", lambda d: ScrapingSECTablesHTML.save_tables(target_tables, d / "tables.xlsx"),
+                      setup=lambda: fresh_dir("xlsx"), units=kept, unit="tables")
+
+        print(f"fixture server: {server.requests} requests, {server.bytes_sent / 1e6:.1f} MB")
+    return timer.results
+
+
+def main():
+    args = parse_args()
+    work_dir = pathlib.Path(tempfile.mkdtemp(prefix="sec_bench_"))
+    try:
+        fixtures = args.fixtures
+        if fixtures is None:
+            fixtures = work_dir / "fixtures"
+            info = SECFixtureServer.build_fixtures(
+                fixtures, groups=args.groups, items=args.items, tables=args.tables, rows=args.rows)
+            args.ticker = info["ticker"]
+            args.year = args.year or info["year"]
+            args.filing_year = args.filing_year or info["filing_year"]
+            print(f"Generated fixtures: {info['facts']} facts, {info['tables']} tables")
+
+        results = run_benchmarks(args, pathlib.Path(fixtures), work_dir)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.output:
+        pathlib.Path(args.output).write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+    baseline_path = pathlib.Path(args.baseline)
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"Baseline saved to {baseline_path}")
+        return 0
+    if not baseline_path.exists():
+        print(f"No baseline at {baseline_path}, run with --save-baseline to create one")
+        return 0
+
+    failures = compare(results, json.loads(baseline_path.read_text(encoding="utf-8")), args.tolerance)
+    for line in failures:
+        print(f"REGRESSION {line}")
+    if not failures:
+        print("All stages within the baseline thresholds")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
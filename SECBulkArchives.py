@@ -0,0 +1,212 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# offline ingestion from the SEC nightly bulk archives kept on local disk
+#   submissions.zip   -> the same submissions json get_url / SECFilingLocator fetch per company
+#   companyfacts.zip  -> every XBRL fact a company has filed, per concept / unit
+# members are read one at a time straight out of the zip, nothing is extracted,
+# so a whole-market refresh is a local I/O job and needs no network at all
+# archives: https://www.sec.gov/Archives/edgar/daily-index/bulkdata/submissions.zip
+#           https://www.sec.gov/Archives/edgar/daily-index/xbrl/companyfacts.zip
+
+import json
+import os
+import pathlib
+import re
+import zipfile
+
+import SECFilingLocator
+import SECTickerResolver
+import XBRLFactStore
+
+SUBMISSIONS_ZIP = "submissions.zip"
+COMPANYFACTS_ZIP = "companyfacts.zip"
+
+# one member per company, older filings of big filers spill into CIK##########-submissions-001.json ...
+MEMBER_NAME = re.compile(r"^CIK(\d{10})\.json$")
+
+# ticker index built from submissions.zip, same layout as company_tickers_exchange.json
+TICKER_INDEX = SECTickerResolver.CACHE_FILE
+
+
+def member_name(cik) -> str:
+    return f"CIK{SECTickerResolver.normalize_cik(cik)}.json"
+
+
+class BulkArchive:
+    # read-only view of one bulk zip, opened on first use (ZipFile objects do not cross processes)
+
+    def __init__(self, path):
+        self.path = pathlib.Path(path)
+        self._zip = None
+
+    def _archive(self):
+        if self._zip is None:
+            self._zip = zipfile.ZipFile(self.path)
+        return self._zip
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    # company members only (no paged submissions files)
+    def names(self):
+        for name in self._archive().namelist():
+            if MEMBER_NAME.match(name):
+                yield name
+
+    # decompresses just this member, None when the archive does not have it
+    def read(self, name):
+        try:
+            with self._archive().open(name) as fh:
+                return json.load(fh)
+        except KeyError:
+            return None
+
+    def read_cik(self, cik):
+        return self.read(member_name(cik))
+
+    # (cik, json) for every company, one member in memory at a time
+    def __iter__(self):
+        for name in self.names():
+            yield MEMBER_NAME.match(name).group(1), self.read(name)
+
+    def close(self):
+        if self._zip is not None:
+            self._zip.close()
+            self._zip = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class BulkSource:
+    # submissions.zip + companyfacts.zip in one folder, the offline stand-in for data.sec.gov
+
+    def __init__(self, bulk_dir):
+        self.bulk_dir = pathlib.Path(bulk_dir)
+        self.submissions = BulkArchive(self.bulk_dir / SUBMISSIONS_ZIP)
+        self.companyfacts = BulkArchive(self.bulk_dir / COMPANYFACTS_ZIP)
+        self._resolver = None
+
+    # ticker -> CIK without the network: the index is built from submissions.zip once
+    # and kept next to the archives, in the format TickerResolver already reads
+    def resolver(self) -> SECTickerResolver.TickerResolver:
+        if self._resolver is None:
+            index_path = self.bulk_dir / TICKER_INDEX
+            archive_mtime = self.submissions.path.stat().st_mtime if self.submissions.exists() else 0
+            if not index_path.exists() or index_path.stat().st_mtime < archive_mtime:
+                self.build_ticker_index(index_path)
+            # ttl=None: the index file is always "fresh", so load() never goes to the network
+            self._resolver = SECTickerResolver.TickerResolver(cache_dir=self.bulk_dir, ttl=None).load()
+        return self._resolver
+
+    def build_ticker_index(self, index_path):
+        rows = []
+        for cik, data in self.submissions:
+            exchanges = data.get("exchanges") or []
+            for i, ticker in enumerate(data.get("tickers") or []):
+                exchange = exchanges[i] if i < len(exchanges) else None
+                rows.append([int(cik), data.get("name"), ticker, exchange])
+        payload = {"fields": ["cik", "name", "ticker", "exchange"], "data": rows}
+        tmp_path = pathlib.Path(index_path).with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(payload), encoding="utf-8")
+        os.replace(tmp_path, index_path)
+        return payload
+
+    def cik(self, ticker) -> str:
+        return self.resolver().cik(ticker)
+
+    # same dict as SECFilingLocator.load_submissions, with the paged older filings
+    # appended to the "recent" arrays so date ranges reach back past the last ~1000 filings
+    def load_submissions(self, cik) -> dict:
+        data = self.submissions.read_cik(cik)
+        if data is None:
+            raise ValueError(f"CIK {cik} not found in {self.submissions.path}")
+        recent = data.get("filings", {}).get("recent", {})
+        for page in data.get("filings", {}).get("files", []):
+            older = self.submissions.read(page.get("name", ""))
+            if not older:
+                continue
+            for key, values in older.items():
+                if isinstance(values, list) and isinstance(recent.get(key), list):
+                    recent[key].extend(values)
+        return data
+
+    def filings(self, cik, forms=None, year=None, start=None, end=None, date_field="report_date") -> list:
+        return SECFilingLocator.filter_filings(
+            SECFilingLocator.recent_filings(self.load_submissions(cik)),
+            forms=forms, year=year, start=start, end=end, date_field=date_field,
+        )
+
+    def company_facts(self, cik) -> dict:
+        data = self.companyfacts.read_cik(cik)
+        if data is None:
+            raise ValueError(f"CIK {cik} not found in {self.companyfacts.path}")
+        return data
+
+    def close(self):
+        self.submissions.close()
+        self.companyfacts.close()
+
+
+# companyfacts has no context ids, one is made per period so facts can point at _contexts like before
+def _context_id(start, end):
+    return f"D{start}_{end}" if start else f"I{end}"
+
+
+# companyfacts json -> (storage_values, storage_gaap) laid out like parse_instance_doc leaves them:
+# _contexts, _units, _facts_list (FactStore), per concept "facts" rows, plus the concept label
+# accession / forms keep only the facts reported in those filings (one filing = one instance document)
+def facts_to_storage(data, accession=None, forms=None):
+    if isinstance(forms, str):
+        forms = [forms]
+    entity = SECTickerResolver.normalize_cik(data.get("cik", 0))
+    storage_facts = XBRLFactStore.FactStore()
+    storage_values = {"_contexts": {}, "_units": {}}
+    storage_gaap = {}
+    contexts = storage_values["_contexts"]
+    units = storage_values["_units"]
+
+    for taxonomy, concepts in data.get("facts", {}).items():
+        for concept, body in concepts.items():
+            gaap_id = f"{taxonomy};{concept}"
+            master_key = f"{taxonomy}_{concept}"
+            fact_rows = None
+            for unit, rows in body.get("units", {}).items():
+                for row in rows:
+                    if accession and row.get("accn") != accession:
+                        continue
+                    if forms and not any(str(row.get("form", "")).startswith(f) for f in forms):
+                        continue
+                    ctx = _context_id(row.get("start"), row.get("end"))
+                    if ctx not in contexts:
+                        contexts[ctx] = {
+                            "entity_identifier": entity,
+                            "period_start": row.get("start"),
+                            "period_end": row.get("end") if row.get("start") else None,
+                            "instant": None if row.get("start") else row.get("end"),
+                        }
+                    if unit not in units:
+                        units[unit] = {"measures": unit.split("/")}
+                    val = row.get("val")
+                    if fact_rows is None:
+                        fact_rows = XBRLFactStore.FactRows(storage_facts)
+                    fact_rows.append(storage_facts.append(
+                        concept, taxonomy, gaap_id, ctx, unit, None, None if val is None else str(val)
+                    ))
+            if fact_rows is None:
+                continue
+            storage_gaap[gaap_id] = {"id": gaap_id, "master_id": master_key}
+            storage_values[master_key] = {
+                "us_gaap_id": gaap_id,
+                "label": body.get("label"),
+                "description": body.get("description"),
+                "facts": fact_rows,
+            }
+
+    storage_facts.normalize_numeric()
+    storage_values["_facts_list"] = storage_facts
+    return storage_values, storage_gaap
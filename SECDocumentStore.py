@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# compressed on disk store for filing documents (10-K html, instance and linkbase xml)
+# documents sit under <store>/<cik>/<accession>/<document>.zst (or .gz without zstandard),
+# an address EDGAR never reuses for other content once a filing is published,
+# and are read back through decompressing streams, nothing is ever inflated on disk
+# SEC html / xml compresses 8-15x, so a corpus that did not fit uncompressed does now
+# plain files (older download folders) are read as they are
+
+import gzip
+import os
+import pathlib
+import re
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+import SECMetrics
+
+# shared cache root with the HTTP, table index and parse caches
+STORE_DIR = pathlib.Path.cwd().joinpath("folder_to_store_sec_cache", "documents")
+
+# codec -> file suffix, zstd when zstandard is installed
+CODECS = {"zstd": ".zst", "gzip": ".gz"}
+DEFAULT_CODEC = "zstd" if zstandard is not None else "gzip"
+
+# zstd 10 is close to gzip 9 ratios on SEC markup at several times the speed
+ZSTD_LEVEL = 10
+GZIP_LEVEL = 6
+
+# .../Archives/edgar/data/<cik>/<accession>/<document>
+ARCHIVE_URL = re.compile(r"/data/(\d+)/(\d{18})/([^/?#]+)")
+
+
+# "AAPL-20230930.htm.zst" -> "AAPL-20230930.htm", what the parsers match suffixes on
+def document_name(path) -> str:
+    name = pathlib.Path(path).name
+    for suffix in CODECS.values():
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+
+# decompressing binary reader for a stored document, plain files are opened as they are
+def open_document(path):
+    path = pathlib.Path(path)
+    if path.suffix == CODECS["zstd"]:
+        if zstandard is None:
+            raise RuntimeError(f"{path} is zstd compressed, reading it needs zstandard (pip install zstandard)")
+        return zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+    if path.suffix == CODECS["gzip"]:
+        return gzip.open(path, "rb")
+    return open(path, "rb")
+
+
+def read_document(path) -> bytes:
+    with open_document(path) as fh:
+        return fh.read()
+
+
+class DocumentStore:
+
+    def __init__(self, store_dir=None, codec=None):
+        self.store_dir = pathlib.Path(store_dir) if store_dir else STORE_DIR
+        self.codec = codec or DEFAULT_CODEC
+        if self.codec not in CODECS:
+            raise ValueError(f"Unknown codec {self.codec}, expected one of {tuple(CODECS)}")
+        if self.codec == "zstd" and zstandard is None:
+            raise RuntimeError("zstd compression needs zstandard (pip install zstandard)")
+
+    # the stored file of a document: the existing one in whatever codec it was written,
+    # otherwise where this store's codec would put it
+    def path(self, cik, accession, document) -> pathlib.Path:
+        base = self.store_dir / str(int(cik)) / accession.replace("-", "") / document
+        for suffix in CODECS.values():
+            candidate = base.with_name(base.name + suffix)
+            if candidate.exists():
+                return candidate
+        return base.with_name(base.name + CODECS[self.codec])
+
+    def path_for_url(self, url) -> pathlib.Path:
+        match = ARCHIVE_URL.search(url)
+        if match is None:
+            raise ValueError(f"Not an EDGAR archive document url: {url}")
+        return self.path(*match.groups())
+
+    def _compressor(self, fh):
+        if self.codec == "zstd":
+            return zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(fh, closefd=False)
+        # no name or mtime in the header, the same document always compresses to the same bytes
+        return gzip.GzipFile(filename="", mode="wb", fileobj=fh, compresslevel=GZIP_LEVEL, mtime=0)
+
+    # chunks of a document written compressed to path as they pass through, the file only
+    # appears once the last chunk is through, a consumer that stops early leaves nothing behind
+    # (and closes the chunks' source, a streamed response is let go)
+    def tee(self, path, chunks):
+        path = pathlib.Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.part")
+        raw = 0
+        complete = False
+        try:
+            with open(tmp_path, "wb") as fh:
+                with self._compressor(fh) as writer:
+                    for chunk in chunks:
+                        writer.write(chunk)
+                        raw += len(chunk)
+                        yield chunk
+                complete = True
+            os.replace(tmp_path, path)
+            SECMetrics.incr("documents_stored")
+            SECMetrics.incr("document_bytes_raw", raw)
+            SECMetrics.incr("document_bytes_stored", path.stat().st_size)
+        finally:
+            if not complete:
+                tmp_path.unlink(missing_ok=True)
+                if hasattr(chunks, "close"):
+                    chunks.close()
+
+    # whole document in memory (a finished download) -> compressed file at path
+    def write(self, path, data) -> pathlib.Path:
+        for _ in self.tee(path, [data]):
+            pass
+        return pathlib.Path(path)
@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# find the filing (and its XBRL documents) for a company without walking every filing
+# the submissions arrays are filtered by form / year / date range first,
+# then only the surviving index.json candidates are probed, several at a time
+
+import collections
+import concurrent.futures
+
+import requests
+
+import SECResponseCache
+
+# get accession number from cik
+SUB_URL = "https://data.sec.gov/submissions/"
+
+BASE = "https://www.sec.gov/Archives/edgar/data/"
+
+# XBRL documents we look for in a filing folder
+XML_SUFFIXES = ["_def.xml", "_htm.xml", "_lab.xml", "_cal.xml", "_pre.xml"]
+
+# a filing only counts when it has the instance document
+REQUIRED_SUFFIX = "_htm.xml"
+
+# with inline=True a filing without one still counts when its primary document is inline XBRL
+INLINE_SUFFIXES = (".htm", ".html")
+
+# index.json requests in flight at once (the SEC token bucket still applies)
+MAX_WORKERS = 8
+
+Filing = collections.namedtuple("Filing", [
+    "form", "filing_date", "report_date", "accession", "primary_document", "is_xbrl", "is_inline_xbrl"])
+
+
+# get SEC submisson JSON using CIK
+def load_submissions(cik) -> dict:
+    json_link = f"{SUB_URL}CIK{str(cik).zfill(10)}.json"
+    resp = SECResponseCache.get(json_link)
+    resp.raise_for_status()
+    if "application/json" not in resp.headers.get("Content-Type", ""):
+        print("Unexpected content:", resp.text[:200])
+        raise RuntimeError(f"Did not receive JSON from SEC for {json_link}")
+    return resp.json()
+
+
+# turn the parallel "recent" arrays into Filing rows, newest first
+def recent_filings(data) -> list:
+    recent = data.get("filings", {}).get("recent", {})
+    forms = recent.get("form", [])
+    count = len(forms)
+
+    def column(name, default=None):
+        values = recent.get(name) or []
+        return values if len(values) == count else [default] * count
+
+    rows = [
+        Filing(form, filing_date, report_date or "", acc, doc, is_xbrl, is_inline)
+        for form, filing_date, report_date, acc, doc, is_xbrl, is_inline in zip(
+            forms,
+            column("filingDate", ""),
+            column("reportDate", ""),
+            column("accessionNumber", ""),
+            column("primaryDocument", ""),
+            column("isXBRL", None),
+            column("isInlineXBRL", None),
+        )
+    ]
+    rows.sort(key=lambda f: f.filing_date, reverse=True)
+    return rows
+
+
+# forms are matched by prefix like get_10k_url always did ("10-K" also keeps 10-K/A, 10-KT)
+# year matches the start of date_field ("2023" or "2023-09"),
+# start / end are inclusive ISO dates compared against the same field
+# reportDate is the fiscal period end, filingDate is when it reached EDGAR
+def filter_filings(filings, forms=None, year=None, start=None, end=None, date_field="report_date", xbrl_only=False):
+    if isinstance(forms, str):
+        forms = [forms]
+    year = str(year).strip() if year else None
+
+    kept = []
+    for filing in filings:
+        if forms and not any(filing.form.startswith(f) for f in forms):
+            continue
+        # fall back to the filing date when the SEC left reportDate empty
+        date = getattr(filing, date_field) or filing.filing_date
+        if year and not date.startswith(year):
+            continue
+        if start and date < start:
+            continue
+        if end and date > end:
+            continue
+        # isXBRL == 0 means there is nothing to find in the folder
+        if xbrl_only and filing.is_xbrl == 0:
+            continue
+        kept.append(filing)
+    return kept
+
+
+def filing_base_url(cik, accession) -> str:
+    return f"{BASE}{int(cik)}/{accession.replace('-', '')}/"
+
+
+# scans one filing's index.json, returns {file name: url} or None when the instance is missing
+# inline=True falls back to the primary .htm (inline XBRL) when there is no _htm.xml instance
+def probe_filing(cik, filing, suffixes=XML_SUFFIXES, inline=False):
+    base_url = filing_base_url(cik, filing.accession)
+    index_url = f"{base_url}index.json"
+    try:
+        r = SECResponseCache.get(index_url)
+        r.raise_for_status()
+        idx_data = r.json()
+    except (requests.RequestException, ValueError) as e:
+        print(f"Error fetching {index_url}: {e}")
+        return None
+
+    found_files = {}
+    for file_entry in idx_data.get("directory", {}).get("item", []):
+        name = file_entry.get("name", "")
+        if any(suffix in name for suffix in suffixes):
+            found_files[name] = base_url + name
+
+    if any(REQUIRED_SUFFIX in fname for fname in found_files):
+        return found_files
+    if inline and filing.is_inline_xbrl != 0 and filing.primary_document.lower().endswith(INLINE_SUFFIXES):
+        found_files[filing.primary_document] = base_url + filing.primary_document
+        return found_files
+    return None
+
+
+# probe candidates newest first, max_workers at a time
+# first=True stops at the newest filing that has the documents and returns [(Filing, files)]
+# first=False returns every match in newest first order
+def locate(cik, forms=None, year=None, start=None, end=None, date_field="report_date",
+           first=True, suffixes=XML_SUFFIXES, max_workers=MAX_WORKERS, data=None, inline=False):
+    if data is None:
+        data = load_submissions(cik)
+    candidates = filter_filings(
+        recent_filings(data), forms=forms, year=year, start=start, end=end,
+        date_field=date_field, xbrl_only=True,
+    )
+
+    matches = []
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as pool:
+        # work in windows so a first match near the top does not pay for the whole list
+        for i in range(0, len(candidates), max_workers):
+            window = candidates[i:i + max_workers]
+            results = pool.map(lambda filing: probe_filing(cik, filing, suffixes, inline), window)
+            for filing, files in zip(window, results):
+                if files:
+                    matches.append((filing, files))
+            if first and matches:
+                return matches[:1]
+    return matches
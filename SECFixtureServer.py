@@ -0,0 +1,344 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# local stand-in for the SEC endpoints the scripts use, for benchmarks and offline runs
+# files are served from <root>/<host>/<path>, so with SEC_MIRROR=http://127.0.0.1:8765
+#   https://www.sec.gov/files/company_tickers_exchange.json -> <root>/www.sec.gov/files/company_tickers_exchange.json
+#   https://data.sec.gov/submissions/CIK0000320193.json     -> <root>/data.sec.gov/submissions/CIK0000320193.json
+# the tree is either recorded from the SEC (record) or generated (build_fixtures)
+# run as SECFixtureServer.py --root sec_fixtures --build   (generate, then serve on port 8765)
+#     or SECFixtureServer.py --root sec_fixtures --record AAPL --year 2023
+
+import argparse
+import hashlib
+import http.server
+import json
+import mimetypes
+import pathlib
+import random
+import threading
+import urllib.parse
+
+import SECFilingLocator
+import SECHttpClient
+import SECTickerResolver
+
+DEFAULT_PORT = 8765
+
+# synthetic company used by build_fixtures
+FIXTURE_TICKER = "TEST"
+FIXTURE_CIK = "0000999999"
+FIXTURE_NAME = "Fixture Holdings Inc."
+
+LINK_NS = "http://www.xbrl.org/2003/linkbase"
+XLINK_NS = "http://www.w3.org/1999/xlink"
+TAXONOMY_XSD = "https://xbrl.fasb.org/us-gaap/2023/elts/us-gaap-2023.xsd"
+
+
+class FixtureHandler(http.server.BaseHTTPRequestHandler):
+    # ETag / If-None-Match like the SEC, so the response cache revalidation path is exercised too
+    root = None
+    protocol_version = "HTTP/1.1"
+
+    def _target(self):
+        path = urllib.parse.urlsplit(self.path).path
+        target = (self.root / urllib.parse.unquote(path).lstrip("/")).resolve()
+        if self.root not in target.parents or not target.is_file():
+            return None
+        return target
+
+    def _send(self, head_only):
+        target = self._target()
+        self.server.requests += 1
+        if target is None:
+            self.send_error(404)
+            return
+        body = target.read_bytes()
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        content_type = mimetypes.guess_type(target.name)[0] or "application/octet-stream"
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.end_headers()
+        if not head_only:
+            self.wfile.write(body)
+            self.server.bytes_sent += len(body)
+
+    def do_GET(self):
+        self._send(False)
+
+    def do_HEAD(self):
+        self._send(True)
+
+    # keep benchmark output clean
+    def log_message(self, format, *args):
+        pass
+
+
+class FixtureServer:
+    # threaded http.server on its own daemon thread: with FixtureServer(root) as server: server.url
+
+    def __init__(self, root, host="127.0.0.1", port=0):
+        handler = type("Handler", (FixtureHandler,), {"root": pathlib.Path(root).resolve()})
+        self.httpd = http.server.ThreadingHTTPServer((host, port), handler)
+        self.httpd.daemon_threads = True
+        self.httpd.requests = 0
+        self.httpd.bytes_sent = 0
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def requests(self):
+        return self.httpd.requests
+
+    @property
+    def bytes_sent(self):
+        return self.httpd.bytes_sent
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def url_to_path(root, url):
+    parts = urllib.parse.urlsplit(url)
+    return pathlib.Path(root) / parts.netloc / parts.path.lstrip("/")
+
+
+def _write(root, url, body):
+    path = url_to_path(root, url)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    path.write_bytes(body)
+    return path
+
+
+# save the live SEC responses one ticker / filing needs under root (goes through the shared client)
+def record(root, ticker, year=None, forms=("10-K",)):
+    client = SECHttpClient.get_client()
+    urls = [SECTickerResolver.TICKER_EXCHANGE_JSON, SECTickerResolver.TICKER_JSON]
+    cik = SECTickerResolver.get_cik_from_ticker(ticker)
+    urls.append(f"{SECFilingLocator.SUB_URL}CIK{cik}.json")
+
+    matches = SECFilingLocator.locate(cik, forms=list(forms), year=year, first=True, inline=True)
+    for filing, files in matches:
+        base_url = SECFilingLocator.filing_base_url(cik, filing.accession)
+        urls.append(f"{base_url}index.json")
+        urls.extend(files.values())
+        if filing.primary_document not in files:
+            urls.append(f"{base_url}{filing.primary_document}")
+
+    for url in urls:
+        response = client.get(url)
+        response.raise_for_status()
+        print(f"Recorded: {url}")
+        _write(root, url, response.content)
+    return urls
+
+
+def _loc(label):
+    return f'<link:loc xlink:type="locator" xlink:href="{TAXONOMY_XSD}#{label}" xlink:label="loc_{label}"/>'
+
+
+def _linkbase(body):
+    return (f'<?xml version="1.0" encoding="utf-8"?>\n'
+            f'<link:linkbase xmlns:link="{LINK_NS}" xmlns:xlink="{XLINK_NS}">\n{body}</link:linkbase>\n')
+
+
+# synthetic filing: groups statement sections, each a total that sums its items (so the
+# calculation linkbase holds), for two fiscal years; tables are the 10-K html tables
+def build_fixtures(root, groups=50, items=8, tables=40, rows=25, filings=3, seed=7):
+    rng = random.Random(seed)
+    root = pathlib.Path(root)
+    cik = FIXTURE_CIK
+    cik_int = int(cik)
+    prefix = FIXTURE_TICKER.lower()
+
+    # company lists
+    _write(root, SECTickerResolver.TICKER_EXCHANGE_JSON, json.dumps({
+        "fields": ["cik", "name", "ticker", "exchange"],
+        "data": [[cik_int, FIXTURE_NAME, FIXTURE_TICKER, "Nasdaq"]],
+    }))
+    _write(root, SECTickerResolver.TICKER_JSON, json.dumps({
+        "0": {"cik_str": cik_int, "ticker": FIXTURE_TICKER, "title": FIXTURE_NAME},
+    }))
+
+    # newest filing first, only the newest one has XBRL documents in its folder
+    years = [2023 - i for i in range(filings)]
+    accessions = [f"{cik}-{str(y)[2:]}-{i + 1:06d}" for i, y in enumerate(years)]
+    recent = {
+        "accessionNumber": accessions,
+        "filingDate": [f"{y + 1}-02-15" for y in years],
+        "reportDate": [f"{y}-12-31" for y in years],
+        "form": ["10-K"] * filings,
+        "primaryDocument": [f"{prefix}-{y}1231.htm" for y in years],
+        "isXBRL": [1] * filings,
+        "isInlineXBRL": [1] * filings,
+    }
+    _write(root, f"{SECFilingLocator.SUB_URL}CIK{cik}.json", json.dumps({
+        "cik": str(cik_int), "name": FIXTURE_NAME, "tickers": [FIXTURE_TICKER], "exchanges": ["Nasdaq"],
+        "filings": {"recent": recent, "files": []},
+    }))
+
+    # concepts: us-gaap_Total<g> = sum of us-gaap_Item<g>x<i>
+    sections = []
+    for g in range(groups):
+        members = [f"us-gaap_Item{g}x{i}" for i in range(items)]
+        sections.append((f"us-gaap_Total{g}", members))
+    concepts = [c for total, members in sections for c in [total] + members]
+
+    values = {}
+    for total, members in sections:
+        for period in ("cy", "py"):
+            amounts = [rng.randint(1, 9_999) * 1_000_000 for _ in members]
+            for member, amount in zip(members, amounts):
+                values[(member, period)] = amount
+            values[(total, period)] = sum(amounts)
+
+    year = years[0]
+    stem = f"{prefix}-{year}1231"
+    base_url = SECFilingLocator.filing_base_url(cik, accessions[0])
+
+    # instance document
+    facts = []
+    for concept in concepts:
+        local = concept.split("_", 1)[1]
+        for period, ctx in (("cy", "c_cy"), ("py", "c_py")):
+            facts.append(f'  <us-gaap:{local} contextRef="{ctx}" unitRef="usd" decimals="-6">{values[(concept, period)]}</us-gaap:{local}>')
+    instance = (
+        '<?xml version="1.0" encoding="utf-8"?>\n'
+        '<xbrli:xbrl xmlns:xbrli="http://www.xbrl.org/2003/instance" xmlns:us-gaap="http://fasb.org/us-gaap/2023" '
+        'xmlns:dei="http://xbrl.sec.gov/dei/2023" xmlns:iso4217="http://www.xbrl.org/2003/iso4217">\n'
+        f'  <xbrli:context id="c_cy"><xbrli:entity><xbrli:identifier scheme="http://www.sec.gov/CIK">{cik}</xbrli:identifier></xbrli:entity>'
+        f'<xbrli:period><xbrli:startDate>{year}-01-01</xbrli:startDate><xbrli:endDate>{year}-12-31</xbrli:endDate></xbrli:period></xbrli:context>\n'
+        f'  <xbrli:context id="c_py"><xbrli:entity><xbrli:identifier scheme="http://www.sec.gov/CIK">{cik}</xbrli:identifier></xbrli:entity>'
+        f'<xbrli:period><xbrli:startDate>{year - 1}-01-01</xbrli:startDate><xbrli:endDate>{year - 1}-12-31</xbrli:endDate></xbrli:period></xbrli:context>\n'
+        '  <xbrli:unit id="usd"><xbrli:measure>iso4217:USD</xbrli:measure></xbrli:unit>\n'
+        f'  <dei:DocumentType contextRef="c_cy">10-K</dei:DocumentType>\n'
+        + "\n".join(facts) + "\n</xbrli:xbrl>\n"
+    )
+
+    # label linkbase
+    labels = []
+    for concept in concepts:
+        local = concept.split("_", 1)[1]
+        labels.append(
+            f'    {_loc(concept)}\n'
+            f'    <link:label xlink:type="resource" xlink:label="lab_{concept}" xlink:role="http://www.xbrl.org/2003/role/label" xml:lang="en-US">{local}</link:label>\n'
+            f'    <link:labelArc xlink:type="arc" xlink:arcrole="http://www.xbrl.org/2003/arcrole/concept-label" xlink:from="loc_{concept}" xlink:to="lab_{concept}"/>'
+        )
+    lab = _linkbase('  <link:labelLink xlink:type="extended" xlink:role="http://www.xbrl.org/2003/role/link">\n'
+                    + "\n".join(labels) + "\n  </link:labelLink>\n")
+
+    # calculation, presentation and definition linkbases, one extended link per section
+    cal_links, pre_links, def_links = [], [], []
+    for g, (total, members) in enumerate(sections):
+        role = f"http://{prefix}.example.com/role/Statement{g}"
+        locs = "\n".join(f"    {_loc(c)}" for c in [total] + members)
+        cal_arcs = "\n".join(
+            f'    <link:calculationArc xlink:type="arc" xlink:arcrole="http://www.xbrl.org/2003/arcrole/summation-item" '
+            f'xlink:from="loc_{total}" xlink:to="loc_{m}" order="{i + 1}" weight="1"/>' for i, m in enumerate(members))
+        abstract = f"us-gaap_Statement{g}Abstract"
+        pre_arcs = "\n".join(
+            f'    <link:presentationArc xlink:type="arc" xlink:arcrole="http://www.xbrl.org/2003/arcrole/parent-child" '
+            f'xlink:from="loc_{abstract}" xlink:to="loc_{c}" order="{i + 1}"/>' for i, c in enumerate(members + [total]))
+        def_arcs = "\n".join(
+            f'    <link:definitionArc xlink:type="arc" xlink:arcrole="http://xbrl.org/int/dim/arcrole/domain-member" '
+            f'xlink:from="loc_{total}" xlink:to="loc_{m}" order="{i + 1}"/>' for i, m in enumerate(members))
+        cal_links.append(f'  <link:calculationLink xlink:type="extended" xlink:role="{role}">\n{locs}\n{cal_arcs}\n  </link:calculationLink>\n')
+        pre_links.append(f'  <link:presentationLink xlink:type="extended" xlink:role="{role}">\n    {_loc(abstract)}\n{locs}\n{pre_arcs}\n  </link:presentationLink>\n')
+        def_links.append(f'  <link:definitionLink xlink:type="extended" xlink:role="{role}">\n{locs}\n{def_arcs}\n  </link:definitionLink>\n')
+
+    # 10-K html: narrative plus financial tables, some of them mention "revenue"
+    words = ["operating", "revenue", "segment", "expenses", "income", "net", "total", "assets"]
+    parts = [f"<html><head><title>{FIXTURE_NAME} 10-K {year}</title></head><body>"]
+    for t in range(tables):
+        parts.append(f"<p>{' '.join(rng.choice(words) for _ in range(60))}</p>")
+        caption = "Revenue by segment" if t % 2 == 0 else "Operating expenses"
+        parts.append(f'<table><tr><th>{caption}</th><th>{year}</th><th>{year - 1}</th><th>Change</th></tr>')
+        for r in range(rows):
+            a, b = rng.randint(1, 99_999), rng.randint(1, 99_999)
+            parts.append(f'<tr><td>Line item {t}.{r}</td><td>$</td><td>{a:,}</td><td>({b:,})</td><td>{(a - b) / b:.1%}</td></tr>')
+        parts.append("</table>")
+    parts.append("</body></html>")
+
+    documents = {
+        f"{stem}_htm.xml": instance,
+        f"{stem}_lab.xml": lab,
+        f"{stem}_cal.xml": _linkbase("".join(cal_links)),
+        f"{stem}_pre.xml": _linkbase("".join(pre_links)),
+        f"{stem}_def.xml": _linkbase("".join(def_links)),
+        f"{stem}.htm": "".join(parts),
+    }
+    for name, body in documents.items():
+        _write(root, base_url + name, body)
+    _write(root, f"{base_url}index.json", json.dumps({
+        "directory": {"name": base_url, "item": [{"name": name, "type": "text"} for name in documents]},
+    }))
+    # older filings have an index without XBRL documents
+    for accession, y in zip(accessions[1:], years[1:]):
+        old_url = SECFilingLocator.filing_base_url(cik, accession)
+        _write(root, f"{old_url}index.json", json.dumps({
+            "directory": {"name": old_url, "item": [{"name": f"{prefix}-{y}1231.htm", "type": "text"}]},
+        }))
+
+    return {
+        "ticker": FIXTURE_TICKER, "cik": cik, "accession": accessions[0], "year": str(year),
+        "filing_year": str(year + 1),
+        "facts": len(facts) + 1, "tables": tables, "ten_k_url": base_url + f"{stem}.htm",
+    }
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Serve recorded or generated SEC fixtures locally")
+    parser.add_argument("--root", default="sec_fixtures", help="Fixture folder (<root>/<host>/<path>)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--build", action="store_true", help="Generate the synthetic fixture filing first")
+    parser.add_argument("--record", nargs="+", help="Record these tickers from the live SEC first", default=None)
+    parser.add_argument("--year", help="Filing year to record", default=None)
+    args, _ = parser.parse_known_args()
+    return args
+
+
+def main():
+    args = parse_args()
+    if args.build:
+        print(build_fixtures(args.root))
+    for ticker in args.record or []:
+        record(args.root, ticker, year=args.year)
+
+    server = FixtureServer(args.root, port=args.port)
+    print(f"Serving {args.root} at {server.url}, use {SECHttpClient.SEC_MIRROR_ENV}={server.url}")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
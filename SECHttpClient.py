@@ -0,0 +1,167 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# one shared HTTP client for every request made to the SEC
+# keeps keep-alive connection pools per host and paces requests with a token bucket
+# so we stay under the SEC fair access ceiling without fixed sleeps
+
+import os
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import SECMetrics
+
+#reusable header for sec.gov, complying with standards so website allows you to pass without seeming a bot
+HEADERS_URL = {
+    "User-Agent": "MyResearchBot/1.0 (contact: myemail@example.com)",
+    "Accept-Encoding": "gzip, deflate",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Connection": "keep-alive"}
+
+# SEC fair access policy: no more than 10 requests per second
+SEC_MAX_REQUESTS_PER_SECOND = 10
+
+# hosts we talk to, each gets its own connection pool
+SEC_HOSTS = ["https://www.sec.gov/", "https://data.sec.gov/"]
+
+# connections kept alive per host, should cover the number of concurrent downloads
+POOL_MAXSIZE = 16
+
+# point every SEC url at a local stand-in (see SECFixtureServer), e.g. SEC_MIRROR=http://127.0.0.1:8765
+# https://www.sec.gov/files/x.json is then fetched as <mirror>/www.sec.gov/files/x.json
+SEC_MIRROR_ENV = "SEC_MIRROR"
+
+# retry throttled / flaky responses with backoff instead of failing the run
+RETRY_STATUS = (429, 500, 502, 503, 504)
+RETRY_TOTAL = 3
+RETRY_BACKOFF = 0.5
+
+# bytes read per step from a stream=True response body
+STREAM_CHUNK_SIZE = 1 << 16
+
+
+class TokenBucket:
+
+    # rate tokens refill per second, up to capacity tokens banked for bursts
+    def __init__(self, rate=SEC_MAX_REQUESTS_PER_SECOND, capacity=None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated = now
+
+    # non blocking: returns seconds to wait before a token is available (0 if taken)
+    def reserve(self, tokens=1):
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return 0.0
+            # take the token now and let the caller sleep off the debt,
+            # so concurrent callers queue up in order instead of racing
+            wait = (tokens - self.tokens) / self.rate
+            self.tokens -= tokens
+            return wait
+
+    # blocking: only sleeps when the bucket is actually empty
+    def acquire(self, tokens=1):
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class SECClient:
+
+    def __init__(self, rate=SEC_MAX_REQUESTS_PER_SECOND, headers=None, pool_maxsize=POOL_MAXSIZE, timeout=30, mirror=None):
+        self.limiter = TokenBucket(rate)
+        self.timeout = timeout
+        mirror = mirror or os.environ.get(SEC_MIRROR_ENV)
+        self.mirror = mirror.rstrip("/") if mirror else None
+        self.session = requests.Session()
+        self.session.headers.update(headers or HEADERS_URL)
+
+        retry = Retry(
+            total=RETRY_TOTAL,
+            backoff_factor=RETRY_BACKOFF,
+            status_forcelist=RETRY_STATUS,
+            allowed_methods=["GET", "HEAD"],
+            respect_retry_after_header=True,
+        )
+        # separate adapter per SEC host so each keeps its own keep-alive pool
+        for host in SEC_HOSTS:
+            self.session.mount(host, HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize, max_retries=retry))
+        # anything else (fixture servers, mirrors) still gets pooled connections
+        self.session.mount("https://", HTTPAdapter(pool_maxsize=pool_maxsize, max_retries=retry))
+        self.session.mount("http://", HTTPAdapter(pool_maxsize=pool_maxsize, max_retries=retry))
+
+    # the url actually requested: unchanged, or moved under the mirror
+    def resolve(self, url):
+        if self.mirror:
+            for host in SEC_HOSTS:
+                if url.startswith(host):
+                    return f"{self.mirror}/{host[len('https://'):]}{url[len(host):]}"
+        return url
+
+    def request(self, method, url, **kwargs):
+        self.limiter.acquire()
+        kwargs.setdefault("timeout", self.timeout)
+        response = self.session.request(method, self.resolve(url), **kwargs)
+        SECMetrics.incr("http_requests")
+        # a stream=True body is still on the wire, iter_body counts it as it is read
+        if not kwargs.get("stream"):
+            SECMetrics.incr("http_bytes", len(response.content))
+        return response
+
+    # same call shape as requests.get so the scripts can swap it in directly
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def close(self):
+        self.session.close()
+
+
+# body of a stream=True response as it arrives (content encoding undone), counted into http_bytes
+# the connection is released once the body is read, or when the consumer stops early
+def iter_body(response, chunk_size=STREAM_CHUNK_SIZE):
+    try:
+        for chunk in response.iter_content(chunk_size):
+            SECMetrics.incr("http_bytes", len(chunk))
+            yield chunk
+    finally:
+        response.close()
+
+
+# one client per process so every script and helper shares the pools and the limiter
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> SECClient:
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = SECClient()
+    return _client
+
+
+# swap the per-process client (fixture runs, benchmarks), returns the new one
+def configure(**kwargs) -> SECClient:
+    global _client
+    with _client_lock:
+        if _client is not None:
+            _client.close()
+        _client = SECClient(**kwargs)
+    return _client
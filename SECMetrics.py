@@ -0,0 +1,231 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# per-stage timings and counters for the scraping workflows, in machine readable form
+# stages record wall and CPU time, counters cover HTTP traffic, cache hits, XML work and tables,
+# both are kept per filing (ticker / accession scope) and per run, and exported as
+#   JSON lines          one record per stage run plus one counters record per filing and for the run
+#   Prometheus textfile run totals for node_exporter's textfile collector
+# worker processes hand their snapshot() back to the parent, which merge()s it
+
+import collections
+import contextlib
+import contextvars
+import json
+import os
+import pathlib
+import threading
+import time
+import uuid
+
+# prefix of every Prometheus metric name
+PROM_PREFIX = "sec"
+
+# counter name -> help text, anything else is exported without help
+COUNTERS = {
+    "http_requests": "HTTP requests sent to the SEC (or its mirror)",
+    "http_bytes": "Response body bytes received",
+    "http_cache_hits": "Responses served from the disk cache without a request",
+    "http_cache_revalidated": "Cached responses confirmed by a 304",
+    "http_cache_misses": "Responses fetched in full",
+    "downloads": "Filing documents downloaded",
+    "downloads_existing": "Filing documents already on disk",
+    "downloads_failed": "Filing documents that failed to download",
+    "documents_stored": "Filing documents written to the compressed document store",
+    "document_bytes_raw": "Uncompressed bytes of the stored documents",
+    "document_bytes_stored": "Compressed bytes written to the document store",
+    "xml_elements": "XML elements visited by the parsers",
+    "facts": "Instance facts read",
+    "contexts": "Instance contexts read",
+    "unmapped_facts": "Facts without a label linkbase concept",
+    "parse_cache_hits": "Filings loaded from the parse cache",
+    "parse_cache_misses": "Filings parsed from their documents",
+    "calculations_checked": "Calculation summations checked against the facts",
+    "calculations_inconsistent": "Calculation summations whose items do not add up to the total",
+    "tables_scanned": "HTML tables scanned for the keyword",
+    "tables_kept": "Tables written to the workbook",
+}
+
+# (ticker, accession) of the filing being worked on, () outside any filing
+_scope = contextvars.ContextVar("sec_metrics_scope", default=())
+
+
+class Metrics:
+
+    def __init__(self, run_id=None):
+        self.run_id = run_id or uuid.uuid4().hex[:12]
+        self.started = time.time()
+        self.lock = threading.Lock()
+        self.stages = []
+        # scope tuple -> Counter
+        self.counters = collections.defaultdict(collections.Counter)
+
+    def incr(self, name, value=1):
+        scope = _scope.get()
+        with self.lock:
+            self.counters[scope][name] += value
+
+    # thread_time, not process_time: batch mode runs several filings on threads at once
+    @contextlib.contextmanager
+    def stage(self, name):
+        scope = _scope.get()
+        wall = time.perf_counter()
+        cpu = time.thread_time()
+        try:
+            yield
+        finally:
+            record = {
+                "stage": name,
+                "ticker": scope[0] if scope else None,
+                "accession": scope[1] if scope else None,
+                "wall_seconds": time.perf_counter() - wall,
+                "cpu_seconds": time.thread_time() - cpu,
+                "ended_at": time.time(),
+            }
+            with self.lock:
+                self.stages.append(record)
+
+    # caller holds the lock
+    def _copy(self):
+        return {
+            "stages": list(self.stages),
+            "counters": [[list(scope), dict(counter)] for scope, counter in self.counters.items()],
+        }
+
+    # picklable copy, for returning from worker processes
+    def snapshot(self) -> dict:
+        with self.lock:
+            return self._copy()
+
+    def merge(self, snapshot):
+        if not snapshot:
+            return
+        with self.lock:
+            self.stages.extend(snapshot.get("stages", []))
+            for scope, counter in snapshot.get("counters", []):
+                self.counters[tuple(scope)].update(counter)
+
+    # snapshot() and reset() in one step, what a reused worker process returns after each job
+    def drain(self) -> dict:
+        with self.lock:
+            snapshot = self._copy()
+            self.stages.clear()
+            self.counters.clear()
+        return snapshot
+
+    def reset(self):
+        with self.lock:
+            self.stages.clear()
+            self.counters.clear()
+
+    def totals(self) -> collections.Counter:
+        total = collections.Counter()
+        with self.lock:
+            for counter in self.counters.values():
+                total.update(counter)
+        return total
+
+    def stage_totals(self) -> dict:
+        totals = {}
+        with self.lock:
+            for record in self.stages:
+                entry = totals.setdefault(record["stage"], {"runs": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0})
+                entry["runs"] += 1
+                entry["wall_seconds"] += record["wall_seconds"]
+                entry["cpu_seconds"] += record["cpu_seconds"]
+        return totals
+
+    def write_jsonl(self, path, append=True):
+        path = pathlib.Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        snapshot = self.snapshot()
+        with open(path, "a" if append else "w", encoding="utf-8") as fh:
+            for record in snapshot["stages"]:
+                fh.write(json.dumps({"type": "stage", "run_id": self.run_id, **record}) + "\n")
+            for scope, counter in snapshot["counters"]:
+                if not scope:
+                    continue
+                fh.write(json.dumps({
+                    "type": "filing", "run_id": self.run_id, "ticker": scope[0], "accession": scope[1],
+                    "counters": counter,
+                }) + "\n")
+            fh.write(json.dumps({
+                "type": "run", "run_id": self.run_id, "started_at": self.started,
+                "seconds": time.time() - self.started, "counters": dict(self.totals()),
+                "stages": self.stage_totals(),
+            }) + "\n")
+        return path
+
+    # written to a temp file and renamed, the textfile collector must never see half a file
+    def write_prometheus(self, path):
+        path = pathlib.Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {PROM_PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {PROM_PREFIX}_{name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{k}="{v}"' for k, v in labels.items())
+                lines.append(f"{PROM_PREFIX}_{name}{{{label_text}}} {value}" if label_text
+                             else f"{PROM_PREFIX}_{name} {value}")
+
+        stages = self.stage_totals()
+        metric("stage_runs_total", "counter", "Stage executions",
+               [({"stage": s}, v["runs"]) for s, v in sorted(stages.items())])
+        metric("stage_wall_seconds_total", "counter", "Wall clock seconds per stage",
+               [({"stage": s}, f"{v['wall_seconds']:.6f}") for s, v in sorted(stages.items())])
+        metric("stage_cpu_seconds_total", "counter", "CPU seconds per stage",
+               [({"stage": s}, f"{v['cpu_seconds']:.6f}") for s, v in sorted(stages.items())])
+        for name, value in sorted(self.totals().items()):
+            metric(f"{name}_total", "counter", COUNTERS.get(name, name.replace("_", " ")), [({}, value)])
+        metric("run_seconds", "gauge", "Seconds since the run started", [({}, f"{time.time() - self.started:.3f}")])
+        metric("run_timestamp_seconds", "gauge", "Unix time the run started", [({}, f"{self.started:.3f}")])
+
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        os.replace(tmp_path, path)
+        return path
+
+
+# one registry per process, like the HTTP client
+_metrics = None
+_metrics_lock = threading.Lock()
+
+
+def get_metrics() -> Metrics:
+    global _metrics
+    if _metrics is None:
+        with _metrics_lock:
+            if _metrics is None:
+                _metrics = Metrics()
+    return _metrics
+
+
+def incr(name, value=1):
+    get_metrics().incr(name, value)
+
+
+def stage(name):
+    return get_metrics().stage(name)
+
+
+# everything recorded inside is attributed to this filing
+@contextlib.contextmanager
+def filing(ticker=None, accession=None):
+    token = _scope.set((ticker, accession))
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+
+
+# what the scripts call at the end: either path may be None
+def export(jsonl_path=None, prom_path=None):
+    metrics = get_metrics()
+    written = []
+    if jsonl_path:
+        written.append(metrics.write_jsonl(jsonl_path))
+    if prom_path:
+        written.append(metrics.write_prometheus(prom_path))
+    return written
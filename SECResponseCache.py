@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# on disk HTTP response cache for SEC JSON endpoints (submissions, index.json, ...)
+# responses are stored by url with their ETag / Last-Modified and revalidated with
+# If-None-Match / If-Modified-Since, so unchanged documents come back as a bodyless 304.
+# accession folders under Archives/edgar/data never change once filed,
+# so those are served straight from disk without asking the SEC at all
+
+import hashlib
+import json
+import os
+import pathlib
+import re
+import time
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+import SECHttpClient
+import SECMetrics
+
+# shared with the ticker resolver cache
+CACHE_DIR = pathlib.Path.cwd().joinpath("folder_to_store_sec_cache", "http")
+
+# .../Archives/edgar/data/<cik>/<18 digit accession>/... is immutable once published
+IMMUTABLE_URL = re.compile(r"/Archives/edgar/data/\d+/\d{18}/")
+
+
+def is_immutable(url: str) -> bool:
+    return IMMUTABLE_URL.search(url) is not None
+
+
+# rebuild a requests.Response so callers keep using raise_for_status / json / text / headers
+def _make_response(url, status_code, body, headers):
+    response = requests.Response()
+    response.url = url
+    response.status_code = status_code
+    response._content = body
+    response.headers = CaseInsensitiveDict(headers)
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers) or "utf-8"
+    return response
+
+
+class ResponseCache:
+
+    def __init__(self, cache_dir=None, client=None):
+        self.cache_dir = pathlib.Path(cache_dir) if cache_dir else CACHE_DIR
+        self.client = client
+        # running totals, useful to confirm a warm run transferred nothing
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        return self.cache_dir / f"{key}.body", self.cache_dir / f"{key}.json"
+
+    def _load(self, url):
+        body_path, meta_path = self._paths(url)
+        try:
+            meta = json.loads(meta_path.read_text(encoding="utf-8"))
+            body = body_path.read_bytes()
+        except (OSError, ValueError):
+            return None, None
+        return meta, body
+
+    def _store(self, url, response):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        body_path, meta_path = self._paths(url)
+        meta = {
+            "url": url,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "content_type": response.headers.get("Content-Type"),
+            "stored_at": time.time(),
+        }
+        # body first, then meta, each via rename, so a half written entry is never loaded
+        tmp_body = body_path.with_suffix(".body.tmp")
+        tmp_body.write_bytes(response.content)
+        os.replace(tmp_body, body_path)
+        tmp_meta = meta_path.with_suffix(".json.tmp")
+        tmp_meta.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(tmp_meta, meta_path)
+
+    def get(self, url, headers=None):
+        client = self.client or SECHttpClient.get_client()
+        meta, body = self._load(url)
+
+        cached_headers = {}
+        if meta is not None and meta.get("content_type"):
+            cached_headers["Content-Type"] = meta["content_type"]
+
+        # immutable archive paths: never revalidate
+        if meta is not None and is_immutable(url):
+            self.hits += 1
+            SECMetrics.incr("http_cache_hits")
+            return _make_response(url, 200, body, cached_headers)
+
+        request_headers = dict(headers or SECHttpClient.HEADERS_URL)
+        if meta is not None:
+            if meta.get("etag"):
+                request_headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                request_headers["If-Modified-Since"] = meta["last_modified"]
+
+        response = client.get(url, headers=request_headers)
+
+        if response.status_code == 304 and meta is not None:
+            self.revalidated += 1
+            SECMetrics.incr("http_cache_revalidated")
+            return _make_response(url, 200, body, cached_headers)
+
+        self.misses += 1
+        SECMetrics.incr("http_cache_misses")
+        if response.ok:
+            self._store(url, response)
+        return response
+
+
+# one cache per process, shared by every script
+_cache = None
+
+
+def get_cache() -> ResponseCache:
+    global _cache
+    if _cache is None:
+        _cache = ResponseCache()
+    return _cache
+
+
+# swap the per-process cache (fixture runs, benchmarks), returns the new one
+def configure(cache_dir=None, client=None) -> ResponseCache:
+    global _cache
+    _cache = ResponseCache(cache_dir=cache_dir, client=client)
+    return _cache
+
+
+# drop in for client.get(url, headers=...) on cacheable JSON endpoints
+def get(url, headers=None):
+    return get_cache().get(url, headers=headers)
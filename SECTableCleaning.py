@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# vectorized cleaning for the tables ScrapingSECTablesHTML extracts
+# the cells of every table go into one long (table, row, cell) column and are normalized
+# with pandas string ops in a single pass, instead of a Python loop per cell:
+#   NFKC, trailing commas, non-breaking spaces, lone $ / % dropped, (x) -> -x,
+#   repeated neighbour cells in a row collapsed
+# the frames come out the same as the old per cell loop built them
+# duplicate rows / columns are found by hashing each row / column, the frame is never transposed,
+# and "in thousands / millions / billions" notes give float64 value columns the right scale
+
+import re
+
+import numpy as np
+import pandas as pd
+
+# tables with any of these as a header or first column cell are tables of contents
+TOC_WORDS = ("page", "index")
+
+# cells dropped before the row is laid out, the number sits in the next cell
+LONE_SYMBOLS = ("$", "%")
+
+# "(in millions, except per share data)", "$ in thousands" -> power of ten
+SCALE_PATTERN = re.compile(r"\bin\s+(thousands|millions|billions)\b", re.IGNORECASE)
+SCALE_WORDS = {"thousands": 3, "millions": 6, "billions": 9}
+# "(in millions, except per share amounts)": rows whose label is per share / per unit keep the number as shown
+SCALE_EXCEPT_PATTERN = re.compile(r"\bexcept\s+(?:for\s+)?per[\s-]+(?:share|unit)", re.IGNORECASE)
+# ("Shares used in computing earnings per share" is a count of shares and stays scaled)
+PER_SHARE_LABEL = r"\bper\s+(?:\w+\s+){0,2}(?:share|unit)\b"
+SHARE_COUNT_LABEL = r"\b(?:shares|units)\b"
+
+# a cell that is just a number as the cleaning leaves it: "-1,234", "$1,000", "12.5%", "86,459"
+NUMBER_CELL = r"-?\$?\s*(?:\d{1,3}(?:,\d{3})+|\d+)?(?:\.\d+)?\s*%?"
+
+# suffix of the float64 column placed after each text column that holds numbers
+VALUE_SUFFIX = "_value"
+
+# per position multipliers that turn cell hashes into row / column hashes (odd, so no position is lost)
+_MIXERS = np.random.default_rng(20240101).integers(1, 2 ** 63, size=4096, dtype=np.uint64) | np.uint64(1)
+
+
+# cell text -> cleaned text for a whole column of cells at once
+def normalize_cells(texts) -> pd.Series:
+    s = pd.Series(texts, dtype=object).str.normalize("NFKC")
+    # trim trailing commas, fix non-breaking spaces
+    s = s.str.rstrip(",").str.replace("\xa0", " ", regex=False)
+    return s
+
+
+# rows of cell texts per table (as table_cells returns them) -> one DataFrame or None per table,
+# None for tables with fewer than min_rows rows / min_cols columns or that look like a table of contents
+# dedupe=True also drops repeated rows and columns (see dedupe) before the frames are built
+def clean_tables(tables, min_rows, min_cols, dedupe=False) -> list:
+    row_lengths = [len(row) for rows in tables for row in rows]
+    if not row_lengths:
+        return [None] * len(tables)
+    rows_per_table = np.array([len(rows) for rows in tables])
+    texts = [cell for rows in tables for row in rows for cell in row]
+
+    # long layout: one entry per cell with its table and global row number
+    row_ids = np.repeat(np.arange(len(row_lengths)), row_lengths)
+    table_of_row = np.repeat(np.arange(len(tables)), rows_per_table)
+
+    s = normalize_cells(texts)
+    # skip lone % and $
+    keep = ~s.isin(LONE_SYMBOLS).to_numpy()
+    s = s[keep]
+    row_ids = row_ids[keep]
+    # convert negative values in parenthesis into numbers with "-" sign prefix
+    paren = (s.str.startswith("(") & s.str.endswith(")")).to_numpy(dtype=bool)
+    s = s.mask(paren, "-" + s.str.slice(1, -1))
+
+    # collapse a cell repeating its left neighbour in the same row
+    values = s.to_numpy(dtype=object)
+    repeat = np.zeros(len(values), dtype=bool)
+    repeat[1:] = (values[1:] == values[:-1]) & (row_ids[1:] == row_ids[:-1])
+    values = values[~repeat]
+    row_ids = row_ids[~repeat]
+
+    # rows left without cells disappear, the rest are renumbered per table
+    kept_rows, dense_row = np.unique(row_ids, return_inverse=True)
+    kept_tables = table_of_row[kept_rows]
+    first_row = np.searchsorted(kept_tables, np.arange(len(tables)))
+    local_row = dense_row - first_row[kept_tables[dense_row]]
+    col = pd.Series(dense_row).groupby(dense_row).cumcount().to_numpy()
+    table_ids = kept_tables[dense_row]
+
+    # table of contents: a header or first column cell that is just "page" / "index"
+    edge = (local_row == 0) | (col == 0)
+    toc = pd.Series(values[edge], dtype=object).str.strip().str.lower().isin(TOC_WORDS).to_numpy()
+    toc_tables = set(table_ids[edge][toc].tolist())
+    # scale notes looked up for all cells at once, each table takes its first one
+    scale_words = pd.Series(values, dtype=object).str.extract(SCALE_PATTERN, expand=False).to_numpy(dtype=object)
+    scale_except = pd.Series(values, dtype=object).str.contains(SCALE_EXCEPT_PATTERN, na=False).to_numpy(dtype=bool)
+    if dedupe:
+        cell_hashes = pd.util.hash_array(values)
+        empty_hash = pd.util.hash_array(np.array([""], dtype=object))[0]
+
+    # cells are in table order, so each table is one contiguous slice
+    bounds = np.searchsorted(table_ids, np.arange(len(tables) + 1))
+    frames = []
+    for t in range(len(tables)):
+        start, end = bounds[t], bounds[t + 1]
+        if start == end:
+            frames.append(None)
+            continue
+        n_rows = local_row[end - 1] + 1
+        n_cols = col[start:end].max() + 1
+        if n_rows < min_rows or t in toc_tables or n_cols < min_cols:
+            frames.append(None)
+            continue
+        # padding rows to the same length
+        grid = np.full((n_rows, n_cols), "", dtype=object)
+        grid[local_row[start:end], col[start:end]] = values[start:end]
+        if dedupe:
+            hashes = np.full((n_rows, n_cols), empty_hash, dtype=np.uint64)
+            hashes[local_row[start:end], col[start:end]] = cell_hashes[start:end]
+            rows, cols = _dedupe_positions(grid, hashes)
+            # labels of the kept rows / columns, as drop_duplicates leaves them
+            df = pd.DataFrame(grid[np.ix_(rows, cols)], index=rows, columns=cols)
+        else:
+            df = pd.DataFrame(grid)
+        notes = scale_words[start:end][pd.notna(scale_words[start:end])]
+        df.attrs["scale"] = SCALE_WORDS[notes[0].lower()] if len(notes) else 0
+        df.attrs["scale_except_per_share"] = bool(scale_except[start:end].any())
+        frames.append(df)
+    return frames
+
+
+# positions of the first occurrence of every distinct line (row or column) of a grid,
+# lines with equal hashes are confirmed on the cells, a hash collision never drops a line
+def _first_lines(lines, keys) -> np.ndarray:
+    _, first = np.unique(keys, return_index=True)
+    if len(first) == len(keys):
+        return np.arange(len(keys))
+    seen = {}
+    keep = []
+    for position, key in enumerate(keys.tolist()):
+        line = lines[position]
+        if any(np.array_equal(line, other) for other in seen.get(key, ())):
+            continue
+        seen.setdefault(key, []).append(line)
+        keep.append(position)
+    return np.array(keep, dtype=np.intp)
+
+
+# kept row and column positions: rows first, then the columns of what is left,
+# like drop_duplicates() then ~df.T.duplicated()
+# row / column keys are the cell hashes mixed by position, the grid is never transposed
+def _dedupe_positions(grid, hashes):
+    n_rows, n_cols = grid.shape
+    row_keys = (hashes * _MIXERS[np.arange(n_cols) % len(_MIXERS)]).sum(axis=1, dtype=np.uint64)
+    rows = _first_lines(grid, row_keys)
+    col_keys = (hashes[rows] * _MIXERS[np.arange(len(rows)) % len(_MIXERS), None]).sum(axis=0, dtype=np.uint64)
+    cols = _first_lines(grid[rows].T, col_keys)
+    return rows, cols
+
+
+# drop repeated rows and columns of a frame, first one kept
+# (drop_duplicates / ~df.T.duplicated() without the transpose)
+def dedupe(df) -> pd.DataFrame:
+    grid = df.to_numpy(dtype=object)
+    hashes = pd.util.hash_array(grid.ravel()).reshape(grid.shape)
+    rows, cols = _dedupe_positions(grid, hashes)
+    out = df.iloc[rows, cols]
+    out.attrs = dict(df.attrs)
+    return out
+
+
+# float64 column after every column holding numbers, cells of the header row and text cells are NaN
+# numbers are multiplied by the table's scale note, percentages are left as shown,
+# and so are per share rows when the note says "except per share"
+def add_value_columns(df, scale=None) -> pd.DataFrame:
+    scale = df.attrs.get("scale", 0) if scale is None else scale
+    n_rows, n_cols = df.shape
+    cells = pd.Series(df.to_numpy(dtype=object).ravel(), dtype=object)
+    is_number = cells.str.fullmatch(NUMBER_CELL).fillna(False) & cells.str.contains(r"\d", regex=True).fillna(False)
+    numbers = pd.to_numeric(cells.where(is_number).str.replace(r"[$,%\s]", "", regex=True), errors="coerce")
+    percent = cells.str.endswith("%").fillna(False)
+    unscaled = percent
+    if df.attrs.get("scale_except_per_share") and n_cols:
+        labels = df.iloc[:, 0].astype(str)
+        per_share = (labels.str.contains(PER_SHARE_LABEL, case=False, regex=True)
+                     & ~labels.str.contains(SHARE_COUNT_LABEL, case=False, regex=True)).to_numpy(dtype=bool)
+        unscaled = unscaled | np.repeat(per_share, n_cols)
+    numbers = numbers.where(unscaled, numbers * 10.0 ** scale)
+    grid = numbers.to_numpy(dtype="float64", na_value=np.nan, copy=True).reshape(n_rows, n_cols)
+    grid[0, :] = np.nan
+
+    out = {}
+    for position, label in enumerate(df.columns):
+        out[label] = df.iloc[:, position]
+        if position and not np.isnan(grid[:, position]).all():
+            out[f"{label}{VALUE_SUFFIX}"] = grid[:, position]
+    result = pd.DataFrame(out, index=df.index)
+    result.attrs = dict(df.attrs)
+    return result
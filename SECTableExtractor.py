@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# lxml version of the BeautifulSoup table search in ScrapingSECTablesHTML
+# the 10-K html is fed in chunks to an incremental parser, each outermost <table> is handled when it closes
+# and then dropped with everything before it, so only one table is ever held in memory
+# the chunks can come straight off an HTTP response, the first tables are read while the rest downloads
+# text is joined the way get_text(" ", strip=True) joins it, so the DataFrames come out the same
+
+import itertools
+import re
+
+import lxml.etree as ETL
+
+import SECMetrics
+
+# cell tags, in document order like find_all(["td", "th"])
+CELL_TAGS = ("td", "th")
+
+# bytes fed to the parser per step, a whole document fed at once would be built as one tree
+CHUNK_SIZE = 1 << 16
+
+
+# html as byte chunks: str / bytes sliced, a binary file object read, any other iterable passed through
+def _chunks(html):
+    if isinstance(html, str):
+        html = html.encode("utf-8")
+    if isinstance(html, bytes):
+        for start in range(0, len(html), CHUNK_SIZE):
+            yield html[start:start + CHUNK_SIZE]
+    elif hasattr(html, "read"):
+        yield from iter(lambda: html.read(CHUNK_SIZE), b"")
+    else:
+        yield from html
+
+
+# drop a handled table and everything before it, at every level up to the root,
+# so the tree never holds more than the table being read
+def _release(element):
+    element.clear(keep_tail=True)
+    for node in (element, *element.iterancestors()):
+        parent = node.getparent()
+        if parent is None:
+            break
+        while node.getprevious() is not None:
+            del parent[0]
+
+
+# get_text(" ", strip=True): every text node stripped, empty ones skipped, joined by one space
+def element_text(element) -> str:
+    return " ".join(s for s in (t.strip() for t in element.itertext()) if s)
+
+
+# [[cell text, ...] per <tr>], nested table rows included like find_all("tr") does
+def table_cells(table) -> list:
+    return [[element_text(cell) for cell in row.iter(*CELL_TAGS)] for row in table.iter("tr")]
+
+
+# every <table> in document order, outer tables before the tables nested in them,
+# each one only valid until the next is requested
+# html: str, bytes, a binary file object or an iterable of byte chunks (SECHttpClient.iter_body)
+# encoding: the charset of the bytes, None lets the parser read it from the document
+def iter_tables(html, encoding=None):
+    # str is fed as utf-8
+    if isinstance(html, str) or (encoding is None and isinstance(html, bytes)):
+        encoding = "utf-8"
+    parser = ETL.HTMLPullParser(
+        events=("start", "end"), tag="table", huge_tree=True, remove_comments=True, encoding=encoding,
+    )
+    depth = 0
+    # one more round after the last chunk, close() flushes the tables still open
+    for chunk in itertools.chain(_chunks(html), [None]):
+        if chunk is None:
+            parser.close()
+        else:
+            parser.feed(chunk)
+        for event, element in parser.read_events():
+            if event == "start":
+                depth += 1
+                continue
+            depth -= 1
+            if depth:
+                continue
+            yield from element.iter("table")
+            _release(element)
+
+
+class KeywordMatcher:
+    # the keywords (or regex patterns) found in a table's text, all of them from one scan:
+    # literals go into a single alternation tried at every position, longest first, so
+    # a keyword that only occurs inside a longer one ("revenue" in "total revenue") is
+    # still found through the longer match
+
+    def __init__(self, keywords, regex=False):
+        self.keywords = list(keywords)
+        self.regex = regex
+        if regex:
+            self.patterns = [re.compile(pattern, re.IGNORECASE) for pattern in self.keywords]
+        else:
+            literals = sorted({k.lower() for k in self.keywords}, key=len, reverse=True)
+            self.alternation = re.compile("(?=(" + "|".join(map(re.escape, literals)) + "))")
+
+    def match(self, text) -> list:
+        if self.regex:
+            return [k for k, pattern in zip(self.keywords, self.patterns) if pattern.search(text)]
+        found = {m.group(1) for m in self.alternation.finditer(text.lower())}
+        if not found:
+            return []
+        return [k for k in self.keywords if any(k.lower() in f for f in found)]
+
+
+# cell rows of the tables whose text contains keyword, what extract_table reads
+# limit stops the parse at the limit-th match, the rest of the document is never read
+def find_tables(html, keyword, limit=None, encoding=None) -> list:
+    keyword = keyword.lower()
+    matches = []
+    scanned = 0
+    for table in iter_tables(html, encoding):
+        scanned += 1
+        if keyword in element_text(table).lower():
+            matches.append(table_cells(table))
+            if limit and len(matches) >= limit:
+                break
+    SECMetrics.incr("tables_scanned", scanned)
+    return matches
+
+
+# one pass for many keywords: keyword -> cell rows of its tables, a table matching
+# several keywords is read once and listed under each of them
+# limit: at most that many tables per keyword, the parse stops once every keyword has them
+def find_tables_multi(html, matcher, limit=None, encoding=None) -> dict:
+    matches = {k: [] for k in matcher.keywords}
+    scanned = 0
+    for table in iter_tables(html, encoding):
+        scanned += 1
+        keywords = matcher.match(element_text(table))
+        if limit:
+            keywords = [k for k in keywords if len(matches[k]) < limit]
+        if keywords:
+            cells = table_cells(table)
+            for k in keywords:
+                matches[k].append(cells)
+            if limit and all(len(tables) >= limit for tables in matches.values()):
+                break
+    SECMetrics.incr("tables_scanned", scanned)
+    return matches
@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# persisted inverted index over the tables of one filing document
+# built once from the 10-K html, afterwards keyword / phrase / regex queries read only the index
+# and the matching tables' cached cells, the html is never downloaded or parsed again
+# per document folder:
+#   index.json    token -> table ids, byte offset of every table in tables.jsonl
+#   tables.jsonl  one table per line: id, text (as find_target_tables sees it), cell rows
+
+import json
+import os
+import pathlib
+import re
+import time
+
+import SECTableExtractor
+
+# shared cache root with the HTTP and ticker caches
+INDEX_DIR = pathlib.Path.cwd().joinpath("folder_to_store_sec_cache", "tables")
+
+# bump when the stored layout or the cell extraction changes, older indexes are rebuilt
+INDEX_VERSION = 1
+
+# runs of letters / digits in the lower cased table text
+TOKEN = re.compile(r"\w+")
+
+# .../Archives/edgar/data/<cik>/<accession>/<document>
+ARCHIVE_URL = re.compile(r"/data/(\d+)/(\d{18})/([^/?#]+)")
+
+
+def tokenize(text) -> list:
+    return TOKEN.findall(text.lower())
+
+
+# index folder of one filing document: <index_dir>/<cik>/<accession>/<document>
+def index_path(cik, accession, document, index_dir=None) -> pathlib.Path:
+    base = pathlib.Path(index_dir) if index_dir else INDEX_DIR
+    return base / str(int(cik)) / accession.replace("-", "") / document
+
+
+class TableIndex:
+
+    def __init__(self, path):
+        self.path = pathlib.Path(path)
+        self._meta = None
+
+    @classmethod
+    def for_url(cls, url, index_dir=None):
+        match = ARCHIVE_URL.search(url)
+        if match is None:
+            raise ValueError(f"Not an EDGAR archive document url: {url}")
+        return cls(index_path(*match.groups(), index_dir=index_dir))
+
+    @property
+    def index_file(self):
+        return self.path / "index.json"
+
+    @property
+    def tables_file(self):
+        return self.path / "tables.jsonl"
+
+    def exists(self) -> bool:
+        try:
+            return self.load()["version"] == INDEX_VERSION
+        except (OSError, ValueError, KeyError):
+            return False
+
+    def load(self) -> dict:
+        if self._meta is None:
+            self._meta = json.loads(self.index_file.read_text(encoding="utf-8"))
+        return self._meta
+
+    # one pass over the html (or the chunks of a streamed response): every table's text and cells go to tables.jsonl, its tokens to the postings
+    def build(self, html, url=None, encoding=None) -> dict:
+        self.path.mkdir(parents=True, exist_ok=True)
+        postings = {}
+        offsets = []
+        tmp_tables = self.tables_file.with_suffix(".jsonl.tmp")
+        with open(tmp_tables, "wb") as fh:
+            for table_id, table in enumerate(SECTableExtractor.iter_tables(html, encoding)):
+                text = SECTableExtractor.element_text(table)
+                record = {"id": table_id, "text": text, "cells": SECTableExtractor.table_cells(table)}
+                offsets.append(fh.tell())
+                fh.write(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+                for token in set(tokenize(text)):
+                    postings.setdefault(token, []).append(table_id)
+
+        meta = {
+            "version": INDEX_VERSION,
+            "url": url,
+            "built_at": time.time(),
+            "tables": len(offsets),
+            "offsets": offsets,
+            "tokens": postings,
+        }
+        # tables first, then the index that points into them, so a half built index is never loaded
+        os.replace(tmp_tables, self.tables_file)
+        tmp_index = self.index_file.with_suffix(".json.tmp")
+        tmp_index.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(tmp_index, self.index_file)
+        self._meta = meta
+        return meta
+
+    # records of the given table ids, read by offset without loading the rest of the file
+    def tables(self, table_ids) -> list:
+        offsets = self.load()["offsets"]
+        records = []
+        with open(self.tables_file, "rb") as fh:
+            for table_id in sorted(table_ids):
+                fh.seek(offsets[table_id])
+                records.append(json.loads(fh.readline()))
+        return records
+
+    # ids of tables that may contain every token of the query: a query token can sit
+    # inside a longer indexed token ("revenue" in "revenues"), so the vocabulary is matched by substring
+    def candidates(self, query) -> set:
+        postings = self.load()["tokens"]
+        candidates = None
+        for token in set(tokenize(query)):
+            ids = set()
+            for indexed, table_ids in postings.items():
+                if token in indexed:
+                    ids.update(table_ids)
+            candidates = ids if candidates is None else candidates & ids
+            if not candidates:
+                return set()
+        # no letters or digits in the query ("$"), every table has to be checked
+        return set(range(self.load()["tables"])) if candidates is None else candidates
+
+    # same matches as find_target_tables(html, keyword): keyword or phrase anywhere in the table text
+    def search(self, keyword) -> list:
+        keyword = keyword.lower()
+        return [
+            record["cells"] for record in self.tables(self.candidates(keyword))
+            if keyword in record["text"].lower()
+        ]
+
+    # regex over every table's text, case insensitive
+    def search_regex(self, pattern) -> list:
+        regex = re.compile(pattern, re.IGNORECASE)
+        return [
+            record["cells"] for record in self.tables(range(self.load()["tables"]))
+            if regex.search(record["text"])
+        ]
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# table export backends for ScrapingSECTablesHTML, each table is written as soon as it is cleaned
+#   xlsx     one sheet per table, rows streamed to disk (xlsxwriter constant_memory,
+#            or an openpyxl write-only workbook when xlsxwriter is not installed)
+#   csv      a folder with one <sheet>.csv per table
+#   parquet  a folder with one <sheet>.parquet per table (needs pyarrow)
+# nothing is created when no table gets written
+
+import pathlib
+
+try:
+    import xlsxwriter
+except ImportError:
+    xlsxwriter = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+import openpyxl
+
+FORMATS = ("xlsx", "csv", "parquet")
+
+# the header cell style DataFrame.to_excel uses
+HEADER_FORMAT = {"bold": True, "border": 1, "align": "center", "valign": "top"}
+
+
+# where a format writes for the workbook path ScrapingSECTablesHTML picks:
+# the .xlsx itself, or a folder of the same name for the per table formats
+def output_path(output_file, fmt) -> pathlib.Path:
+    path = pathlib.Path(output_file)
+    return path if fmt == "xlsx" else path.with_suffix("")
+
+
+class XlsxTableWriter:
+
+    def __init__(self, path):
+        self.path = pathlib.Path(path)
+        self._book = None
+        self._header = None
+
+    def _open(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if xlsxwriter is not None:
+            # constant_memory flushes each row once the next one starts, rows must go in order
+            self._book = xlsxwriter.Workbook(str(self.path), {"constant_memory": True})
+            self._header = self._book.add_format(HEADER_FORMAT)
+        else:
+            self._book = openpyxl.Workbook(write_only=True)
+
+    # header row of column labels, then the rows, like to_excel(index=False)
+    def add(self, name, df):
+        if self._book is None:
+            self._open()
+        header = list(df.columns)
+        rows = df.itertuples(index=False, name=None)
+        if xlsxwriter is not None:
+            sheet = self._book.add_worksheet(name)
+            sheet.write_row(0, 0, header, self._header)
+            for r, row in enumerate(rows, start=1):
+                sheet.write_row(r, 0, row)
+        else:
+            sheet = self._book.create_sheet(name)
+            sheet.append(header)
+            for row in rows:
+                sheet.append(row)
+
+    def close(self):
+        if self._book is None:
+            return None
+        if xlsxwriter is not None:
+            self._book.close()
+        else:
+            self._book.save(self.path)
+        self._book = None
+        return self.path
+
+
+class CsvTableWriter:
+
+    def __init__(self, path):
+        self.path = pathlib.Path(path)
+
+    def add(self, name, df):
+        self.path.mkdir(parents=True, exist_ok=True)
+        df.to_csv(self.path / f"{name}.csv", index=False)
+
+    def close(self):
+        return self.path if self.path.exists() else None
+
+
+class ParquetTableWriter:
+
+    def __init__(self, path):
+        if pa is None:
+            raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+        self.path = pathlib.Path(path)
+
+    # parquet column names have to be strings, the cells already are
+    def add(self, name, df):
+        self.path.mkdir(parents=True, exist_ok=True)
+        table = pa.Table.from_pandas(df.rename(columns=str), preserve_index=False)
+        pq.write_table(table, self.path / f"{name}.parquet", compression="zstd")
+
+    def close(self):
+        return self.path if self.path.exists() else None
+
+
+WRITERS = {"xlsx": XlsxTableWriter, "csv": CsvTableWriter, "parquet": ParquetTableWriter}
+
+
+def open_writer(output_file, fmt="xlsx"):
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown export format {fmt}, expected one of {FORMATS}")
+    return WRITERS[fmt](output_path(output_file, fmt))
@@ -0,0 +1,214 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# shared ticker -> CIK resolver used by all the scraping scripts
+# the SEC mapping is downloaded once, cached on disk and reloaded into dict indexes
+# so each lookup is a single hash hit instead of a scan over every company
+
+import json
+import os
+import pathlib
+import threading
+import time
+
+import requests
+
+import SECHttpClient
+
+# map ticker to CIK (exchange file has the same companies plus the listing exchange)
+TICKER_JSON = "https://www.sec.gov/files/company_tickers.json"
+TICKER_EXCHANGE_JSON = "https://www.sec.gov/files/company_tickers_exchange.json"
+
+# where the downloaded mapping is kept between runs
+CACHE_DIR = pathlib.Path.cwd().joinpath("folder_to_store_sec_cache")
+CACHE_FILE = "company_tickers_exchange.json"
+
+# SEC refreshes the mapping daily, so re-download after a day
+CACHE_TTL = 24 * 60 * 60
+
+
+# "BRK.B", "brk-b", "BRK/B" and "BRKB" should all land on the same company
+def normalize_ticker(ticker: str) -> str:
+    return ticker.strip().upper().replace(".", "-").replace("/", "-")
+
+
+def _ticker_variants(ticker: str):
+    norm = normalize_ticker(ticker)
+    variants = {norm}
+    if "-" in norm:
+        variants.add(norm.replace("-", ""))
+    return variants
+
+
+# SEC CIKs are used zero padded to 10 digits in submissions urls
+def normalize_cik(cik) -> str:
+    return str(int(str(cik).strip())).zfill(10)
+
+
+# both SEC files are accepted:
+# company_tickers.json          -> {"0": {"cik_str": .., "ticker": .., "title": ..}, ...}
+# company_tickers_exchange.json -> {"fields": [...], "data": [[cik, name, ticker, exchange], ...]}
+def _rows_from_payload(data):
+    if isinstance(data, dict) and "fields" in data and "data" in data:
+        fields = data["fields"]
+        for row in data["data"]:
+            entry = dict(zip(fields, row))
+            yield {
+                "cik": entry.get("cik"),
+                "ticker": entry.get("ticker"),
+                "name": entry.get("name"),
+                "exchange": entry.get("exchange"),
+            }
+    else:
+        for entry in data.values():
+            yield {
+                "cik": entry.get("cik_str"),
+                "ticker": entry.get("ticker"),
+                "name": entry.get("title"),
+                "exchange": None,
+            }
+
+
+class TickerResolver:
+
+    def __init__(self, cache_dir=None, ttl=CACHE_TTL, url=TICKER_EXCHANGE_JSON, session=None):
+        self.cache_dir = pathlib.Path(cache_dir) if cache_dir else CACHE_DIR
+        self.cache_path = self.cache_dir / CACHE_FILE
+        self.ttl = ttl
+        self.url = url
+        self.session = session
+        self.by_ticker = {}
+        self.by_cik = {}
+        self.by_exchange = {}
+        self.loaded = False
+        self._load_lock = threading.Lock()
+
+    def _cache_is_fresh(self):
+        if not self.cache_path.exists():
+            return False
+        if self.ttl is None:
+            return True
+        age = time.time() - self.cache_path.stat().st_mtime
+        return age < self.ttl
+
+    def _download(self):
+        getter = self.session.get if self.session is not None else requests.get
+        # the one SEC User-Agent header every module sends (SECHttpClient)
+        resp = getter(self.url, headers=SECHttpClient.HEADERS_URL)
+        resp.raise_for_status()
+        data = resp.json()
+
+        # write to a temp file first so a crashed run never leaves half a cache behind
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(data), encoding="utf-8")
+        os.replace(tmp_path, self.cache_path)
+        return data
+
+    def _build_index(self, data):
+        by_ticker = {}
+        by_cik = {}
+        by_exchange = {}
+        for row in _rows_from_payload(data):
+            if row["cik"] is None or not row["ticker"]:
+                continue
+            entry = {
+                "cik": normalize_cik(row["cik"]),
+                "ticker": row["ticker"],
+                "name": row["name"],
+                "exchange": row["exchange"],
+            }
+            # first entry wins, SEC lists a company's primary ticker first
+            for variant in _ticker_variants(row["ticker"]):
+                by_ticker.setdefault(variant, entry)
+                if entry["exchange"]:
+                    by_exchange.setdefault(f"{entry['exchange'].upper()}:{variant}", entry)
+            by_cik.setdefault(entry["cik"], []).append(entry)
+
+        self.by_ticker = by_ticker
+        self.by_cik = by_cik
+        self.by_exchange = by_exchange
+        self.loaded = True
+
+    # load from disk when the cache is fresh, otherwise hit the SEC once
+    def load(self, force=False):
+        data = None
+        if not force and self._cache_is_fresh():
+            try:
+                data = json.loads(self.cache_path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                data = None
+        if data is None:
+            try:
+                data = self._download()
+            except requests.RequestException:
+                # stale cache beats no cache when the SEC is unreachable
+                if not self.cache_path.exists():
+                    raise
+                data = json.loads(self.cache_path.read_text(encoding="utf-8"))
+        self._build_index(data)
+        return self
+
+    def refresh(self):
+        return self.load(force=True)
+
+    # first lookup loads, threads asking meanwhile wait for it instead of downloading again
+    def _ensure_loaded(self):
+        if not self.loaded:
+            with self._load_lock:
+                if not self.loaded:
+                    self.load()
+
+    # accepts "AAPL", "brk.b", "NASDAQ:AAPL" or a CIK
+    def lookup(self, key: str) -> dict:
+        self._ensure_loaded()
+        key = str(key).strip()
+        if ":" in key:
+            exchange, ticker = key.split(":", 1)
+            entry = self.by_exchange.get(f"{exchange.strip().upper()}:{normalize_ticker(ticker)}")
+            if entry is not None:
+                return entry
+            key = ticker
+        entry = self.by_ticker.get(normalize_ticker(key))
+        if entry is not None:
+            return entry
+        if key.isdigit():
+            entries = self.by_cik.get(normalize_cik(key))
+            if entries:
+                return entries[0]
+        raise ValueError(f"Ticker {key} not found in SEC database")
+
+    def cik(self, ticker: str) -> str:
+        return self.lookup(ticker)["cik"]
+
+    def tickers(self, cik) -> list:
+        self._ensure_loaded()
+        return [entry["ticker"] for entry in self.by_cik.get(normalize_cik(cik), [])]
+
+
+# one resolver per process so repeated lookups share the loaded index
+# (the batch fetch threads all ask for it at once)
+_resolver = None
+_resolver_lock = threading.Lock()
+
+
+def get_resolver() -> TickerResolver:
+    global _resolver
+    if _resolver is None:
+        with _resolver_lock:
+            if _resolver is None:
+                _resolver = TickerResolver(session=SECHttpClient.get_client())
+    return _resolver
+
+
+# swap the per-process resolver (fixture runs, benchmarks), returns the new one
+def configure(cache_dir=None, ttl=CACHE_TTL, session=None) -> TickerResolver:
+    global _resolver
+    with _resolver_lock:
+        _resolver = TickerResolver(cache_dir=cache_dir, ttl=ttl, session=session or SECHttpClient.get_client())
+    return _resolver
+
+
+# go from company ticker to CIK
+def get_cik_from_ticker(ticker: str) -> str:
+    return get_resolver().cik(ticker)
@@ -7,14 +7,30 @@
 import requests
 from bs4 import BeautifulSoup, XMLParsedAsHTMLWarning
 import pandas as pd
-import unicodedata
+import io
 import os
+import re
+import tempfile
 import warnings
 
 import logging
 
 import argparse
 
+import AllDataUserToolScrapingParsingSEC
+import SECAsyncDownloader
+import SECBatchPipeline
+import SECDocumentStore
+import SECFilingLocator
+import SECHttpClient
+import SECMetrics
+import SECTableCleaning
+import SECTableExtractor
+import SECTableIndex
+import SECTableWriter
+import SECTickerResolver
+import XBRLStreamParsing
+
 # silence warnings when html parsed as xml
 warnings.filterwarnings("ignore", category=XMLParsedAsHTMLWarning)
 
@@ -24,6 +40,9 @@ MIN_ROWS = 2
 # usually if column has less than 3 cells of length there is no data
 MIN_COLS = 3
 
+# table engines: lxml streams the document (SECTableExtractor), bs4 builds the whole soup
+ENGINES = ("lxml", "bs4")
+
 # build SEC url
 BASE = "https://data.sec.gov/submissions/"
 
@@ -52,162 +71,390 @@ def parse_args():
     parser.add_argument("--ticker", help="Company ticker (e.g. AAPL)", default=None)
     parser.add_argument("--year", help="Filing year (e.g. 2024)", default=None)
     parser.add_argument("--keyword", help="Keyword to match table text", default=None)
+    # several keywords in one run: the 10-K is fetched and parsed once, one workbook per keyword
+    parser.add_argument("--keywords", nargs="+", help="Keywords to match table text", default=None)
+    parser.add_argument("--keywords-file", help="File with one keyword per line", default=None)
     parser.add_argument("--out-dir", default="tables_output", help="Output folder")
+    # batch mode: many tickers and a filing date range, no ticker/year prompts
+    parser.add_argument("--tickers", nargs="+", help="Batch mode: company tickers", default=None)
+    parser.add_argument("--tickers-file", help="Batch mode: file with one ticker per line", default=None)
+    parser.add_argument("--start", help="Batch mode: first filing date (YYYY-MM-DD)", default=None)
+    parser.add_argument("--end", help="Batch mode: last filing date (YYYY-MM-DD)", default=None)
+    parser.add_argument("--workers", type=int, help="Batch mode: download threads", default=None)
+    parser.add_argument("--processes", type=int, help="Batch mode: parser processes", default=None)
+    # the 10-K html is inline XBRL, its tagged facts can come out of the same download
+    parser.add_argument("--facts", action="store_true", help="Also write the inline XBRL facts as csv")
+    parser.add_argument("--engine", choices=ENGINES, default="lxml", help="Table extraction engine")
+    # tables are read off the response while it downloads, --max-tables can stop it early
+    parser.add_argument("--stream", action="store_true", help="Parse the 10-K html while it downloads (lxml engine)")
+    parser.add_argument("--max-tables", type=int, help="Stop after this many matching tables per keyword",
+                        default=None)
+    # xlsx streams one workbook, csv / parquet write a folder with one file per table
+    parser.add_argument("--export", choices=SECTableWriter.FORMATS, default="xlsx", help="Table output format")
+    parser.add_argument("--values", action="store_true",
+                        help="Add float64 value columns, scaled by the table's 'in millions / thousands' note")
+    # table index of the filing (see SECTableIndex): built on first use, later queries skip the html
+    parser.add_argument("--index", action="store_true", help="Query the filing's table index instead of the html")
+    parser.add_argument("--index-dir", help="Table index folder (implies --index)", default=None)
+    parser.add_argument("--regex", action="store_true", help="Treat the keywords as regex patterns")
+    # the primary statements straight from the filing's XBRL, no html tables (see XBRLPresentation)
+    parser.add_argument("--statements", action="store_true",
+                        help="Write the balance sheet, income statement and cash flow from the filing's XBRL")
+    # the 10-K html is kept compressed per CIK / accession, later runs read it from there (see SECDocumentStore)
+    parser.add_argument("--store-dir", help="Document store folder", default=str(SECDocumentStore.STORE_DIR))
+    parser.add_argument("--store-codec", choices=tuple(SECDocumentStore.CODECS), help="Document store compression",
+                        default=SECDocumentStore.DEFAULT_CODEC)
+    parser.add_argument("--no-store", action="store_true",
+                        help="Always download the html and keep nothing (batch mode keeps it in out-dir)")
+    # per stage timings and counters (see SECMetrics)
+    parser.add_argument("--metrics-jsonl", help="Append run metrics to this JSON lines file", default=None)
+    parser.add_argument("--metrics-prom", help="Write run metrics to this Prometheus textfile", default=None)
 
     # Accept unknown args
     args, _ = parser.parse_known_args()
+    if args.stream and args.engine != "lxml":
+        parser.error("--stream needs the lxml engine")
+    batch = bool(args.tickers or args.tickers_file)
+    if args.statements and batch:
+        parser.error("--statements is for one filing, batches: AllDataUserToolScrapingParsingSEC.py --statements")
 
     # Prompt user interactvely if missing arguments
-    if not args.ticker:
+    if not args.ticker and not batch:
         args.ticker = input("Enter company ticker (e.g. AAPL): ").strip()
-    if not args.year:
+    if not args.year and not batch:
         args.year = input("Enter filing year (e.g. 2024): ").strip()
-    if not args.keyword:
-        args.keyword = input("Enter keyword to match table text: ").strip()
+    args.keywords = read_keywords(args.keyword, args.keywords, args.keywords_file)
+    if not args.keywords and not args.statements:
+        args.keywords = [input("Enter keyword to match table text: ").strip()]
+    args.keyword = args.keywords[0] if args.keywords else None
 
     return args
 
+
+# --keyword, --keywords and --keywords-file together, in order, without repeats
+# the file has one keyword (or pattern) per line, blank lines and "#" comments are skipped
+def read_keywords(keyword=None, keywords=None, keywords_file=None) -> list:
+    found = ([keyword] if keyword else []) + list(keywords or [])
+    if keywords_file:
+        with open(keywords_file, encoding="utf-8") as fh:
+            for line in fh:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    found.append(line)
+    return list(dict.fromkeys(found))
+
+
+# workbook of one keyword when a run has several: AAPL_2024_tables.xlsx -> AAPL_2024_tables_cash_flow.xlsx
+def keyword_output_file(output_file, keyword) -> str:
+    slug = re.sub(r"\W+", "_", keyword.lower()).strip("_")[:40] or "keyword"
+    root, ext = os.path.splitext(output_file)
+    return f"{root}_{slug}{ext}"
+
 # go from company ticker to CIK
 def get_cik_from_ticker(ticker: str) -> str:
-    url = TICKER_JSON
-    data = requests.get(url, headers=HEADERS_URL).json()
-    for entry in data.values():
-        # get json mapping from SEC and search of company ticker
-        if entry['ticker'].lower() == ticker.lower():
-            # fetch CIK
-            cik = str(entry['cik_str']).zfill(10)
-            print(f"Found CIK {cik} for ticker {ticker}")
-            return cik
-    raise ValueError(f"Ticker {ticker} not found in SEC database")
-
-# get SEC submisson JSON using CIK
-def get_10k_url(ticker: str, year: str) -> str:
+    # cached, indexed SEC mapping shared with the other scripts (see SECTickerResolver)
+    cik = SECTickerResolver.get_cik_from_ticker(ticker)
+    print(f"Found CIK {cik} for ticker {ticker}")
+    return cik
+
+# get SEC submisson JSON using CIK, returns the CIK and the first 10-K filed in the given year
+def get_10k_filing(ticker: str, year: str):
     cik = get_cik_from_ticker(ticker)
-    json_link = f"{BASE}CIK{cik}.json"
-    print(json_link)
-    headers = HEADERS_URL
-    resp = requests.get(json_link, headers=headers)
-    resp.raise_for_status()
-    if "application/json" not in resp.headers.get("Content-Type", ""):
-        print("Unexpected content:", resp.text[:200])
-        raise RuntimeError(f"Did not receive JSON from SEC for {url}")
-    data = resp.json()
-    forms = data['filings']['recent']
-
-    filings = data.get("filings", {}).get("recent", {})
-    forms = filings.get("form", [])
-    dates = filings.get("filingDate", [])
-    accessions = filings.get("accessionNumber", [])
-    documents = filings.get("primaryDocument", [])
-
-    filings_data = list(zip(forms, dates, accessions, documents))
-    # Sort by date descending
-    filings_data.sort(key=lambda x: x[1], reverse=True)
-
-    # loop through filings and find first 10-K for year
-    for form, date, acc, doc in zip(forms, dates, accessions, documents):
-        #Check form type and date
-        if form.startswith("10-K") and date.startswith(year): #and date == year:
-            # construct URL
-            acc_no_dashes = acc.replace("-", "")
-            filing_url = (
-                f"https://www.sec.gov/Archives/edgar/data/"
-                f"{int(cik)}/{acc_no_dashes}/{doc}"
-            )
-            print(f"Found 10-K filing for {ticker} {year}: {filing_url}")
-            return filing_url  # return immediately
+    print(f"{BASE}CIK{cik}.json")
+    data = SECFilingLocator.load_submissions(cik)
+
+    # first 10-K filed in the given year, filtered straight from the submissions arrays
+    filings = SECFilingLocator.filter_filings(
+        SECFilingLocator.recent_filings(data), forms="10-K", year=year, date_field="filing_date"
+    )
+    if filings:
+        return cik, filings[0]
 
     # if no 10-K found at all
     raise ValueError(f"No 10-K filing found for {ticker} in {year}")
 
-# extract table and parse with Beautiful soup
-def extract_table(table) -> pd.DataFrame | None:
-    # parse table extracting row and cells
-    rows = []
-    for row in table.find_all("tr"):
-        cells = []
-        for cell in row.find_all(["td", "th"]):
-            # normalize unicode
-            txt = unicodedata.normalize("NFKC", cell.get_text(" ", strip=True))
-            # trim trailing commas
-            if txt.endswith(","): txt = txt.rstrip(",")
-            # fix non-breaking spaces
-            txt = txt.replace(u'\xa0', ' ')
-            #skip lone % and $
-            if txt not in ["$", "%"]:
-                # convert negtaive values in paranthesis into numbers with "-" sign prefix
-                if txt.startswith("(") and txt.endswith(")"):
-                    txt = "-" + txt[1:-1]
-                cells.append(txt)
-        if cells:
-            cleaned = []
-            for c in cells:
-                if not cleaned or c != cleaned[-1]:
-                    cleaned.append(c)
-            rows.append(cleaned)
-    # rows should be greater than 3 cells in length
-    if not rows or len(rows) < MIN_ROWS:
-        return None
-
-    header = [c.strip().lower() for c in rows[0]]
-    first_col = [r[0].strip().lower() for r in rows]
-    # filtering tables with headers/first column with "page" or "index"
-    # these would be table of content data
-    if any(k in header + first_col for k in ("page", "index")):
-        return None
-    # padding row ton same length
-    max_cols = max(len(r) for r in rows)
-    rows = [r + ['']*(max_cols-len(r)) for r in rows]
-    df = pd.DataFrame(rows)
-    # reject tables with less than 3 columns after padding
-    if df.shape[1] < MIN_COLS:
-        return None
-    return df
 
-# main workflow
-def main():
-    # call parser
-    args = parse_args()
-    try:
-        url = get_10k_url(args.ticker, args.year)
-    except Exception as e:
-        log.error(f"Failed to retrieve filing: {e}")
-        return
+def get_10k_url(ticker: str, year: str) -> str:
+    cik, filing = get_10k_filing(ticker, year)
+    # construct URL
+    filing_url = f"{SECFilingLocator.filing_base_url(cik, filing.accession)}{filing.primary_document}"
+    print(f"Found 10-K filing for {ticker} {year}: {filing_url}")
+    return filing_url
+
+# raw cell text per row: a Beautiful soup table, or the rows SECTableExtractor already read
+def table_cells(table) -> list:
+    if isinstance(table, list):
+        return table
+    return [
+        [cell.get_text(" ", strip=True) for cell in row.find_all(["td", "th"])]
+        for row in table.find_all("tr")
+    ]
 
-    # get HTML doc
-    response = requests.get(url, headers=HEADERS_URL)
-    response.raise_for_status()
-    soup = BeautifulSoup(response.text, "lxml")
+# extract table and clean its cells (see SECTableCleaning)
+def extract_table(table) -> pd.DataFrame | None:
+    return SECTableCleaning.clean_tables([table_cells(table)], MIN_ROWS, MIN_COLS)[0]
 
-    # search table for key word given by user
+# search table for key word given by user
+def find_target_tables(html, keyword, engine="lxml"):
+    if engine == "lxml":
+        return SECTableExtractor.find_tables(html, keyword)
+    soup = BeautifulSoup(html, "lxml")
     all_tables = soup.find_all("table")
-    target_tables = [
+    SECMetrics.incr("tables_scanned", len(all_tables))
+    return [
         t for t in all_tables
-        if args.keyword.lower() in t.get_text(" ", strip=True).lower()
+        if keyword.lower() in t.get_text(" ", strip=True).lower()
     ]
 
-    log.info(f"Found {len(target_tables)} matching tables for keyword '{args.keyword}'")
-    if not target_tables:
-        log.warning("No matching tables found.")
-        return
-
-    output_dir = "tables_output"
-    os.makedirs(output_dir, exist_ok=True)
-    output_file = os.path.join(output_dir, f"{args.ticker}_{args.year}_tables.xlsx")
 
-    # save valid tables into excel file (1 per sheet)
-    with pd.ExcelWriter(output_file, engine="openpyxl") as writer:
-        for i, table_tag in enumerate(target_tables):
-            df = extract_table(table_tag)
+# every keyword's tables from one parse of the html: keyword -> tables
+# each table is classified once against all keywords (see SECTableExtractor.KeywordMatcher)
+# html can also be the chunks of a streamed response (lxml engine), encoding is then its charset
+# max_tables keeps the first tables per keyword, lxml stops reading once every keyword has them
+def find_keyword_tables(html, keywords, engine="lxml", regex=False, max_tables=None, encoding=None) -> dict:
+    matcher = SECTableExtractor.KeywordMatcher(keywords, regex)
+    if engine == "lxml":
+        return SECTableExtractor.find_tables_multi(html, matcher, max_tables, encoding)
+    soup = BeautifulSoup(html, "lxml")
+    all_tables = soup.find_all("table")
+    SECMetrics.incr("tables_scanned", len(all_tables))
+    matches = {k: [] for k in matcher.keywords}
+    for t in all_tables:
+        for k in matcher.match(t.get_text(" ", strip=True)):
+            matches[k].append(t)
+    return {k: tables[:max_tables] for k, tables in matches.items()}
+
+
+# save valid tables (1 per sheet, or 1 file per table for csv / parquet), returns how many were written
+# each table goes to disk as soon as it is cleaned (see SECTableWriter)
+# values=True adds the float64 value columns (see SECTableCleaning.add_value_columns)
+def save_tables(target_tables, output_file, export_format="xlsx", values=False) -> int:
+    saved = 0
+    # every table's cells are cleaned and deduplicated in one vectorized pass
+    frames = SECTableCleaning.clean_tables(
+        [table_cells(t) for t in target_tables], MIN_ROWS, MIN_COLS, dedupe=True
+    )
+    writer = SECTableWriter.open_writer(output_file, export_format)
+    try:
+        for i, df in enumerate(frames):
             if df is None:
                 continue
-            df = df.drop_duplicates().fillna("")
-            df = df.loc[:, ~df.T.duplicated()]
+            df = df.fillna("")
+            if values:
+                df = SECTableCleaning.add_value_columns(df)
+                # xlsx cells cannot hold NaN, text cells of the value columns stay blank
+                if export_format == "xlsx":
+                    df = df.fillna("")
             sheet_name = f"table_{i}"[:31]
-            df.to_excel(writer, sheet_name=sheet_name, index=False)
+            writer.add(sheet_name, df)
             log.info(f"Saved table {i} to sheet '{sheet_name}'")
+            saved += 1
+    finally:
+        writer.close()
+    SECMetrics.incr("tables_kept", saved)
+    return saved
+
+
+# CPU bound half of the workflow: 10-K html -> excel workbook
+def extract_tables_to_excel(html, keyword, output_file, engine="lxml", export_format="xlsx", values=False) -> int:
+    with SECMetrics.stage("find_tables"):
+        target_tables = find_target_tables(html, keyword, engine)
+    return export_tables(target_tables, keyword, output_file, export_format, values)
+
+
+# CPU bound half for several keywords: one parse, one workbook per keyword
+# (output_file itself when there is only one), returns keyword -> tables written
+def extract_keywords_to_excel(html, keywords, output_file, engine="lxml", regex=False, export_format="xlsx",
+                              values=False, max_tables=None, encoding=None) -> dict:
+    # for a streamed response this includes the download
+    with SECMetrics.stage("find_tables"):
+        matches = find_keyword_tables(html, keywords, engine, regex, max_tables, encoding)
+    return export_keyword_tables(matches, output_file, export_format, values)
+
+
+def export_keyword_tables(matches, output_file, export_format="xlsx", values=False) -> dict:
+    if len(matches) == 1:
+        return {k: export_tables(tables, k, output_file, export_format, values) for k, tables in matches.items()}
+    saved = {}
+    used = set()
+    for k, tables in matches.items():
+        keyword_file = keyword_output_file(output_file, k)
+        # "cash flow" and "cash-flow" share a name, later ones get a number
+        root, ext = os.path.splitext(keyword_file)
+        n = 1
+        while keyword_file in used:
+            n += 1
+            keyword_file = f"{root}_{n}{ext}"
+        used.add(keyword_file)
+        saved[k] = export_tables(tables, k, keyword_file, export_format, values)
+    return saved
+
+
+# matching tables (from the html or the table index) -> excel workbook
+def export_tables(target_tables, keyword, output_file, export_format="xlsx", values=False) -> int:
+    log.info(f"Found {len(target_tables)} matching tables for keyword '{keyword}'")
+    if not target_tables:
+        log.warning("No matching tables found.")
+        return 0
+
+    with SECMetrics.stage("excel_export"):
+        saved = save_tables(target_tables, output_file, export_format, values)
+    if not saved:
+        log.warning("No matching table had enough rows and columns to save.")
+        return 0
+    log.info(f"All valid tables saved to {SECTableWriter.output_path(output_file, export_format)}")
+    return saved
+
+
+# the 10-K html as the table parsers take it, its charset (None: read from the document) and the response
+# a stored document is read back through the decompressing stream without asking the SEC (response None),
+# a download goes into the store on the way: in one piece, or chunk by chunk as the parser reads it
+def open_html(url, store=None, stream=False):
+    path = store.path_for_url(url) if store else None
+    if path is not None and path.exists():
+        log.info(f"Reading {url} from the document store")
+        return SECDocumentStore.open_document(path), None, None
+    # streamed: only the headers are in, the body is read by the table parser
+    with SECMetrics.stage("fetch_html"):
+        response = SECHttpClient.get_client().get(url, headers=HEADERS_URL, stream=stream)
+        response.raise_for_status()
+    if not stream:
+        if path is not None:
+            store.write(path, response.content)
+        return response.text, None, response
+    # same charset response.text would decode with
+    chunks = SECHttpClient.iter_body(response)
+    return (store.tee(path, chunks) if path is not None else chunks), response.encoding, response
+
+
+# inline XBRL facts of the same 10-K document -> sec_xbrl_facts.csv / sec_xbrl_contexts.csv in out_dir
+def extract_inline_facts(html_bytes, out_dir) -> int:
+    storage_values = {}
+    with SECMetrics.stage("parse_inline_doc"):
+        XBRLStreamParsing.parse_inline_doc_stream(io.BytesIO(html_bytes), storage_values, [], {})
+    facts = storage_values.get("_facts_list", [])
+    with SECMetrics.stage("write_csv"):
+        AllDataUserToolScrapingParsingSEC.write_csv([], storage_values, out_dir)
+    log.info(f"Saved {len(facts)} inline XBRL facts to {out_dir}")
+    return len(facts)
+
+
+# balance sheet, income statement and cash flow of one filing from its instance and linkbases,
+# a lookup in the tagged facts instead of a search through the html tables
+# documents go through the store (a throwaway folder without one), returns statement kind -> lines
+def extract_statements(cik, filing, output_file, store=None, export_format="xlsx") -> dict:
+    with SECMetrics.stage("locate"):
+        fmap = SECFilingLocator.probe_filing(cik, filing, inline=True)
+    if not fmap:
+        log.warning(f"No XBRL documents found for {filing.accession}")
+        return {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        directory = store or tmp_dir
+        with SECMetrics.stage("download"):
+            SECAsyncDownloader.download_all(fmap, directory)
+        xml_files = AllDataUserToolScrapingParsingSEC.find_xml_files(fmap, directory)
+        storage_values = {}
+        with SECMetrics.stage("parse_instance_doc"):
+            AllDataUserToolScrapingParsingSEC.parse_instance_doc(xml_files["htm"], storage_values, [], {})
+        written = AllDataUserToolScrapingParsingSEC.write_statements(
+            xml_files, storage_values, output_file, export_format
+        )
+    for kind, lines in written.items():
+        log.info(f"Saved {kind} ({lines} lines)")
+    if written:
+        log.info(f"Statements saved to {SECTableWriter.output_path(output_file, export_format)}")
+    else:
+        log.warning("No balance sheet, income statement or cash flow role found in the presentation linkbase.")
+    return written
+
+
+def run_statements(args):
+    try:
+        with SECMetrics.stage("get_10k_url"):
+            cik, filing = get_10k_filing(args.ticker, args.year)
+    except Exception as e:
+        log.error(f"Failed to retrieve filing: {e}")
+        return
+    store = None if args.no_store else SECDocumentStore.DocumentStore(args.store_dir, args.store_codec)
+    output_file = os.path.join(args.out_dir, f"{args.ticker}_{args.year}_statements.xlsx")
+    with SECMetrics.filing(args.ticker.upper(), filing.accession):
+        return extract_statements(cik, filing, output_file, store, args.export)
+
+
+# main workflow
+def main():
+    # call parser
+    args = parse_args()
+    # starts the run clock for the metrics
+    SECMetrics.get_metrics()
+    try:
+        return run(args)
+    finally:
+        SECMetrics.export(args.metrics_jsonl, args.metrics_prom)
+
+
+def run(args):
+    if args.tickers or args.tickers_file:
+        tickers = SECBatchPipeline.read_tickers(args.tickers, args.tickers_file)
+        return SECBatchPipeline.run_tables_batch(
+            tickers, args.keywords, args.out_dir, start=args.start, end=args.end,
+            year=args.year, workers=args.workers, processes=args.processes, facts=args.facts,
+            engine=args.engine, regex=args.regex, export_format=args.export, values=args.values,
+            store_dir=None if args.no_store else args.store_dir, store_codec=args.store_codec,
+            max_tables=args.max_tables,
+        )
+    if args.statements:
+        return run_statements(args)
+
+    try:
+        with SECMetrics.stage("get_10k_url"):
+            url = get_10k_url(args.ticker, args.year)
+    except Exception as e:
+        log.error(f"Failed to retrieve filing: {e}")
+        return
+
+    accession = AllDataUserToolScrapingParsingSEC.format_accession(url.rsplit("/", 2)[-2])
+    index = None
+    if args.index or args.index_dir:
+        index = SECTableIndex.TableIndex.for_url(url, args.index_dir)
+    # the inline facts need the whole document, so --facts downloads it in one piece
+    stream = args.stream and not args.facts
+    if args.stream and args.facts:
+        log.warning("--facts needs the whole document, not streaming the html")
+    store = None if args.no_store else SECDocumentStore.DocumentStore(args.store_dir, args.store_codec)
+    with SECMetrics.filing(args.ticker.upper(), accession):
+        # get HTML doc, not needed when the index already holds the tables
+        html, encoding, response = None, None, None
+        if index is None or not index.exists() or args.facts:
+            html, encoding, response = open_html(url, store, stream)
+
+        output_dir = args.out_dir
+        output_file = os.path.join(output_dir, f"{args.ticker}_{args.year}_tables.xlsx")
+        try:
+            if index is None:
+                extract_keywords_to_excel(
+                    html, args.keywords, output_file, args.engine, args.regex, args.export, args.values,
+                    args.max_tables, encoding,
+                )
+            else:
+                if not index.exists():
+                    with SECMetrics.stage("build_index"):
+                        index.build(html, url, encoding)
+                    log.info(f"Built table index in {index.path}")
+                with SECMetrics.stage("query_index"):
+                    search = index.search_regex if args.regex else index.search
+                    matches = {k: search(k)[:args.max_tables] for k in args.keywords}
+                export_keyword_tables(matches, output_file, args.export, args.values)
+        finally:
+            # a search that stopped early leaves the rest of a streamed body unread
+            if hasattr(html, "close"):
+                html.close()
+            if response is not None:
+                response.close()
+        if args.facts:
+            raw = response.content if response is not None else SECDocumentStore.read_document(store.path_for_url(url))
+            extract_inline_facts(raw, os.path.join(output_dir, f"{args.ticker}_{args.year}_facts"))
 
-    log.info(f"All valid tables saved to {output_file}")
 if __name__ == "__main__":
     main()
 
@@ -13,7 +13,9 @@ import xml.etree.ElementTree as ET
 import lxml.etree as ETL
 import requests
 import argparse
-import time
+import SECFilingLocator
+import SECHttpClient
+import SECTickerResolver
 from bs4 import BeautifulSoup
 
 # map ticker to CIK
@@ -55,74 +57,28 @@ def parse_args():
 
 # go from company ticker to CIK
 def get_cik_from_ticker(ticker: str) -> str:
-    url = TICKER_JSON
-    data = requests.get(url, headers=HEADERS_URL).json()
-    for entry in data.values():
-        # get json mapping from SEC and search of company ticker
-        if entry['ticker'].lower() == ticker.lower():
-            # fetch CIK
-            cik = str(entry['cik_str']).zfill(10)
-            print(f"Found CIK {cik} for ticker {ticker}")
-            return cik
-    raise ValueError(f"Ticker {ticker} not found in SEC database")
+    # cached, indexed SEC mapping shared with the other scripts (see SECTickerResolver)
+    cik = SECTickerResolver.get_cik_from_ticker(ticker)
+    print(f"Found CIK {cik} for ticker {ticker}")
+    return cik
 
 # creates a mapping for xml documents and their urls
-def get_url(cik, ticker, year: str) -> str:
+# year / forms narrow the candidates from the submissions arrays before any index.json is fetched
+def get_url(cik, ticker, year: str, forms=None) -> dict:
     # cik = get_cik_from_ticker(ticker)
-    json_link = f"{SUB_URL}CIK{cik}.json"
-    print(json_link)
-    headers = HEADERS_URL
-    resp = requests.get(json_link, headers=headers)
-    resp.raise_for_status()
-    if "application/json" not in resp.headers.get("Content-Type", ""):
-        print("Unexpected content:", resp.text[:200])
-        raise RuntimeError(f"Did not receive JSON from SEC for {url}")
-    data = resp.json()
-    forms = data['filings']['recent']
-
-    filings = data.get("filings", {}).get("recent", {})
-    forms = filings.get("form", [])
-    dates = filings.get("filingDate", [])
-    accessions = filings.get("accessionNumber", [])
-    documents = filings.get("primaryDocument", [])
-
-    filings_data = list(zip(forms, dates, accessions, documents))
-    # Sort by date descending
-    filings_data.sort(key=lambda x: x[1], reverse=True)
-
-    for form, date, acc, doc in filings_data:
-        acc_no_dashes = acc.replace("-", "")
-        # Build base URL
-        base_url = f"{BASE}{int(cik)}/{acc_no_dashes}/"
-
-        # Fetch filing's index.json (listing all files)
-        index_url = f"{base_url}index.json"
-        print(index_url)
-        try:
-            r = requests.get(index_url, headers=headers)
-            r.raise_for_status()
-            idx_data = r.json()
-
-            # Collect the relevant XML files found here
-            found_files = {}
-            for file_entry in idx_data.get("directory", {}).get("item", []):
-                name = file_entry.get("name", "")
-                # Check if file is one of the XML types you want
-                if any(suffix in name for suffix in ["_def.xml", "_htm.xml", "_lab.xml", "_cal.xml"]):
-                    # Use keys without extensions for clarity or keep names as is
-                    found_files[name] = base_url + name
-
-            # If found at least the instance document (_htm.xml), consider success
-            if any("_htm.xml" in fname for fname in found_files):
-                print(f"Found filing with required XMLs at: {index_url}")
-                print(found_files)
-                # Scans the directory items for the XML files you want (_def.xml, _htm.xml, _lab.xml, _cal.xml
-                # returns dict with found required elements of fmap (some may be missing)
-                return found_files  # Return dictionary of files with full URLs
-
-        except requests.RequestException as e:
-            print(f"Error fetching {index_url}: {e}")
-            continue  # Try next filing
+    print(f"{SUB_URL}CIK{cik}.json")
+    matches = SECFilingLocator.locate(
+        cik, forms=forms, year=year or None, first=True,
+        suffixes=["_def.xml", "_htm.xml", "_lab.xml", "_cal.xml"]
+    )
+
+    if matches:
+        filing, found_files = matches[0]
+        index_url = f"{SECFilingLocator.filing_base_url(cik, filing.accession)}index.json"
+        print(f"Found filing with required XMLs at: {index_url}")
+        print(found_files)
+        # returns dict with found required elements of fmap (some may be missing)
+        return found_files  # return dictionary of files with full URLs
 
     # If none found
     raise ValueError(f"No filing found with required XML files for CIK {cik} and year {year}")
@@ -372,8 +328,7 @@ def main():
             file_lab = sec_directory / fname
         if not fpath.exists():
             try:
-                response = requests.get(url, headers=HEADERS_URL)
-                time.sleep(0.2) 
+                response = SECHttpClient.get_client().get(url, headers=HEADERS_URL)
                 #response = requests.get(f"{BASE}/{tail}", headers = HEADERS_URL)
                 response.raise_for_status()
                 fpath.write_bytes(response.content)
@@ -0,0 +1,220 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# calculation linkbase as a queryable graph, and a roll-up check of the facts against it
+# summation-item arcs are kept as flat numpy arrays (role, parent, child, weight, order) sorted by
+# role / parent / order, so every summation is one contiguous slice and each role a slice of those
+# the check binds every summation to every context / unit its total is reported in and
+# evaluates all of them at once: item facts found with one searchsorted over packed fact keys,
+# weighted sums with one bincount, no loop per summation, context or filing size
+#
+# XBRL 2.1 semantics used here:
+#   a summation is checked when its total and at least one item are reported (missing items count as 0)
+#   items are rounded to their own decimals, the sum and the total to the total's decimals, then compared
+#   duplicate facts (same concept, context and unit) use the first one reported
+
+import collections
+
+import numpy as np
+import pandas as pd
+
+import SECMetrics
+import XBRLStreamParsing
+
+CALCULATION_LINK = f"{XBRLStreamParsing.LINK_NS}calculationLink"
+
+# XBRL 2.1 and calculations 1.1 arcroles
+SUMMATION_ITEM = ("http://www.xbrl.org/2003/arcrole/summation-item", "https://xbrl.org/2023/arcrole/summation-item")
+
+# one row per (summation, context, unit) that binds
+CHECK_COLUMNS = ("role", "parent", "context", "unit", "reported", "computed", "decimals", "items", "consistent")
+
+# arcs of one role, views into the graph arrays
+RoleArcs = collections.namedtuple("RoleArcs", ["parent", "child", "weight", "order"])
+
+
+# loc href "...us-gaap-2023.xsd#us-gaap_Revenues" -> "us-gaap;Revenues", the gaap id facts are filed under
+def concept_id(href) -> str:
+    fragment = href.rpartition("#")[2]
+    prefix, _, local = fragment.partition("_")
+    return f"{prefix};{local}" if local else prefix
+
+
+class CalculationGraph:
+
+    # arcs as parallel sequences of role codes, parent / child concept codes, weights and orders
+    def __init__(self, roles, concepts, role, parent, child, weight, order):
+        self.roles = list(roles)
+        self.concepts = list(concepts)
+        self.codes = {concept: code for code, concept in enumerate(self.concepts)}
+        role = np.asarray(role, dtype=np.int32)
+        parent = np.asarray(parent, dtype=np.int32)
+        order = np.asarray(order, dtype=np.float64)
+        arcs = np.lexsort((order, parent, role))
+        self.role = role[arcs]
+        self.parent = parent[arcs]
+        self.child = np.asarray(child, dtype=np.int32)[arcs]
+        self.weight = np.asarray(weight, dtype=np.float64)[arcs]
+        self.order = order[arcs]
+        # summation s (one per role and parent) is arcs starts[s]:starts[s + 1]
+        first = np.ones(len(arcs), dtype=bool)
+        first[1:] = (self.role[1:] != self.role[:-1]) | (self.parent[1:] != self.parent[:-1])
+        self.starts = np.append(np.flatnonzero(first), len(arcs))
+        # role r is arcs role_starts[r]:role_starts[r + 1]
+        self.role_starts = np.searchsorted(self.role, np.arange(len(self.roles) + 1))
+
+    # one pass over a _cal.xml (plain or from the document store)
+    # loc labels are local to their link, so arcs are resolved when the link closes
+    @classmethod
+    def from_linkbase(cls, file_path):
+        roles = {}
+        concepts = {}
+        columns = ([], [], [], [], [])
+        prohibited = set()
+        locs = {}
+        arcs = []
+        wanted = ("calculationLink", "loc", "calculationArc")
+        for record in XBRLStreamParsing.iter_linkbase(file_path, CALCULATION_LINK, "calculation", wanted):
+            if isinstance(record, XBRLStreamParsing.LocRecord):
+                locs.setdefault(record.label, concept_id(record.href or ""))
+                continue
+            if isinstance(record, XBRLStreamParsing.ArcRecord):
+                if record.arcrole in SUMMATION_ITEM:
+                    arcs.append(record)
+                continue
+            role = roles.setdefault(record.role, len(roles))
+            for arc in arcs:
+                if arc.from_label not in locs or arc.to_label not in locs:
+                    continue
+                parent = concepts.setdefault(locs[arc.from_label], len(concepts))
+                child = concepts.setdefault(locs[arc.to_label], len(concepts))
+                if arc.attrs.get("use") == "prohibited":
+                    prohibited.add((role, parent, child))
+                    continue
+                weight = 1.0 if arc.weight is None else arc.weight
+                order = 1.0 if arc.order is None else arc.order
+                for column, value in zip(columns, (role, parent, child, weight, order)):
+                    column.append(value)
+            locs = {}
+            arcs = []
+
+        if prohibited:
+            keep = [i for i, key in enumerate(zip(*columns[:3])) if key not in prohibited]
+            columns = tuple([column[i] for i in keep] for column in columns)
+        return cls(roles, concepts, *columns)
+
+    def __len__(self):
+        return len(self.parent)
+
+    def arcs(self, role) -> RoleArcs:
+        r = self.roles.index(role)
+        window = slice(self.role_starts[r], self.role_starts[r + 1])
+        return RoleArcs(self.parent[window], self.child[window], self.weight[window], self.order[window])
+
+    # [(item concept, weight)] of a total in arc order, in one role or in all of them
+    def children(self, concept, role=None) -> list:
+        code = self.codes.get(concept)
+        if code is None or (role is not None and role not in self.roles):
+            return []
+        mask = self.parent == code
+        if role is not None:
+            mask &= self.role == self.roles.index(role)
+        return [(self.concepts[c], float(w)) for c, w in zip(self.child[mask].tolist(), self.weight[mask].tolist())]
+
+    # every arc as a row: role, parent, child, weight, order
+    def to_frame(self) -> pd.DataFrame:
+        roles = np.array(self.roles, dtype=object)
+        concepts = np.array(self.concepts, dtype=object)
+        return pd.DataFrame({
+            "role": roles[self.role], "parent": concepts[self.parent], "child": concepts[self.child],
+            "weight": self.weight, "order": self.order,
+        })
+
+
+# decimals attribute text -> float64 (inf for "INF", NaN when missing or unreadable)
+def _decimals(texts) -> np.ndarray:
+    s = pd.Series(list(texts) + [None], dtype=object).astype("string").str.strip()
+    out = pd.to_numeric(s, errors="coerce").to_numpy(dtype="float64", na_value=np.nan, copy=True)
+    out[(s.str.upper() == "INF").fillna(False).to_numpy()] = np.inf
+    return out
+
+
+# round to a per value number of decimals (negative: tens, thousands, ...), INF / missing left as they are
+def _round(values, decimals) -> np.ndarray:
+    finite = np.isfinite(decimals)
+    d = np.where(finite, decimals, 0.0)
+    # powers of ten up to 1e22 are exact, dividing by them keeps whole numbers whole
+    power = 10.0 ** np.abs(d)
+    rounded = np.where(d < 0, np.round(values / power) * power, np.round(values * power) / power)
+    return np.where(finite, rounded, values)
+
+
+# run i of a repeat(...) layout: 0, 1, .. counts[i] - 1 for every i, concatenated
+def _ranks(counts) -> np.ndarray:
+    return np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+
+
+# every summation of the graph checked against the facts parse_instance_doc left in storage_values
+def check_calculations(graph, storage_values) -> pd.DataFrame:
+    store = storage_values.get("_facts_list")
+    if store is None or not len(store) or not len(graph):
+        return pd.DataFrame(columns=list(CHECK_COLUMNS))
+
+    # fact columns straight from the FactStore codes, concepts recoded to the graph's (-1: not in it),
+    # contexts / units shifted by one so a missing one (NULL_CODE) packs as 0
+    strings = store.strings.strings
+    to_concept = np.array([graph.codes.get(s, -1) for s in strings] + [-1], dtype=np.int64)
+    concept = to_concept[np.frombuffer(store.columns["gaap_id_candidate"], dtype=np.int32)]
+    context = np.frombuffer(store.columns["contextRef"], dtype=np.int32).astype(np.int64) + 1
+    unit = np.frombuffer(store.columns["unitRef"], dtype=np.int32).astype(np.int64) + 1
+    value = np.frombuffer(store.columns["value_numeric"], dtype=np.float64)
+    decimals = _decimals(strings)[np.frombuffer(store.columns["decimals"], dtype=np.int32)]
+
+    # (concept, context, unit) packed into one sortable key, first fact per key
+    width = len(strings) + 1
+    rows = np.flatnonzero((concept >= 0) & ~np.isnan(value))
+    keys, first = np.unique((concept[rows] * width + context[rows]) * width + unit[rows], return_index=True)
+    rows = rows[first]
+    if not len(rows):
+        return pd.DataFrame(columns=list(CHECK_COLUMNS))
+
+    # checks: every reported total against every summation it is the parent of (all roles)
+    sum_parent = graph.parent[graph.starts[:-1]]
+    by_parent = np.argsort(sum_parent, kind="stable")
+    low = np.searchsorted(sum_parent[by_parent], concept[rows], "left")
+    per_fact = np.searchsorted(sum_parent[by_parent], concept[rows], "right") - low
+    total = np.repeat(rows, per_fact)
+    summation = by_parent[np.repeat(low, per_fact) + _ranks(per_fact)]
+
+    # items: every arc of each check, looked up in the same context and unit as the total
+    n_arcs = np.diff(graph.starts)[summation]
+    check = np.repeat(np.arange(len(summation)), n_arcs)
+    arc = np.repeat(graph.starts[summation], n_arcs) + _ranks(n_arcs)
+    item_keys = (graph.child[arc] * width + context[total][check]) * width + unit[total][check]
+    found_at = np.minimum(np.searchsorted(keys, item_keys), len(keys) - 1)
+    found = keys[found_at] == item_keys
+    item = rows[found_at]
+    contribution = np.where(found, graph.weight[arc] * _round(value[item], decimals[item]), 0.0)
+
+    computed = np.bincount(check, weights=contribution, minlength=len(summation))
+    items = np.bincount(check, weights=found, minlength=len(summation)).astype(np.int64)
+    bound = items > 0
+    total, summation, computed, items = total[bound], summation[bound], computed[bound], items[bound]
+    reported = value[total]
+    places = decimals[total]
+    consistent = np.isclose(_round(computed, places), _round(reported, places), rtol=1e-12, atol=0.0)
+
+    SECMetrics.incr("calculations_checked", len(total))
+    SECMetrics.incr("calculations_inconsistent", int((~consistent).sum()))
+    lookup = np.array(strings + [None], dtype=object)
+    return pd.DataFrame({
+        "role": np.array(graph.roles, dtype=object)[graph.role[graph.starts[summation]]],
+        "parent": np.array(graph.concepts, dtype=object)[graph.parent[graph.starts[summation]]],
+        "context": lookup[context[total] - 1],
+        "unit": lookup[unit[total] - 1],
+        "reported": reported,
+        "computed": computed,
+        "decimals": places,
+        "items": items,
+        "consistent": consistent,
+    }, columns=list(CHECK_COLUMNS))
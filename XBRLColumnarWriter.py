@@ -0,0 +1,168 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# columnar output next to write_csv: Parquet (default) or Arrow IPC files with real types
+# float values, date32 periods, dictionary encoded concepts / contexts / units,
+# laid out as hive style partitions so analytics jobs can read one ticker or filing directly:
+#   <out_dir>/facts/ticker=AAPL/accession=0000320193-23-000106/form=10-K/part-0.parquet
+# pyarrow is optional, only needed when this writer is used
+
+import pathlib
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+FORMATS = ("parquet", "arrow")
+
+# partition keys in path order
+PARTITION_KEYS = ("ticker", "accession", "form")
+
+
+def _require_pyarrow():
+    if pa is None:
+        raise RuntimeError("Columnar output needs pyarrow (pip install pyarrow)")
+
+
+# dictionary column from FactStore codes, the strings are not re-interned:
+# the codes are renumbered so each column's dictionary holds only the strings it uses
+def _dictionary_column(store, name):
+    codes = np.frombuffer(store.columns[name], dtype=np.int32)
+    missing = codes < 0
+    used, indices = np.unique(codes[~missing], return_inverse=True)
+    column_indices = np.zeros(len(codes), dtype=np.int32)
+    column_indices[~missing] = indices
+    strings = store.strings.strings
+    dictionary = pa.array([strings[code] for code in used.tolist()], type=pa.string())
+    return pa.DictionaryArray.from_arrays(pa.array(column_indices, type=pa.int32(), mask=missing), dictionary)
+
+
+def _dictionary_from_values(values):
+    return pa.array(values, type=pa.string()).dictionary_encode()
+
+
+def _date_column(values):
+    dates = pd.to_datetime(pd.Series(values, dtype=object), errors="coerce", format="%Y-%m-%d")
+    return pa.array(dates.dt.date, type=pa.date32(), from_pandas=True)
+
+
+def facts_table(storage_values):
+    store = storage_values.get("_facts_list")
+    if store is None or not len(store):
+        return None
+    contexts = storage_values.get("_contexts", {})
+
+    # period columns joined from the context map, so facts can be filtered by date directly
+    context_refs = store.column("contextRef")
+    empty = {}
+    period_start = [contexts.get(ref, empty).get("period_start") for ref in context_refs]
+    period_end = [contexts.get(ref, empty).get("period_end") for ref in context_refs]
+    instant = [contexts.get(ref, empty).get("instant") for ref in context_refs]
+
+    values = np.frombuffer(store.columns["value_numeric"], dtype=np.float64)
+    return pa.table({
+        "tag_prefix": _dictionary_column(store, "tag_prefix"),
+        "tag_local": _dictionary_column(store, "tag_local"),
+        "concept": _dictionary_column(store, "gaap_id_candidate"),
+        "context_ref": _dictionary_column(store, "contextRef"),
+        "unit_ref": _dictionary_column(store, "unitRef"),
+        "decimals": _dictionary_column(store, "decimals"),
+        "value_raw": pa.array(store.column("value_raw"), type=pa.large_string()),
+        "value_numeric": pa.array(values, type=pa.float64(), mask=np.isnan(values)),
+        "period_start": _date_column(period_start),
+        "period_end": _date_column(period_end),
+        "instant": _date_column(instant),
+    })
+
+
+def contexts_table(storage_values):
+    contexts = storage_values.get("_contexts", {})
+    if not contexts:
+        return None
+    rows = list(contexts.items())
+    return pa.table({
+        "context_ref": pa.array([k for k, _ in rows], type=pa.string()),
+        "entity_identifier": _dictionary_from_values([v.get("entity_identifier") for _, v in rows]),
+        "period_start": _date_column([v.get("period_start") for _, v in rows]),
+        "period_end": _date_column([v.get("period_end") for _, v in rows]),
+        "instant": _date_column([v.get("instant") for _, v in rows]),
+    })
+
+
+def units_table(storage_values):
+    units = storage_values.get("_units", {})
+    if not units:
+        return None
+    rows = list(units.items())
+    return pa.table({
+        "unit_ref": pa.array([k for k, _ in rows], type=pa.string()),
+        "measures": pa.array([v.get("measures") or [] for _, v in rows], type=pa.list_(pa.string())),
+    })
+
+
+# storage_list as (entry, file, label, value) rows, the long format of sec_xbrl_scrape_content.csv
+def linkbase_table(storage_list):
+    entries, files, labels, values = [], [], [], []
+    for i, (ns_label, data) in enumerate(storage_list):
+        if not isinstance(data, dict):
+            continue
+        for k, v in data.items():
+            entries.append(i)
+            files.append(ns_label)
+            labels.append(k)
+            values.append(None if v is None else str(v))
+    if not entries:
+        return None
+    return pa.table({
+        "entry": pa.array(entries, type=pa.int32()),
+        "file": _dictionary_from_values(files),
+        "label": _dictionary_from_values(labels),
+        "value": pa.array(values, type=pa.string()),
+    })
+
+
+def partition_dir(base, ticker=None, accession=None, form=None):
+    path = pathlib.Path(base)
+    for key, value in zip(PARTITION_KEYS, (ticker, accession, form)):
+        if value:
+            path = path / f"{key}={str(value).replace('/', '_')}"
+    return path
+
+
+def _write_table(table, directory, fmt):
+    directory.mkdir(parents=True, exist_ok=True)
+    if fmt == "parquet":
+        path = directory / "part-0.parquet"
+        pq.write_table(table, path, compression="zstd")
+    else:
+        path = directory / "part-0.arrow"
+        feather.write_feather(table, path, compression="zstd")
+    return path
+
+
+# writes facts / contexts / units / linkbase tables under out_dir, returns the files written
+def write_columnar(storage_list, storage_values, out_dir=None, ticker=None, accession=None, form=None, fmt="parquet"):
+    _require_pyarrow()
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown columnar format {fmt}, expected one of {FORMATS}")
+    out_dir = pathlib.Path(out_dir) if out_dir else pathlib.Path.cwd().joinpath("sec_xbrl_columnar")
+
+    tables = {
+        "facts": facts_table(storage_values),
+        "contexts": contexts_table(storage_values),
+        "units": units_table(storage_values),
+        "linkbase": linkbase_table(storage_list),
+    }
+    written = []
+    for name, table in tables.items():
+        if table is None:
+            continue
+        directory = partition_dir(out_dir / name, ticker, accession, form)
+        written.append(_write_table(table, directory, fmt))
+    return written
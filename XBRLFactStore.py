@@ -0,0 +1,244 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# compact, columnar storage for instance document facts
+# instead of one 8-key dict per fact (stored twice), facts live in a FactStore:
+# repeated strings (tags, prefixes, contextRef, unitRef, decimals) are kept once in a
+# string table and referenced by int codes, numbers go in a float array,
+# value_raw (nearly always distinct) is packed into one utf-8 buffer with end offsets,
+# and per-concept fact lists are just arrays of row numbers into the store
+
+import array
+import math
+
+import XBRLNumeric
+
+# column order matches the old fact dicts, so to_dict() / repr() read the same as before
+COLUMNS = ("tag_local", "tag_prefix", "gaap_id_candidate", "contextRef", "unitRef", "decimals", "value_raw", "value_numeric")
+CODED_COLUMNS = ("tag_local", "tag_prefix", "gaap_id_candidate", "contextRef", "unitRef", "decimals")
+
+# code for a missing (None) value in a coded column
+NULL_CODE = -1
+
+
+class StringTable:
+
+    def __init__(self):
+        self.codes = {}
+        self.strings = []
+
+    def code(self, value):
+        if value is None:
+            return NULL_CODE
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.strings)
+            self.codes[value] = code
+            self.strings.append(value)
+        return code
+
+    def value(self, code):
+        return None if code == NULL_CODE else self.strings[code]
+
+    def __len__(self):
+        return len(self.strings)
+
+
+class PackedStrings:
+    # str column as one utf-8 buffer plus the end offset of every row, instead of one str object per row
+    # None rows are kept by row number, rows set after the fact (inline continuations) are kept as str
+
+    def __init__(self):
+        self.data = bytearray()
+        self.ends = array.array("I")
+        self.nulls = set()
+        self.replaced = {}
+
+    def append(self, value):
+        if value is None:
+            self.nulls.add(len(self.ends))
+        else:
+            self.data += value.encode("utf-8")
+        try:
+            self.ends.append(len(self.data))
+        except OverflowError:
+            # uint32 offsets, widened to int64 if a filing ever holds more than 4 GB of text
+            self.ends = array.array("q", self.ends)
+            self.ends.append(len(self.data))
+
+    def __getitem__(self, row):
+        if row in self.replaced:
+            return self.replaced[row]
+        if row in self.nulls:
+            return None
+        ends = self.ends
+        return self.data[ends[row - 1] if row else 0:ends[row]].decode("utf-8")
+
+    def __setitem__(self, row, value):
+        self.replaced[row] = value
+
+    def tolist(self, rows=None):
+        rows = range(len(self.ends)) if rows is None else rows
+        if self.nulls or self.replaced:
+            return [self[row] for row in rows]
+        data = self.data
+        ends = self.ends
+        return [data[ends[row - 1] if row else 0:ends[row]].decode("utf-8") for row in rows]
+
+    def __len__(self):
+        return len(self.ends)
+
+    def __iter__(self):
+        return iter(self.tolist())
+
+
+class Fact:
+    # light read-only view of one row, behaves like the old fact dict for .get() / [] / repr
+    __slots__ = ("store", "row")
+
+    def __init__(self, store, row):
+        self.store = store
+        self.row = row
+
+    def get(self, key, default=None):
+        if key not in self.store.columns:
+            return default
+        return self.store.value(key, self.row)
+
+    def __getitem__(self, key):
+        if key not in self.store.columns:
+            raise KeyError(key)
+        return self.store.value(key, self.row)
+
+    def to_dict(self):
+        return {name: self.store.value(name, self.row) for name in COLUMNS}
+
+    def __repr__(self):
+        return repr(self.to_dict())
+
+    def __eq__(self, other):
+        if isinstance(other, Fact):
+            other = other.to_dict()
+        return self.to_dict() == other
+
+
+class FactStore:
+
+    def __init__(self):
+        self.strings = StringTable()
+        self.columns = {name: array.array("i") for name in CODED_COLUMNS}
+        self.columns["value_raw"] = PackedStrings()
+        # NaN stands for "not numeric" (None in the old dicts)
+        self.columns["value_numeric"] = array.array("d")
+
+    def append(self, tag_local, tag_prefix, gaap_id_candidate, context_ref, unit_ref, decimals, value_raw, value_numeric=None) -> int:
+        # hot path, one call per fact: most strings are already in the table,
+        # so try the plain dict lookup before falling back to StringTable.code
+        get = self.strings.codes.get
+        code = self.strings.code
+        columns = self.columns
+        c = get(tag_local)
+        columns["tag_local"].append(code(tag_local) if c is None else c)
+        c = get(tag_prefix)
+        columns["tag_prefix"].append(code(tag_prefix) if c is None else c)
+        c = get(gaap_id_candidate)
+        columns["gaap_id_candidate"].append(code(gaap_id_candidate) if c is None else c)
+        c = get(context_ref)
+        columns["contextRef"].append(code(context_ref) if c is None else c)
+        c = get(unit_ref)
+        columns["unitRef"].append(code(unit_ref) if c is None else c)
+        c = get(decimals)
+        columns["decimals"].append(code(decimals) if c is None else c)
+        columns["value_raw"].append(value_raw)
+        numbers = columns["value_numeric"]
+        numbers.append(math.nan if value_numeric is None else value_numeric)
+        return len(numbers) - 1
+
+    # fill value_numeric for every row in one vectorized pass (see XBRLNumeric)
+    def normalize_numeric(self, scale=None, sign=None):
+        if not len(self):
+            return None
+        result = XBRLNumeric.normalize_numeric(self.column("value_raw"), self.column("decimals"), scale, sign, exact=False)
+        values = array.array("d")
+        values.frombytes(result.values.astype("float64").tobytes())
+        self.columns["value_numeric"] = values
+        return result
+
+    def value(self, name, row):
+        if name == "value_raw":
+            return self.columns["value_raw"][row]
+        if name == "value_numeric":
+            v = self.columns["value_numeric"][row]
+            return None if math.isnan(v) else v
+        return self.strings.value(self.columns[name][row])
+
+    # whole column decoded to python values (None for missing)
+    def column(self, name, rows=None):
+        rows = range(len(self)) if rows is None else rows
+        if name in CODED_COLUMNS:
+            codes = self.columns[name]
+            lookup = self.strings.strings + [None]  # NULL_CODE (-1) lands on the trailing None
+            return [lookup[codes[i]] for i in rows]
+        if name == "value_raw":
+            return self.columns["value_raw"].tolist(rows)
+        return [self.value(name, i) for i in rows]
+
+    # rows as tuples of the requested columns, without building a dict per fact
+    def iter_rows(self, names=COLUMNS, rows=None):
+        columns = [self.column(name, rows) for name in names]
+        return zip(*columns)
+
+    def __len__(self):
+        return len(self.columns["value_raw"])
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield Fact(self, row)
+
+    def __getitem__(self, row):
+        if row < 0:
+            row += len(self)
+        if not 0 <= row < len(self):
+            raise IndexError(row)
+        return Fact(self, row)
+
+    def to_dicts(self, rows=None):
+        return [dict(zip(COLUMNS, values)) for values in self.iter_rows(COLUMNS, rows)]
+
+    # keeps the csv text of storage_values identical to the old list of dicts
+    def __repr__(self):
+        return repr(self.to_dicts())
+
+
+class FactRows:
+    # subset of a FactStore (facts of one concept, unmapped facts, ...) kept as row numbers
+    __slots__ = ("store", "rows")
+
+    def __init__(self, store, rows=None):
+        self.store = store
+        self.rows = array.array("i", rows or [])
+
+    def append(self, row):
+        self.rows.append(row)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        for row in self.rows:
+            yield Fact(self.store, row)
+
+    def __getitem__(self, index):
+        return Fact(self.store, self.rows[index])
+
+    def column(self, name):
+        return self.store.column(name, self.rows)
+
+    def iter_rows(self, names=COLUMNS):
+        return self.store.iter_rows(names, self.rows)
+
+    def to_dicts(self):
+        return self.store.to_dicts(self.rows)
+
+    def __repr__(self):
+        return repr(self.to_dicts())
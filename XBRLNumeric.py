@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# vectorized number normalization for XBRL fact values
+# takes whole columns (value_raw, decimals, scale, sign) and converts them in one pass
+# with pandas string ops instead of a regex + Decimal per fact
+#
+# XBRL semantics used here:
+#   scale    (inline XBRL) multiplies the shown value by 10 ** scale ("in millions" -> 6)
+#   sign     "-" negates the shown value
+#   decimals is the precision of the reported value, it does NOT rescale it
+#            (an instance value of 1000000000 with decimals="-6" is one billion)
+
+import collections
+import decimal
+
+import numpy as np
+import pandas as pd
+
+# same pattern as parse_numeric_text_to_float, first number found in the text (".5" included)
+NUMBER_PATTERN = r"(?P<sign>[-+]?)(?=\.?\d)(?P<int>\d*)(?:\.(?P<frac>\d+))?(?:[eE](?P<exp>[-+]?\d+))?"
+
+NULL_TEXT = ("", "null", "n/a")
+
+# int64 holds 18 digits safely, longer mantissas fall back to the float only
+MAX_MANTISSA_DIGITS = 18
+
+# values: float64 (NaN when not numeric)
+# mantissa / exponent: exact value = mantissa * 10 ** exponent (int64, valid where exact is True)
+# decimals: float64 precision attribute (inf for "INF", NaN when missing)
+NumericColumns = collections.namedtuple("NumericColumns", ["values", "mantissa", "exponent", "exact", "decimals"])
+
+
+def _int_column(values, length):
+    if values is None:
+        return np.zeros(length, dtype="int64")
+    numbers = pd.to_numeric(pd.Series(values, dtype=object), errors="coerce")
+    return numbers.fillna(0).to_numpy(dtype="int64")
+
+
+def _decimals_column(values, length):
+    if values is None:
+        return np.full(length, np.nan)
+    s = pd.Series(values, dtype=object).astype("string").str.strip()
+    out = pd.to_numeric(s, errors="coerce").to_numpy(dtype="float64", na_value=np.nan, copy=True)
+    out[(s.str.upper() == "INF").fillna(False).to_numpy()] = np.inf
+    return out
+
+
+# string pipeline for values that are not plain numbers: nulls, "1,234", "(1,234)", "$ 12.50 ..."
+# returns the number parts found in each row plus the accounting-parentheses flag
+def _split_number_text(s):
+    s = s.astype("string").str.strip()
+    null = s.isna() | s.str.lower().isin(NULL_TEXT)
+    # Remove thousands separators
+    s = s.str.replace(",", "", regex=False)
+    # accounting negatives: (1,234) -> 1234 flagged negative
+    paren = (s.str.startswith("(") & s.str.endswith(")")).fillna(False)
+    s = s.mask(paren, s.str.slice(1, -1).str.strip())
+
+    parts = s.str.extract(NUMBER_PATTERN)
+    parts["found"] = ((parts["int"].notna() | parts["frac"].notna()) & ~null).fillna(False)
+    parts["paren"] = paren
+    return parts
+
+
+def _parts_to_float(parts):
+    matched = (parts["sign"].fillna("") + parts["int"].fillna("").replace("", "0")
+               + ("." + parts["frac"]).fillna("") + ("e" + parts["exp"]).fillna(""))
+    values = pd.to_numeric(matched.where(parts["found"]), errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    return np.where(parts["paren"].to_numpy(), -values, values)
+
+
+# value_raw, decimals, scale and sign are equal length sequences (decimals/scale/sign may be None)
+# exact=False skips the mantissa / exponent columns when only floats are needed
+def normalize_numeric(value_raw, decimals=None, scale=None, sign=None, exact=True) -> NumericColumns:
+    length = len(value_raw)
+    raw = pd.Series(value_raw, dtype=object)
+
+    # fast path: plain numbers ("1000000", "-12.5", "1.5E3") go through pandas' C parser in one call,
+    # only what it cannot read (separators, parentheses, surrounding text) takes the string pipeline
+    values = pd.to_numeric(raw, errors="coerce").to_numpy(dtype="float64", na_value=np.nan, copy=True)
+    leftover = np.isnan(values) & raw.notna().to_numpy()
+    if leftover.any():
+        values[leftover] = _parts_to_float(_split_number_text(raw[leftover]))
+
+    if exact:
+        # exact path: digits as an int64 mantissa and a power of ten exponent
+        parts = _split_number_text(raw)
+        frac = parts["frac"].fillna("")
+        digits = parts["int"].fillna("") + frac
+        is_exact = (parts["found"] & (digits.str.len() <= MAX_MANTISSA_DIGITS)).fillna(False).to_numpy()
+        mantissa = pd.to_numeric(digits.where(is_exact, "0"), errors="coerce").fillna(0).to_numpy(dtype="int64")
+        exponent = (pd.to_numeric(parts["exp"], errors="coerce").fillna(0).to_numpy(dtype="int64")
+                    - frac.str.len().fillna(0).to_numpy(dtype="int64"))
+        negative = (parts["sign"] == "-").fillna(False).to_numpy() ^ parts["paren"].to_numpy()
+        mantissa = np.where(negative, -mantissa, mantissa)
+    else:
+        is_exact = np.zeros(length, dtype=bool)
+        mantissa = np.zeros(length, dtype="int64")
+        exponent = np.zeros(length, dtype="int64")
+
+    if sign is not None:
+        flip = (pd.Series(sign, dtype=object) == "-").to_numpy()
+        values = np.where(flip, -values, values)
+        mantissa = np.where(flip, -mantissa, mantissa)
+
+    if scale is not None:
+        scale_col = _int_column(scale, length)
+        values = values * np.power(10.0, scale_col)
+        exponent = exponent + scale_col
+
+    # non finite results are "not numeric", like the scalar version
+    bad = ~np.isfinite(values)
+    values[bad] = np.nan
+    is_exact &= ~bad
+
+    return NumericColumns(values, mantissa, exponent, is_exact, _decimals_column(decimals, length))
+
+
+# exact decimal.Decimal objects for the rows that have them (None elsewhere), built on demand
+def to_decimals(columns: NumericColumns) -> list:
+    out = []
+    for m, e, ok, v in zip(columns.mantissa.tolist(), columns.exponent.tolist(), columns.exact.tolist(), columns.values.tolist()):
+        if ok:
+            out.append(decimal.Decimal(m).scaleb(e))
+        elif v == v:
+            # too many digits for int64, the float is the best we have
+            out.append(decimal.Decimal(repr(v)))
+        else:
+            out.append(None)
+    return out
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# on disk cache of parse_linkbases + parse_instance_doc results (storage_list, storage_values, storage_gaap)
+# the key is the sha256 of every input file plus the parser version, so an unchanged filing
+# loads back in one pickle read and any change to a document or to the parsers re-parses it.
+# pickle keeps the FactStore arrays as raw bytes and the FactRows pointing at the same store
+
+import contextlib
+import gc
+import hashlib
+import os
+import pathlib
+import pickle
+
+import SECMetrics
+import XBRLFactStore
+import XBRLNumeric
+import XBRLStreamParsing
+
+# shared cache root with the HTTP and ticker caches
+CACHE_DIR = pathlib.Path.cwd().joinpath("folder_to_store_sec_cache", "parsed")
+
+# bump when the parsed layout changes in a way the module sources below do not show
+PARSER_VERSION = 1
+
+# the parser modules, their source is part of the version so editing them invalidates the cache
+PARSER_MODULES = (XBRLStreamParsing, XBRLFactStore, XBRLNumeric)
+
+# read size for hashing the input documents
+CHUNK_SIZE = 1 << 20
+
+_parser_digest = None
+
+
+def file_digest(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def parser_version() -> str:
+    global _parser_digest
+    if _parser_digest is None:
+        digest = hashlib.sha256(str(PARSER_VERSION).encode("utf-8"))
+        for module in PARSER_MODULES:
+            digest.update(pathlib.Path(module.__file__).read_bytes())
+        _parser_digest = f"{PARSER_VERSION}-{digest.hexdigest()[:16]}"
+    return _parser_digest
+
+
+# the results are hundreds of thousands of small dicts, the cyclic GC scanning them
+# while they are built costs more than the pickling itself
+@contextlib.contextmanager
+def _gc_paused():
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+class ParseCache:
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = pathlib.Path(cache_dir) if cache_dir else CACHE_DIR
+        self.hits = 0
+        self.misses = 0
+
+    # xml_files as returned by find_xml_files, missing documents count as "absent"
+    def key(self, xml_files) -> str:
+        digest = hashlib.sha256(parser_version().encode("utf-8"))
+        for kind in sorted(xml_files):
+            path = xml_files[kind]
+            exists = path is not None and pathlib.Path(path).exists()
+            digest.update(f"{kind}={file_digest(path) if exists else 'absent'};".encode("utf-8"))
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return self.cache_dir / f"{key}.pickle"
+
+    # (storage_list, storage_values, storage_gaap) or None
+    def load(self, key):
+        try:
+            with open(self._path(key), "rb") as fh, _gc_paused():
+                products = pickle.load(fh)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            self.misses += 1
+            SECMetrics.incr("parse_cache_misses")
+            return None
+        self.hits += 1
+        SECMetrics.incr("parse_cache_hits")
+        return products
+
+    # written to a temp file and renamed, a reader never sees half an entry
+    def store(self, key, storage_list, storage_values, storage_gaap):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        path = self._path(key)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with open(tmp_path, "wb") as fh, _gc_paused():
+            pickle.dump((storage_list, storage_values, storage_gaap), fh, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        return path
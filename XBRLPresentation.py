@@ -0,0 +1,308 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# presentation linkbase as ordered statement trees, and the primary statements rendered from the facts
+# the parent-child arcs of every role become one depth first list of nodes, in the order the filer
+# shows them, with each line's depth, order and preferredLabel worked out once when the _pre.xml is read
+# the balance sheet, income statement and cash flow roles are picked by their role uri, and each
+# statement is a merge of its lines with one frame of the filing's facts, no html table scraping:
+#   facts in contexts with dimensions (segments, members) are left out, the face statements show none
+#   balance sheet columns are instants, the other statements' columns are durations
+#   instants in a duration statement (cash at the start / end) go to the period they open or close,
+#   by their preferredLabel
+#   negated labels flip the sign, the line reads the way the filer shows it
+#   a period with less than half the values of the fullest one is left out (the year before the
+#   balance sheet's, reported for the cash flow's opening balance, is no balance sheet column)
+
+import collections
+import re
+
+import numpy as np
+import pandas as pd
+
+import XBRLCalculation
+import XBRLStreamParsing
+
+PRESENTATION_LINK = f"{XBRLStreamParsing.LINK_NS}presentationLink"
+LABEL_LINK = f"{XBRLStreamParsing.LINK_NS}labelLink"
+
+PARENT_CHILD = "http://www.xbrl.org/2003/arcrole/parent-child"
+CONCEPT_LABEL = "http://www.xbrl.org/2003/arcrole/concept-label"
+STANDARD_LABEL = "http://www.xbrl.org/2003/role/label"
+
+# kind -> pattern on the last part of the role uri, lower case ("CONSOLIDATEDBALANCESHEETS", "StatementOfIncome")
+STATEMENT_ROLES = {
+    "balance_sheet": re.compile(r"balancesheet|financialposition|financialcondition|statementsofcondition"),
+    "income_statement": re.compile(r"income|operations|earnings"),
+    "cash_flow": re.compile(r"cashflow"),
+}
+
+# roles that mention a statement without being it
+STATEMENT_EXCLUDE = re.compile(r"parenthetical|details|polic|tables|narrative|schedule|equity")
+
+# "comprehensive income" is its own statement, a role that is only that is no income statement
+COMPREHENSIVE = re.compile(r"comprehensive(?:income|loss)")
+
+# statements whose columns are instants, the others use durations
+INSTANT_STATEMENTS = ("balance_sheet",)
+
+# hypercube scaffolding of a statement role, not lines of the statement
+STRUCTURE_SUFFIXES = ("Table", "Axis", "Domain", "Member", "LineItems")
+
+# share of the fullest period's values a period needs to be a column
+MIN_COLUMN_SHARE = 0.5
+
+# one line of a statement, in display order
+PresentationNode = collections.namedtuple("PresentationNode", ["concept", "parent", "depth", "order", "preferred_label"])
+
+
+class PresentationTree:
+
+    # role -> [PresentationNode] in display order, roles in the order the linkbase has them
+    def __init__(self, roles):
+        self.roles = dict(roles)
+
+    # one pass over a _pre.xml (plain or from the document store)
+    # loc labels are local to their link, so arcs are resolved when the link closes
+    @classmethod
+    def from_linkbase(cls, file_path):
+        role_arcs = {}
+        prohibited = set()
+        locs = {}
+        arcs = []
+        wanted = ("presentationLink", "loc", "presentationArc")
+        for record in XBRLStreamParsing.iter_linkbase(file_path, PRESENTATION_LINK, "presentation", wanted):
+            if isinstance(record, XBRLStreamParsing.LocRecord):
+                locs.setdefault(record.label, XBRLCalculation.concept_id(record.href or ""))
+                continue
+            if isinstance(record, XBRLStreamParsing.ArcRecord):
+                if record.arcrole == PARENT_CHILD:
+                    arcs.append(record)
+                continue
+            resolved = role_arcs.setdefault(record.role, [])
+            for arc in arcs:
+                if arc.from_label not in locs or arc.to_label not in locs:
+                    continue
+                parent, child = locs[arc.from_label], locs[arc.to_label]
+                if arc.attrs.get("use") == "prohibited":
+                    prohibited.add((record.role, parent, child))
+                    continue
+                order = 1.0 if arc.order is None else arc.order
+                resolved.append((parent, child, order, arc.preferred_label))
+            locs = {}
+            arcs = []
+
+        roles = {}
+        for role, resolved in role_arcs.items():
+            if prohibited:
+                resolved = [arc for arc in resolved if (role, arc[0], arc[1]) not in prohibited]
+            roles[role] = _depth_first(resolved)
+        return cls(roles)
+
+    def __len__(self):
+        return len(self.roles)
+
+    def nodes(self, role) -> list:
+        return self.roles.get(role, [])
+
+    # every node as a row: role, concept, parent, depth, order, preferred_label
+    def to_frame(self) -> pd.DataFrame:
+        rows = [(role, *node) for role, nodes in self.roles.items() for node in nodes]
+        return pd.DataFrame(rows, columns=["role", *PresentationNode._fields])
+
+
+# (parent, child, order, preferredLabel) arcs of one role -> nodes in display order
+# roots are the parents nobody points at, children follow by order (ties keep the linkbase order),
+# a concept repeating one of its own ancestors is not expanded again
+def _depth_first(arcs) -> list:
+    children = {}
+    targets = set()
+    for parent, child, order, preferred in arcs:
+        children.setdefault(parent, []).append((order, child, preferred))
+        targets.add(child)
+    for items in children.values():
+        items.sort(key=lambda item: item[0])
+
+    nodes = []
+    stack = [(root, None, 0, None, None, frozenset()) for root in reversed([p for p in children if p not in targets])]
+    while stack:
+        concept, parent, depth, order, preferred, path = stack.pop()
+        nodes.append(PresentationNode(concept, parent, depth, order, preferred))
+        path = path | {concept}
+        for child_order, child, child_preferred in reversed(children.get(concept, ())):
+            if child not in path:
+                stack.append((child, concept, depth + 1, child_order, child_preferred, path))
+    return nodes
+
+
+# one pass over a _lab.xml -> {concept: {label role: text}}, labels in other languages are skipped
+def read_labels(file_path, lang="en") -> dict:
+    labels = {}
+    locs = {}
+    resources = {}
+    arcs = []
+    wanted = ("labelLink", "loc", "label", "labelArc")
+    for record in XBRLStreamParsing.iter_linkbase(file_path, LABEL_LINK, "label", wanted):
+        if isinstance(record, XBRLStreamParsing.LocRecord):
+            locs.setdefault(record.label, XBRLCalculation.concept_id(record.href or ""))
+            continue
+        if isinstance(record, XBRLStreamParsing.LabelRecord):
+            if not lang or (record.lang or "").lower().startswith(lang):
+                resources.setdefault(record.label, []).append((record.role or STANDARD_LABEL, record.text))
+            continue
+        if isinstance(record, XBRLStreamParsing.ArcRecord):
+            if record.arcrole == CONCEPT_LABEL:
+                arcs.append(record)
+            continue
+        for arc in arcs:
+            concept = locs.get(arc.from_label)
+            if concept is None:
+                continue
+            for role, text in resources.get(arc.to_label, ()):
+                labels.setdefault(concept, {}).setdefault(role, (text or "").strip())
+        locs = {}
+        resources = {}
+        arcs = []
+    return labels
+
+
+# kind -> role of the primary statements among the roles, the first matching role of each kind wins
+def statement_roles(roles) -> dict:
+    found = {}
+    for role in roles:
+        name = (role or "").rstrip("/").rsplit("/", 1)[-1].lower()
+        if STATEMENT_EXCLUDE.search(name):
+            continue
+        name = COMPREHENSIVE.sub("", name)
+        for kind, pattern in STATEMENT_ROLES.items():
+            if kind not in found and pattern.search(name):
+                found[kind] = role
+                break
+    return found
+
+
+# the numeric facts of contexts without dimensions, one row per concept and context (first one reported):
+# concept, context, period_start, period_end, instant, value
+def statement_facts(storage_values) -> pd.DataFrame:
+    columns = ["concept", "context", "period_start", "period_end", "instant", "value"]
+    store = storage_values.get("_facts_list")
+    if store is None or not len(store):
+        return pd.DataFrame(columns=columns)
+    contexts = storage_values.get("_contexts", {})
+
+    # per string code: a plain context or not, and its period (last entry: NULL_CODE)
+    strings = store.strings.strings
+    empty = {}
+    periods = [contexts.get(s, empty) for s in strings] + [empty]
+    plain = np.array([bool(p) and not p.get("dimensions") for p in periods])
+    period_start = np.array([p.get("period_start") for p in periods], dtype=object)
+    period_end = np.array([p.get("period_end") for p in periods], dtype=object)
+    instant = np.array([p.get("instant") for p in periods], dtype=object)
+    lookup = np.array(strings + [None], dtype=object)
+
+    concept = np.frombuffer(store.columns["gaap_id_candidate"], dtype=np.int32)
+    context = np.frombuffer(store.columns["contextRef"], dtype=np.int32)
+    value = np.frombuffer(store.columns["value_numeric"], dtype=np.float64)
+    rows = np.flatnonzero(plain[context] & ~np.isnan(value))
+    facts = pd.DataFrame({
+        "concept": lookup[concept[rows]],
+        "context": lookup[context[rows]],
+        "period_start": period_start[context[rows]],
+        "period_end": period_end[context[rows]],
+        "instant": instant[context[rows]],
+        "value": value[rows],
+    }, columns=columns)
+    return facts.drop_duplicates(["concept", "context"], ignore_index=True)
+
+
+# depth of each line counted over the lines that are shown, hidden ones (hypercube scaffolding) drop out
+def _visible_depths(depths, hidden) -> list:
+    path = []
+    out = []
+    for depth, skip in zip(depths, hidden):
+        while path and path[-1][0] >= depth:
+            path.pop()
+        out.append(sum(1 for _, shown in path if shown))
+        path.append((depth, not skip))
+    return out
+
+
+# "http://www.xbrl.org/2009/role/negatedPeriodStartLabel" -> "negatedperiodstartlabel"
+def _label_name(role) -> str:
+    return (role or "").rsplit("/", 1)[-1].lower()
+
+
+# one statement role as a frame: concept, label, depth, then one column per period, newest first
+# kind picks instant (balance sheet) or duration columns, None decides by the facts found
+def render_statement(tree, role, facts, labels=None, kind=None) -> pd.DataFrame:
+    nodes = tree.nodes(role)
+    labels = labels or {}
+    hidden = [node.concept.endswith(STRUCTURE_SUFFIXES) for node in nodes]
+    lines = pd.DataFrame({
+        "line": np.arange(len(nodes)),
+        "concept": [node.concept for node in nodes],
+        "preferred": [_label_name(node.preferred_label) for node in nodes],
+    })
+    joined = lines.merge(facts, on="concept")
+    durations = joined[joined["period_start"].notna() & joined["period_end"].notna()]
+    instants = joined[joined["instant"].notna()]
+    instant_columns = kind in INSTANT_STATEMENTS if kind else durations.empty
+
+    if instant_columns:
+        placed = instants.assign(column=instants["instant"])
+        order = sorted(placed["column"].unique(), reverse=True)
+    else:
+        placed = durations.assign(column=durations["period_start"] + "/" + durations["period_end"])
+        periods = durations[["period_start", "period_end"]].drop_duplicates()
+        periods = periods.assign(column=periods["period_start"] + "/" + periods["period_end"])
+        # a start balance is reported on the day before the period starts (or on its first day),
+        # an end balance on its last day
+        starting = instants["preferred"].str.contains("periodstart")
+        day_after = (pd.to_datetime(instants["instant"], errors="coerce") + pd.Timedelta(days=1)).dt.strftime("%Y-%m-%d")
+        opening = pd.concat([
+            instants[starting].merge(periods, left_on="instant", right_on="period_start", suffixes=("_fact", "")),
+            instants[starting].assign(instant=day_after[starting])
+            .merge(periods, left_on="instant", right_on="period_start", suffixes=("_fact", "")),
+        ])
+        closing = instants[~starting].merge(periods, left_on="instant", right_on="period_end", suffixes=("_fact", ""))
+        placed = pd.concat([placed, opening, closing], ignore_index=True)
+        ends = periods.sort_values(["period_end", "period_start"], ascending=False)
+        order = ends["column"].tolist()
+
+    placed = placed.drop_duplicates(["line", "column"])
+    sign = np.where(placed["preferred"].str.contains("negated"), -1.0, 1.0)
+    values = (placed.assign(value=placed["value"] * sign)
+              .pivot(index="line", columns="column", values="value")
+              .reindex(index=lines["line"], columns=order))
+    filled = values.notna().sum()
+    values = values.loc[:, filled >= MIN_COLUMN_SHARE * filled.max()] if len(filled) else values
+
+    shown = [not skip for skip in hidden]
+    out = pd.DataFrame({
+        "concept": lines["concept"],
+        "label": [_line_label(labels, node) for node in nodes],
+        "depth": _visible_depths([node.depth for node in nodes], hidden),
+    })
+    out = pd.concat([out, values.reset_index(drop=True)], axis=1)[shown].reset_index(drop=True)
+    out.columns.name = None
+    out.attrs["role"] = role
+    return out
+
+
+# the line's preferred label, else the standard one, else the concept's local name
+def _line_label(labels, node) -> str:
+    concept_labels = labels.get(node.concept, {})
+    return (concept_labels.get(node.preferred_label) or concept_labels.get(STANDARD_LABEL)
+            or node.concept.rpartition(";")[2])
+
+
+# kind -> rendered frame for the balance sheet, income statement and cash flow the tree has
+# roles ({kind: role uri}) overrides the roles statement_roles picks
+def render_statements(tree, storage_values, labels=None, roles=None) -> dict:
+    found = statement_roles(tree.roles)
+    found.update(roles or {})
+    facts = statement_facts(storage_values)
+    return {
+        kind: render_statement(tree, role, facts, labels, kind)
+        for kind, role in found.items() if tree.nodes(role)
+    }
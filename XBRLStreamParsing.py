@@ -0,0 +1,512 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# streaming (iterparse) versions of the XBRL parsers in AllDataUserToolScrapingParsingSEC
+# one pass over the document, namespaces taken from start-ns events,
+# and every processed element is cleared so memory stays flat on 100 MB+ filings
+# documents are read through SECDocumentStore.open_document, compressed ones are never inflated on disk
+
+import collections
+import decimal
+import re
+
+import lxml.etree as ETL
+
+import SECDocumentStore
+import SECMetrics
+import XBRLFactStore
+
+LINK_NS = "{http://www.xbrl.org/2003/linkbase}"
+XLINK_ROLE = "{http://www.w3.org/1999/xlink}role"
+
+# typed linkbase records, attrs keeps every attribute with the namespace stripped
+# (the same dict the old parse_linkbases stored in storage_list)
+LinkRecord = collections.namedtuple("LinkRecord", ["namespace_label", "local", "role", "attrs"])
+LocRecord = collections.namedtuple("LocRecord", ["namespace_label", "local", "link_role", "label", "href", "attrs"])
+ArcRecord = collections.namedtuple("ArcRecord", [
+    "namespace_label", "local", "link_role", "arcrole", "from_label", "to_label",
+    "order", "weight", "preferred_label", "attrs"])
+LabelRecord = collections.namedtuple("LabelRecord", ["namespace_label", "local", "link_role", "label", "role", "lang", "text", "attrs"])
+
+# "{http://www.w3.org/1999/xlink}label" -> "label", worked out once per distinct key
+_attr_keys = {}
+
+# inline XBRL (the primary .htm of a filing), both the 2013 and the older 2008 namespaces
+IX_NAMESPACES = ("http://www.xbrl.org/2013/inlineXBRL", "http://www.xbrl.org/2008/inlineXBRL")
+XSI_NIL = "{http://www.w3.org/2001/XMLSchema-instance}nil"
+
+# elements whose content is read when they close, nothing under them is cleared before that
+IX_KEEP = {"nonFraction", "nonNumeric", "continuation", "footnote", "context", "unit"}
+
+# ixt transforms that change how the shown number is read (local name of the format QName)
+IX_ZERO_FORMATS = {"fixed-zero", "zerodash", "numdash", "fixed-empty"}
+IX_COMMA_DECIMAL_FORMATS = {"num-comma-decimal", "numcommadecimal", "numdotcomma", "numspacecomma"}
+
+# digits of a shown number once the transform separators are gone
+IX_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+
+
+def _split_tag(tag):
+    if tag[0] == "{":
+        ns_uri, localname = tag[1:].split("}", 1)
+        return ns_uri, localname
+    return None, tag
+
+
+# drop an element once handled, plus the already handled siblings before it,
+# so the tree never holds more than the element being read
+def _release(element):
+    element.clear()
+    parent = element.getparent()
+    if parent is not None:
+        while element.getprevious() is not None:
+            del parent[0]
+
+
+# period of a context, plus "dimensions" {axis: member} when it has a segment / scenario
+# (only set then, the plain contexts keep the keys they always had)
+def _read_context(el):
+    entity_id = None
+    period_start = None
+    period_end = None
+    instant = None
+    dimensions = {}
+    for sub in el.iter():
+        tag = sub.tag
+        if not isinstance(tag, str):
+            continue
+        local = tag.rsplit("}", 1)[-1]
+        if local == "identifier":
+            entity_id = sub.text
+        elif local == "startDate":
+            period_start = sub.text
+        elif local == "endDate":
+            period_end = sub.text
+        elif local == "instant":
+            instant = sub.text
+        elif local == "explicitMember":
+            dimensions[sub.get("dimension")] = (sub.text or "").strip()
+        elif local == "typedMember":
+            dimensions[sub.get("dimension")] = "".join(sub.itertext()).strip()
+    context = {
+        "entity_identifier": entity_id,
+        "period_start": period_start,
+        "period_end": period_end,
+        "instant": instant
+    }
+    if dimensions:
+        context["dimensions"] = dimensions
+    return context
+
+
+# same results as parse_instance_doc (contexts, units, facts, nonNumeric mapping),
+# written into storage_values / storage_gaap in place
+def parse_instance_doc_stream(file_htm, storage_values, storage_list, storage_gaap):
+    storage_facts = XBRLFactStore.FactStore()
+    uri_to_prefix = {}
+    contexts = {}
+    units = {}
+    # attach contexts/units up front so storage_values keeps the same key order as before
+    storage_values["_contexts"] = contexts
+    storage_values["_units"] = units
+    visited = 0
+
+    source = None
+    try:
+        source = SECDocumentStore.open_document(file_htm)
+        events = ETL.iterparse(source, events=("start-ns", "end"), huge_tree=True)
+        for event, payload in events:
+            if event == "start-ns":
+                prefix, uri = payload
+                # root declarations come first and win, like the root nsmap did
+                uri_to_prefix.setdefault(uri, prefix or "")
+                continue
+
+            visited += 1
+            element = payload
+            tag = element.tag
+            if not isinstance(tag, str):
+                continue
+            ns_uri, localname = _split_tag(tag)
+            parent = element.getparent()
+            # only direct children of the root are complete items (context, unit, fact)
+            top_level = parent is not None and parent.getparent() is None
+
+            if localname == "context":
+                cid = element.get("id")
+                if cid:
+                    contexts[cid] = _read_context(element)
+            elif localname == "unit":
+                uid = element.get("id")
+                if uid:
+                    # store unit element text or measures found
+                    measures = [m.text for m in element.iter("{*}measure")]
+                    units[uid] = {"measures": measures}
+
+            #nonNumeric/nonFractional specially
+            elif "nonNumeric" in tag or "nonFractional" in tag:
+                attr_name = element.get("name")
+                if attr_name:
+                    _map_non_numeric(element, attr_name, storage_values, storage_gaap)
+
+            else:
+                # skip things that are not facts (no contextRef)
+                ctx = element.get("contextRef")
+                if ctx is not None:
+                    prefix = uri_to_prefix.get(ns_uri) if ns_uri else None
+                    if prefix in (None, ""):
+                        gaap_candidate = localname
+                    else:
+                        gaap_candidate = f"{prefix};{localname}"
+
+                    decimals = element.get("decimals")
+                    value_raw = element.text.strip() if element.text else None
+                    # value_numeric is filled for the whole column after the pass
+                    row = storage_facts.append(
+                        localname, prefix, gaap_candidate, ctx, element.get("unitRef"), decimals, value_raw
+                    )
+                    _file_fact(row, gaap_candidate, storage_facts, storage_values, storage_gaap)
+
+            if top_level:
+                _release(element)
+    except (ETL.XMLSyntaxError, OSError) as e:
+        print(f"Error parsing instance document {file_htm}: {e}")
+        return
+    finally:
+        if source is not None:
+            source.close()
+        SECMetrics.incr("xml_elements", visited)
+
+    storage_facts.normalize_numeric()
+    storage_values["_facts_list"] = storage_facts
+    _count_facts(storage_values)
+
+
+def _count_facts(storage_values):
+    SECMetrics.incr("facts", len(storage_values.get("_facts_list", ())))
+    SECMetrics.incr("contexts", len(storage_values.get("_contexts", ())))
+    SECMetrics.incr("unmapped_facts", len(storage_values.get("_unmapped_facts", ())))
+
+
+# per concept lists hold row numbers into the shared store
+def _file_fact(row, gaap_candidate, storage_facts, storage_values, storage_gaap):
+    if gaap_candidate in storage_gaap:
+        master_key = storage_gaap[gaap_candidate]["master_id"]
+        target = storage_values.setdefault(master_key, {})
+        key = "facts"
+    else:
+        target = storage_values
+        key = "_unmapped_facts"
+    fact_rows = target.get(key)
+    if fact_rows is None:
+        fact_rows = target[key] = XBRLFactStore.FactRows(storage_facts)
+    fact_rows.append(row)
+
+
+def _map_non_numeric(element, attr_name, storage_values, storage_gaap):
+    if attr_name in storage_gaap:
+        g = storage_gaap[attr_name]
+        g["context_ref"] = element.get("contextRef")
+        g["context_id"] = element.get("id")
+        g["continued_at"] = element.get("continuedAt", "null")
+        g["escape"] = element.get("escape", "null")
+        g["format"] = element.get("format", "null")
+        g["unit_ref"] = element.get("unitRef", "null")
+        g["decimals"] = element.get("decimals", "null")
+        g["scale"] = element.get("scale", "null")
+        g["value"] = element.text.strip() if element.text else "null"
+
+        master = g.get("master_id")
+        if master:
+            storage_values.setdefault(master, {})["us_gaap_value"] = g
+    else:
+        # store unmapped nonNumeric if desired
+        storage_values.setdefault("_unmapped_nonNumeric", {})[attr_name] = {
+            "context_ref": element.get("contextRef"),
+            "value": element.text.strip() if element.text else None
+        }
+
+
+# text content of an ix element, ix:exclude parts left out
+def _inline_text(element):
+    parts = [element.text or ""]
+    for child in element:
+        tag = child.tag
+        if not (isinstance(tag, str) and tag.endswith("}exclude")):
+            parts.append(_inline_text(child))
+        parts.append(child.tail or "")
+    return "".join(parts)
+
+
+# shown text of an ix:nonFraction -> the fact value an instance document would hold
+# (ixt transform, then scale and sign applied exactly); None when nil or not a number
+def _inline_number(text, fmt, scale, sign):
+    fmt = (fmt or "").rsplit(":", 1)[-1].lower()
+    text = text.strip()
+    if fmt in IX_ZERO_FORMATS or text in ("-", "\u2014", "\u2013"):
+        number = "0"
+    else:
+        if fmt in IX_COMMA_DECIMAL_FORMATS:
+            text = text.replace(".", "").replace(" ", "").replace(",", ".")
+        else:
+            text = text.replace(",", "").replace(" ", "")
+        match = IX_NUMBER.search(text)
+        if match is None:
+            return None
+        number = match.group(0)
+    value = decimal.Decimal(number)
+    if scale:
+        try:
+            value = value.scaleb(int(scale))
+        except ValueError:
+            pass
+    if sign == "-":
+        value = -value
+    return format(value, "f")
+
+
+# same results as parse_instance_doc_stream, read from an inline XBRL document (the primary .htm)
+# ix:resources give the contexts / units, ix:nonFraction and ix:nonNumeric the facts,
+# and nonNumeric text split over ix:continuation elements is joined back in continuedAt order
+# source is a path or a binary file object (a download already in memory)
+def parse_inline_doc_stream(source, storage_values, storage_list, storage_gaap):
+    storage_facts = XBRLFactStore.FactStore()
+    contexts = {}
+    units = {}
+    storage_values["_contexts"] = contexts
+    storage_values["_units"] = units
+
+    # nonNumeric rows waiting for their continuations: [(row, continuedAt)]
+    continued = []
+    continuations = {}
+    # open IX_KEEP elements, the tree under them stays intact until they close
+    keep_depth = 0
+    visited = 0
+
+    # a path is opened here (and closed again), a file object belongs to the caller
+    opened = None
+    try:
+        if isinstance(source, str) or hasattr(source, "__fspath__"):
+            opened = SECDocumentStore.open_document(source)
+        events = ETL.iterparse(opened or source, events=("start", "end"), huge_tree=True, recover=True)
+        for event, element in events:
+            tag = element.tag
+            if not isinstance(tag, str):
+                continue
+            ns_uri, localname = _split_tag(tag)
+            keep = localname in IX_KEEP and (ns_uri in IX_NAMESPACES or localname in ("context", "unit"))
+            if event == "start":
+                if keep:
+                    keep_depth += 1
+                continue
+
+            visited += 1
+
+            if keep:
+                keep_depth -= 1
+                if localname == "context":
+                    cid = element.get("id")
+                    if cid:
+                        contexts[cid] = _read_context(element)
+                elif localname == "unit":
+                    uid = element.get("id")
+                    if uid:
+                        units[uid] = {"measures": [m.text for m in element.iter("{*}measure")]}
+                elif localname == "continuation":
+                    continuations[element.get("id")] = (_inline_text(element), element.get("continuedAt"))
+                elif localname in ("nonFraction", "nonNumeric"):
+                    name = element.get("name")
+                    if name:
+                        prefix, _, local = name.rpartition(":")
+                        prefix = prefix or None
+                        gaap_candidate = f"{prefix};{local}" if prefix else local
+                        text = _inline_text(element)
+                        if element.get(XSI_NIL) == "true":
+                            value_raw = None
+                        elif localname == "nonFraction":
+                            value_raw = _inline_number(text, element.get("format"), element.get("scale"), element.get("sign"))
+                        else:
+                            value_raw = text.strip() or None
+                        row = storage_facts.append(
+                            local, prefix, gaap_candidate, element.get("contextRef"), element.get("unitRef"),
+                            element.get("decimals"), value_raw
+                        )
+                        _file_fact(row, gaap_candidate, storage_facts, storage_values, storage_gaap)
+                        if localname == "nonNumeric" and element.get("continuedAt"):
+                            continued.append((row, element.get("continuedAt")))
+
+            if keep_depth == 0:
+                _release(element)
+    except (ETL.XMLSyntaxError, OSError) as e:
+        print(f"Error parsing inline XBRL document {source}: {e}")
+        return
+    finally:
+        if opened is not None:
+            opened.close()
+        SECMetrics.incr("xml_elements", visited)
+
+    # continuations can come before or after the fact that points at them
+    values = storage_facts.columns["value_raw"]
+    for row, next_id in continued:
+        parts = [values[row] or ""]
+        seen = set()
+        while next_id and next_id in continuations and next_id not in seen:
+            seen.add(next_id)
+            text, next_id = continuations[next_id]
+            parts.append(text.strip())
+        values[row] = " ".join(p for p in parts if p) or None
+
+    storage_facts.normalize_numeric()
+    storage_values["_facts_list"] = storage_facts
+    _count_facts(storage_values)
+
+
+def _attr_key(key):
+    short = _attr_keys.get(key)
+    if short is None:
+        short = key.split("}", 1)[1] if "}" in key else key
+        _attr_keys[key] = short
+    return short
+
+
+def _to_float(text):
+    if text is None:
+        return None
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+
+def _make_record(namespace_label, local, link_role, element):
+    get_key = _attr_keys.get
+    attrs = {get_key(k) or _attr_key(k): v for k, v in element.items()}
+    xlink_type = attrs.get("type")
+    if xlink_type == "arc":
+        return ArcRecord(
+            namespace_label, local, link_role, attrs.get("arcrole"), attrs.get("from"), attrs.get("to"),
+            _to_float(attrs.get("order")), _to_float(attrs.get("weight")), attrs.get("preferredLabel"), attrs)
+    if xlink_type == "locator":
+        return LocRecord(namespace_label, local, link_role, attrs.get("label"), attrs.get("href"), attrs)
+    if xlink_type == "resource":
+        return LabelRecord(
+            namespace_label, local, link_role, attrs.get("label"), attrs.get("role"), attrs.get("lang"),
+            element.text, attrs)
+    return LinkRecord(namespace_label, local, attrs.get("role"), attrs)
+
+
+# walks the top level namespace_element links and yields (local name, link role, element, is_link)
+# for the wanted tags, clearing each element (and the siblings before it) once the consumer moves on
+# elements come out as they close, so a link itself follows its loc/arc/label children
+def _iter_link_elements(file_path, namespace_element, wanted):
+    # fully qualified tags looked up once, instead of splitting every tag we meet
+    wanted_tags = {f"{LINK_NS}{name}": name for name in wanted}
+    tags = list(set(wanted_tags) | {namespace_element})
+
+    current_link = None
+    link_role = None
+    inside = False
+    visited = 0
+    source = None
+    try:
+        source = SECDocumentStore.open_document(file_path)
+        for _, element in ETL.iterparse(source, events=("end",), tag=tags, huge_tree=True):
+            visited += 1
+            tag = element.tag
+            parent = element.getparent()
+
+            if tag == namespace_element and parent is not None and parent.getparent() is None:
+                if tag in wanted_tags:
+                    yield wanted_tags[tag], element.get(XLINK_ROLE), element, True
+                _release(element)
+                current_link = None
+                continue
+
+            # the enclosing link's start tag (and its role) is already parsed when a child closes
+            if parent is not current_link:
+                current_link = parent
+                grandparent = parent.getparent() if parent is not None else None
+                inside = (parent is not None and parent.tag == namespace_element
+                          and grandparent is not None and grandparent.getparent() is None)
+                link_role = parent.get(XLINK_ROLE) if inside else None
+            if inside and tag in wanted_tags:
+                yield wanted_tags[tag], link_role, element, False
+            _release(element)
+    finally:
+        if source is not None:
+            source.close()
+        SECMetrics.incr("xml_elements", visited)
+
+
+# typed records for the wanted local names inside the top level namespace_element links
+def iter_linkbase(file_path, namespace_element, namespace_label, wanted):
+    for local, link_role, element, _ in _iter_link_elements(file_path, namespace_element, wanted):
+        yield _make_record(namespace_label, local, link_role, element)
+
+
+# same results as parse_linkbases, built from the streamed records
+def parse_linkbases_stream(files_list, parse_labels):
+    storage_list = []
+    storage_values = {}
+    storage_gaap = {}
+    get_key = _attr_keys.get
+
+    for file in files_list:
+        # expect FilingTuple(file_path, namespace_element, namespace_label)
+        if not getattr(file, "file_path", None):
+            print(f"Warning: File for {getattr(file, 'namespace_label', '?')} not found, skipping.")
+            continue
+
+        type_labels = {local: f"{file.namespace_label}_{local}" for local in parse_labels}
+        # the current link's children wait here, so the link row can go in front of them
+        # like the old pre-order walk wrote it
+        link_rows = []
+        try:
+            for local, _, element, is_link in _iter_link_elements(file.file_path, file.namespace_element, parse_labels):
+                element_type_label = type_labels[local]
+                dict_storage = {"item_type": element_type_label}
+                # transfer attributes; strip namespace from attrib keys that contain '}'
+                for key, val in element.items():
+                    dict_storage[get_key(key) or _attr_key(key)] = val
+
+                if is_link:
+                    storage_list.append([file.namespace_label, dict_storage])
+                    storage_list.extend(link_rows)
+                    link_rows = []
+                    continue
+
+                # handle label-specific mapping
+                if element_type_label == "label_label" and "label" in dict_storage:
+                    key_store = dict_storage["label"]
+                    master_key = key_store.replace("lab_", "")
+                    label_split = master_key.split("_")
+                    if len(label_split) >= 2:
+                        gaap_id = f"{label_split[0]};{label_split[1]}"
+                    else:
+                        gaap_id = master_key
+
+                    storage_values.setdefault(master_key, {})
+                    storage_values[master_key].update({
+                        "label_id": key_store,
+                        "location_id": key_store.replace("lab_", "loc_"),
+                        "us_gaap_id": gaap_id,
+                        "us_gaap_values": None,
+                    })
+                    storage_values[master_key][element_type_label] = dict_storage
+
+                    storage_gaap.setdefault(gaap_id, {})
+                    storage_gaap[gaap_id].update({
+                        "id": gaap_id,
+                        "master_id": master_key
+                    })
+                else:
+                    # store other linkbase entries keyed by their item label
+                    link_rows.append([file.namespace_label, dict_storage])
+        except (ETL.XMLSyntaxError, OSError) as e:
+            print(f"Error parsing {file.file_path}: {e}")
+            continue
+        finally:
+            # children of a link the file never closed (truncated document) are kept, as before
+            storage_list.extend(link_rows)
+
+    return storage_list, storage_values, storage_gaap
@@ -0,0 +1,36 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# command line: which batch mode a set of flags ends up in, and with which tickers
+
+import sys
+
+import pytest
+
+import AllDataUserToolScrapingParsingSEC
+import SECBatchPipeline
+
+
+@pytest.fixture
+def bulk_calls(monkeypatch):
+    calls = []
+    monkeypatch.setattr(SECBatchPipeline, "run_bulk_batch", lambda tickers, bulk_dir, out_dir, **kwargs: calls.append(
+        (tickers, bulk_dir, out_dir)))
+    return calls
+
+
+def _run(monkeypatch, argv):
+    monkeypatch.setattr(sys, "argv", ["AllDataUserToolScrapingParsingSEC.py", *argv])
+    return AllDataUserToolScrapingParsingSEC.run(AllDataUserToolScrapingParsingSEC.parse_args())
+
+
+def test_bulk_dir_with_tickers_file(tmp_path, monkeypatch, bulk_calls):
+    tickers_file = tmp_path / "t.txt"
+    tickers_file.write_text("aapl\nmsft, brk.b  # comment\n\naapl\n", encoding="utf-8")
+    _run(monkeypatch, ["--bulk-dir", "bulk", "--tickers-file", str(tickers_file), "--out-dir", str(tmp_path)])
+    assert bulk_calls == [(["AAPL", "MSFT", "BRK.B"], "bulk", str(tmp_path))]
+
+
+def test_bulk_dir_with_ticker(tmp_path, monkeypatch, bulk_calls):
+    _run(monkeypatch, ["--bulk-dir", "bulk", "--ticker", "aapl", "--out-dir", str(tmp_path)])
+    assert bulk_calls == [(["AAPL"], "bulk", str(tmp_path))]
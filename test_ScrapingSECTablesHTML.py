@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# save_tables through every export format, with and without the --values columns
+
+import pandas as pd
+import pytest
+
+import ScrapingSECTablesHTML
+import SECTableWriter
+
+# rows of cell texts, the way SECTableExtractor hands tables over
+TABLE = [
+    ["(in millions)", "2023", "2022"],
+    ["Net sales", "$", "1,200", "$", "1,000"],
+    ["Cost of sales", "(700)", "(650)"],
+    ["Gross margin", "500", "350"],
+]
+
+
+def _read_back(path, fmt):
+    if fmt == "xlsx":
+        return pd.read_excel(path, sheet_name="table_0", dtype=object)
+    if fmt == "csv":
+        return pd.read_csv(path / "table_0.csv", dtype=object)
+    return pd.read_parquet(path / "table_0.parquet")
+
+
+@pytest.mark.parametrize("fmt", SECTableWriter.FORMATS)
+@pytest.mark.parametrize("values", [False, True])
+def test_save_tables(tmp_path, fmt, values):
+    output_file = tmp_path / "AAPL_2024_tables.xlsx"
+    saved = ScrapingSECTablesHTML.save_tables([TABLE], str(output_file), fmt, values)
+    assert saved == 1
+
+    df = _read_back(SECTableWriter.output_path(output_file, fmt), fmt)
+    assert len(df) == len(TABLE)
+    value_columns = [c for c in df.columns if str(c).endswith("_value")]
+    if not values:
+        assert value_columns == []
+        return
+    assert value_columns == ["1_value", "2_value"]
+    # scaled by the "in millions" note, the header row and text cells left empty
+    numbers = pd.to_numeric(df["1_value"].replace("", None), errors="coerce")
+    assert numbers.tolist()[1:] == [1.2e9, -7e8, 5e8]
+    assert pd.isna(numbers.iloc[0])
+
+
+# per share rows keep their number when the note says "except per share amounts"
+EPS_TABLE = [
+    ["(In millions, except per share amounts)", "2023", "2022"],
+    ["Net income", "$", "96,995", "$", "99,803"],
+    ["Earnings per share: Diluted", "$", "6.13", "$", "6.11"],
+    ["Shares used in computing earnings per share", "15,813", "16,326"],
+]
+
+
+def test_save_tables_except_per_share(tmp_path):
+    output_file = tmp_path / "AAPL_2024_tables.xlsx"
+    assert ScrapingSECTablesHTML.save_tables([EPS_TABLE], str(output_file), "parquet", True) == 1
+
+    df = _read_back(SECTableWriter.output_path(output_file, "parquet"), "parquet")
+    assert df["1_value"].tolist()[1:] == [96995e6, 6.13, 15813e6]